@@ -1,4 +1,5 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class ApiConfig(AppConfig):
@@ -6,7 +7,15 @@ class ApiConfig(AppConfig):
     name = "api"
 
     def ready(self):
-        # Start background polling thread when app loads
-        from utils.polling_service import start_polling_service
+        from . import signals  # noqa: F401
 
-        start_polling_service()
+        # The feed is normally ingested (and the field incidents simulated) by
+        # `manage.py run_ingest`; the in-process threads are kept as an opt-in
+        # fallback for single-process demos.
+        if settings.POLLING_IN_PROCESS:
+            from utils.polling_service import start_polling_service
+
+            from .field_feed import start_field_simulation
+
+            start_polling_service()
+            start_field_simulation()
@@ -0,0 +1,151 @@
+"""
+Batched writes for offline-queued field reports.
+
+A batch is a list of operations, each carrying a client-generated ``op_id``.
+All operations are validated up front with a fixed number of queries, the
+valid ones are applied in one transaction with bulk writes, and each applied
+operation's result is stored under its ``op_id``. Replaying a batch (e.g.
+after a dropped response) returns the stored results instead of applying
+the operations again.
+"""
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from utils.clusters import cluster_records
+from utils.kpis import remember, track
+
+from .models import Incident, ProcessedOperation, Task
+from .serializers import IncidentSerializer
+
+TASK_STATUS = "task_status"
+CREATE_INCIDENT = "create_incident"
+OPERATION_TYPES = (TASK_STATUS, CREATE_INCIDENT)
+# Roles allowed per operation, as for the same write through TaskViewSet (PATCH) and IncidentViewSet
+OPERATION_ROLES = {
+    TASK_STATUS: {"admin", "dispatcher", "fieldunit"},
+    CREATE_INCIDENT: {"admin", "dispatcher"},
+}
+
+_last_prune = 0.0
+
+
+class ConcurrentBatch(Exception):
+    """Another request applied some of the same operation ids first."""
+
+
+def _error(op_id, errors):
+    return {"op_id": op_id, "status": "error", "errors": errors}
+
+
+def prune_processed_operations():
+    """Forget operation ids past the retention period, at most once an hour per process."""
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < 3600:
+        return
+    _last_prune = now
+    cutoff = timezone.now() - timedelta(days=settings.BATCH_OPERATION_RETENTION_DAYS)
+    ProcessedOperation.objects.filter(created_at__lt=cutoff).delete()
+
+
+def apply_batch(user, operations):
+    """
+    Validate and apply ``operations`` for ``user``.
+
+    Supported operations:
+        ``{"op_id", "type": "task_status", "task_id", "status"}``
+        ``{"op_id", "type": "create_incident", "data": {...incident fields}}``
+
+    Returns:
+        One result per operation, in order: ``status`` is "ok" (with the
+        affected ``id``) or "error" (with ``errors``); ``replayed`` marks
+        results returned from an earlier batch that applied the same
+        ``op_id``. An ``op_id`` repeated within the batch is an error after
+        its first occurrence.
+
+    Raises:
+        ConcurrentBatch: a concurrent request stored one of the op ids first
+    """
+    results = [None] * len(operations)
+    pending = {}  # op_id -> index
+    seen = set()
+    role = getattr(user, "role", "")
+    for index, op in enumerate(operations):
+        op_id = op.get("op_id") if isinstance(op, dict) else None
+        if not isinstance(op_id, str) or not op_id or len(op_id) > 100:
+            results[index] = _error(op_id, {"op_id": "A string of at most 100 characters is required."})
+            continue
+        if op_id in seen:
+            results[index] = _error(op_id, {"op_id": "Repeated within this batch."})
+            continue
+        seen.add(op_id)
+        if op.get("type") not in OPERATION_TYPES:
+            results[index] = _error(op_id, {"type": f"Must be one of {', '.join(OPERATION_TYPES)}."})
+        elif role not in OPERATION_ROLES[op["type"]]:
+            results[index] = _error(op_id, {"type": "Your role may not perform this operation."})
+        else:
+            pending[op_id] = index
+
+    # Only successful results are stored, so only those are replayed
+    done = ProcessedOperation.objects.filter(user=user, op_id__in=list(pending)).values_list("op_id", "result")
+    for op_id, result in done:
+        results[pending.pop(op_id)] = dict(result, replayed=True)
+
+    task_ids = [
+        operations[i].get("task_id")
+        for i in pending.values()
+        if operations[i]["type"] == TASK_STATUS and isinstance(operations[i].get("task_id"), int)
+    ]
+    tasks = Task.objects.in_bulk(task_ids)
+    valid_statuses = set(Task.Status.values)
+    now = timezone.now()
+
+    to_update = {}
+    to_create = []
+    for op_id, index in pending.items():
+        op = operations[index]
+        if op["type"] == TASK_STATUS:
+            task = tasks.get(op.get("task_id"))
+            if task is None:
+                results[index] = _error(op_id, {"task_id": "Task not found."})
+            elif op.get("status") not in valid_statuses:
+                results[index] = _error(op_id, {"status": f"Must be one of {', '.join(sorted(valid_statuses))}."})
+            else:
+                # Several updates to one task in a batch: the last one wins
+                remember("task", task)
+                task.status = op["status"]
+                task.timestamp = now
+                to_update[task.pk] = task
+                results[index] = {"op_id": op_id, "status": "ok", "id": task.pk}
+        else:
+            serializer = IncidentSerializer(data=op.get("data") or {})
+            if serializer.is_valid():
+                to_create.append((index, Incident(**serializer.validated_data)))
+            else:
+                results[index] = _error(op_id, serializer.errors)
+
+    try:
+        with transaction.atomic():
+            if to_create:
+                Incident.objects.bulk_create([incident for _, incident in to_create])
+            for index, incident in to_create:
+                results[index] = {"op_id": operations[index]["op_id"], "status": "ok", "id": incident.pk}
+            if to_update:
+                # bulk_update skips auto_now, so the timestamp is set above
+                Task.objects.bulk_update(list(to_update.values()), ["status", "timestamp"])
+            ProcessedOperation.objects.bulk_create(
+                ProcessedOperation(user=user, op_id=op_id, result=results[index])
+                for op_id, index in pending.items()
+                if results[index]["status"] == "ok"
+            )
+    except IntegrityError:
+        raise ConcurrentBatch()
+    # Bulk writes send no signals
+    track("incident", [incident for _, incident in to_create], created=True)
+    cluster_records("incidents", [incident for _, incident in to_create])
+    track("task", to_update.values())
+    return results
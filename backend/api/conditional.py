@@ -0,0 +1,76 @@
+import zlib
+
+from django.db.models import Max
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from .models import Tombstone
+
+
+class ConditionalGetMixin:
+    """
+    Answer repeated GETs with ``304 Not Modified`` before any serialization.
+
+    Validators come from index-only aggregates, not from the response body:
+    the newest modification time per table (which changes on insert and
+    update) and the newest sync tombstone id (which changes on delete of any
+    incident, task or unit). The collection ETag also covers the query
+    string, so each filter or page is validated separately.
+
+    ``version_sources`` lists ``(model, modified_field)`` pairs the response
+    depends on; override ``get_version_sources`` when it depends on the request.
+    """
+
+    version_sources = ()
+
+    def get_version_sources(self):
+        return self.version_sources
+
+    def _versions(self, filters=None):
+        """Newest tombstone id, newest modification for every source, and the overall newest time."""
+        # Deletes leave a tombstone; its primary key only grows, so MAX(id) is one index lookup
+        deleted = Tombstone.objects.aggregate(last=Max("id"))["last"] or 0
+        parts, newest = [f"d{deleted}"], None
+        for model, field in self.get_version_sources():
+            qs = model.objects.all()
+            if filters and model in filters:
+                qs = qs.filter(**filters[model])
+            modified = qs.aggregate(modified=Max(field))["modified"]
+            parts.append(str(int(modified.timestamp() * 1e6)) if modified else "0")
+            if modified and (newest is None or modified > newest):
+                newest = modified
+        return parts, newest
+
+    def _conditional(self, request, etag, last_modified, respond):
+        last_modified = int(last_modified.timestamp()) if last_modified else None
+        response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = respond()
+        if response.status_code in (200, 304):
+            response["ETag"] = etag
+            if last_modified:
+                response["Last-Modified"] = http_date(last_modified)
+            # Let browsers keep the body but revalidate on every poll
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        parts, _ = self._versions()
+        query = zlib.crc32(request.get_full_path().encode())
+        etag = f'"{"-".join(parts)}-{query:x}"'
+        # No Last-Modified here: deletions do not advance it, only the ETag sees them
+        return self._conditional(request, etag, None, lambda: super(ConditionalGetMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        lookup = self.kwargs[self.lookup_url_kwarg or self.lookup_field]
+        parts, newest = self._versions(self.get_object_version_filters(lookup))
+        query = zlib.crc32(request.get_full_path().encode())
+        etag = f'"{"-".join(parts)}-{query:x}"'
+        return self._conditional(
+            request, etag, newest, lambda: super(ConditionalGetMixin, self).retrieve(request, *args, **kwargs)
+        )
+
+    def get_object_version_filters(self, lookup):
+        """Per-source filters that narrow the version to one object; defaults to the primary key."""
+        model = self.queryset.model
+        return {model: {"pk": lookup}}
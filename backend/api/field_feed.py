@@ -0,0 +1,192 @@
+"""
+Field incident simulation and the change feed behind the field SSE streams.
+
+The demo simulation advances every active major incident once per
+``FIELD_SIMULATION_INTERVAL``. It runs in exactly one process, next to the
+ingest loop in ``manage.py run_ingest`` (or in the web process with
+``POLLING_IN_PROCESS=1``), so N web workers do not write N updates per tick.
+
+Updates therefore reach the database from another process, and API writes
+from whichever worker served them. Each web process that serves field
+streams runs one ``FieldChangeFeed`` thread instead. Every
+``FIELD_STREAM_POLL_SECONDS`` it reads the active incidents through the
+field store, which revalidates each one with a single version query. For
+every incident whose state moved, it publishes the difference from the
+state it last published as an ``incident_update``. Writes served by this
+process ``poke`` the feed, so they go out without waiting for the next poll.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+
+from django.conf import settings
+from django.db import DatabaseError, close_old_connections
+
+from utils.realtime import get_realtime_service
+
+from .field_store import MAJOR_INCIDENT_FIELDS, get_field_store
+
+logger = logging.getLogger(__name__)
+
+
+def field_stream_name(incident_id):
+    """Realtime hub for one major incident's updates ("field" carries every incident)."""
+    return f"field-{incident_id}"
+
+
+def simulate_active_incidents():
+    """Persist one simulated update per active major incident; returns how many changed."""
+    store = get_field_store()
+    changed = 0
+    for incident_id in store.active_ids():
+        update = store.simulate(incident_id)
+        if update is not None and update.get("status") != "no_change":
+            changed += 1
+    return changed
+
+
+def _changed_items(old, new):
+    """``{id: changed fields}`` between two lists of dicts keyed by ``id``."""
+    if old is new:
+        return {}
+    before = {item["id"]: item for item in old}
+    changes = {}
+    for item in new:
+        previous = before.get(item["id"], {})
+        fields = {name: value for name, value in item.items() if name != "id" and previous.get(name) != value}
+        if fields:
+            changes[item["id"]] = fields
+    return changes
+
+
+def diff_states(old, new):
+    """
+    The ``incident_update`` that turns field state ``old`` into ``new``, or None if nothing changed.
+
+    Changed major incident fields sit at the top level, changed sector and
+    task group fields in ``sector_updates`` / ``task_updates`` keyed by id,
+    and events newer than ``old``'s newest in ``new_events``, oldest first.
+    """
+    update = {}
+    old_incident, new_incident = old["major_incident"], new["major_incident"]
+    if old_incident is not new_incident:
+        update.update(
+            (name, new_incident[name]) for name in MAJOR_INCIDENT_FIELDS if old_incident[name] != new_incident[name]
+        )
+    sector_updates = _changed_items(old["sectors"], new["sectors"])
+    if sector_updates:
+        update["sector_updates"] = sector_updates
+    task_updates = _changed_items(old["task_groups"], new["task_groups"])
+    if task_updates:
+        update["task_updates"] = task_updates
+    newest = max((event["id"] for event in old["events"]), default=0)
+    new_events = [event for event in new["events"] if event["id"] > newest]
+    if new_events:
+        update["new_events"] = new_events[::-1]
+    if not update:
+        return None
+    return {"major_incident_id": new_incident["id"], **update}
+
+
+class FieldChangeFeed:
+    """Publishes changes to the active field incidents, whoever wrote them."""
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._published = {}  # incident id -> state last published
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+        self.updates_published = 0
+
+    def start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def poke(self):
+        """Publish now rather than at the next poll (after a write in this process)."""
+        self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+            self._wake.clear()
+            try:
+                self.poll()
+            except DatabaseError:
+                # e.g. the database is briefly locked; try again on the next poll
+                logger.warning("Field change feed poll failed", exc_info=True)
+            finally:
+                close_old_connections()
+
+    def poll(self):
+        store = get_field_store()
+        active = store.active_ids()
+        for incident_id in active:
+            state = store.get(incident_id)
+            if state is None:
+                continue
+            previous = self._published.get(incident_id)
+            self._published[incident_id] = state
+            # A newly seen incident is what clients load as their snapshot
+            update = diff_states(previous, state) if previous is not None else None
+            if update is not None:
+                publish_field_update(update)
+                self.updates_published += 1
+        for incident_id in set(self._published) - set(active):
+            del self._published[incident_id]
+
+
+def publish_field_update(update):
+    """Push a field update to the all-incidents stream and its incident's stream."""
+    event = {"type": "incident_update", "data": update, "timestamp": datetime.now().isoformat()}
+    get_realtime_service("field").broadcast(event)
+    get_realtime_service(field_stream_name(update["major_incident_id"])).broadcast(event)
+
+
+# Global instance
+_feed = None
+_feed_lock = threading.Lock()
+
+
+def get_field_feed() -> FieldChangeFeed:
+    """This process's field change feed, started on first use (by a field stream)."""
+    global _feed
+    if _feed is None:
+        with _feed_lock:
+            if _feed is None:
+                _feed = FieldChangeFeed(settings.FIELD_STREAM_POLL_SECONDS)
+    _feed.start()
+    return _feed
+
+
+def poke_field_feed():
+    """Have the feed publish this process's write now, if this process streams field updates."""
+    if _feed is not None:
+        _feed.poke()
+
+
+_simulation_thread = None
+
+
+def start_field_simulation():
+    """Run the simulation on a thread of this process (single-process demos only)."""
+    global _simulation_thread
+    if _simulation_thread is not None and _simulation_thread.is_alive():
+        return
+
+    def loop():
+        while True:
+            time.sleep(settings.FIELD_SIMULATION_INTERVAL)
+            try:
+                simulate_active_incidents()
+            except DatabaseError:
+                logger.warning("Field simulation tick failed", exc_info=True)
+            finally:
+                close_old_connections()
+
+    _simulation_thread = threading.Thread(target=loop, daemon=True)
+    _simulation_thread.start()
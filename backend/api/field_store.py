@@ -0,0 +1,855 @@
+"""
+Persisted field-incident state behind a write-through cache.
+
+The field command endpoints read and write the ``MajorIncident``, ``Sector``,
+``TaskGroup`` and ``IncidentEvent`` tables through one store per process.
+Any number of major incidents can run at once. Each is cached separately,
+as an in-memory copy shaped like the API responses, together with
+id -> list position maps so sectors and task groups are found by primary
+key in O(1). Every write goes to the database first and then patches that
+copy.
+
+``MajorIncident.updated_at`` is the version of one incident's whole
+aggregate: each write stamps it with a compare-and-set against the version
+this process last saw. If the stamp matches, nobody else wrote in between
+and the cached copy is patched. If it does not, the copy is reloaded. Reads
+revalidate the version at most every ``FIELD_CACHE_REVALIDATE_SECONDS``, so
+other workers' writes show up within that window.
+
+Cached state is replaced, never mutated in place, so a response being
+rendered keeps a consistent copy while another thread writes.
+
+The operational timeline is the exception. Each incident keeps only its
+newest ``FIELD_TIMELINE_CACHE_SIZE`` events in memory, in a bounded deque
+(O(1) append, O(page) head reads). Older pages are keyset reads on the
+``(major_incident, created_at)`` index, and the table is capped at
+``FIELD_TIMELINE_RETENTION`` events per incident.
+
+Casualty, displaced, survivor and hazard figures are overwritten in place,
+so each change (and each incident's figures when declared) is also stored as
+a ``MetricSample`` row in the write's transaction. Reloading the cache
+records nothing. ``history`` first folds the samples stored since its last
+call, by any process, into this process's bounded ``utils.timeseries``
+rings, so every worker charts the same history and a restart reloads it.
+
+Each cached sector also carries a ``rollup`` of the task groups linked to it
+through ``TaskGroup.sectors``: their ids, count, completed and open critical
+counts, assigned units and progress weighted by subtask count. The rollups
+are built once per load and then adjusted by the difference between a task
+group's old and new values, touching only that group's sectors.
+"""
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from utils.field_incident_data import get_field_incident_service
+from utils.kpis import track, track_changes
+from utils.timeseries import get_timeseries
+
+from .models import IncidentEvent, MajorIncident, MetricSample, Sector, TaskGroup
+
+MAJOR_INCIDENT_FIELDS = (
+    "title",
+    "incident_type",
+    "description",
+    "status",
+    "location_lat",
+    "location_lng",
+    "radius_meters",
+    "estimated_casualties",
+    "confirmed_deaths",
+    "displaced_persons",
+    "command_post_lat",
+    "command_post_lng",
+)
+SECTOR_FIELDS = (
+    "name",
+    "location_lat",
+    "location_lng",
+    "hazard_level",
+    "status",
+    "hazard_description",
+    "estimated_survivors",
+    "access_status",
+    "primary_responder",
+)
+TASK_GROUP_FIELDS = (
+    "title",
+    "category",
+    "description",
+    "status",
+    "priority",
+    "progress_percent",
+    "assigned_units_count",
+    "completed_subtasks",
+    "total_subtasks",
+    "commander_name",
+    "notes",
+)
+EVENT_FIELDS = ("event_type", "severity", "title", "description", "created_by")
+
+# Metrics whose history is kept (utils.timeseries); hazard levels are charted on a 1-4 scale
+INCIDENT_METRICS = ("estimated_casualties", "confirmed_deaths", "displaced_persons")
+SECTOR_METRICS = ("estimated_survivors", "hazard_level")
+HAZARD_SCALE = {level: rank for rank, level in enumerate(Sector.HazardLevel.values, start=1)}
+
+# Fields each PATCH endpoint may change
+SECTOR_EDITABLE = ("hazard_level", "status", "estimated_survivors")
+TASK_GROUP_EDITABLE = ("progress_percent", "status", "completed_subtasks", "notes")
+CASUALTY_EDITABLE = ("estimated_casualties", "confirmed_deaths", "displaced_persons")
+
+
+def clean_changes(model, data, editable):
+    """
+    Validate the editable fields present in ``data`` against ``model``'s field definitions.
+
+    Raises:
+        ValueError: a value has the wrong type or is not one of the field's choices
+    """
+    changes = {}
+    for name in editable:
+        if name in data:
+            try:
+                changes[name] = model._meta.get_field(name).clean(data[name], None)
+            except ValidationError as exc:
+                raise ValueError(f"{name}: {' '.join(exc.messages)}")
+    return changes
+
+
+# Inserts per incident between retention passes
+PRUNE_EVERY = 100
+# Metric samples are re-read this far back, for writes that committed after a history read
+CATCH_UP_OVERLAP = timedelta(seconds=2)
+
+
+def _event_dict(row):
+    return {**row, "created_at": row["created_at"].isoformat()}
+
+
+def event_cursor(event):
+    """Opaque-enough keyset position of a timeline event: ``<ISO created_at>,<id>``."""
+    return f"{event['created_at']},{event['id']}"
+
+
+def parse_timeline_cursor(value):
+    """
+    Parse a ``before``/``after`` value: an ISO timestamp, optionally followed by ``,<event id>``.
+
+    Raises:
+        ValueError: the value is neither
+    """
+    timestamp, _, pk = value.rpartition(",") if "," in value else (value, "", "")
+    created_at = parse_datetime(timestamp)
+    if created_at is None:
+        raise ValueError("before/after must be an ISO-8601 datetime, optionally followed by ,<event id>.")
+    if timezone.is_naive(created_at):
+        created_at = timezone.make_aware(created_at)
+    return created_at, int(pk) if pk else None
+
+
+def parse_history_time(value):
+    """
+    Parse a ``start``/``end`` ISO timestamp; naive values are taken in the server time zone.
+
+    Raises:
+        ValueError: the value is not an ISO-8601 datetime
+    """
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError("start/end must be ISO-8601 datetimes.")
+    return timezone.make_aware(parsed) if timezone.is_naive(parsed) else parsed
+
+
+class UnknownIncidentType(ValueError):
+    pass
+
+
+# Per-sector sums: task groups, subtask weight, weighted progress, assigned units, open critical, completed
+_ROLLUP_ZERO = (0, 0, 0, 0, 0, 0)
+
+
+def _rollup_contribution(task_group):
+    weight = task_group["total_subtasks"] or 1
+    completed = task_group["status"] == TaskGroup.Status.COMPLETED
+    open_critical = task_group["priority"] == TaskGroup.Priority.CRITICAL and not completed
+    return (
+        1,
+        weight,
+        weight * task_group["progress_percent"],
+        task_group["assigned_units_count"],
+        int(open_critical),
+        int(completed),
+    )
+
+
+def _rollup(task_group_ids, sums):
+    count, weight, weighted_progress, units, open_critical, completed = sums
+    return {
+        "task_group_ids": task_group_ids,
+        "task_groups": count,
+        "completed": completed,
+        "open_critical": open_critical,
+        "assigned_units": units,
+        "progress_percent": round(weighted_progress / weight, 1) if weight else 0.0,
+    }
+
+
+class _CachedIncident:
+    """One major incident's response-shaped state, primary key -> list position maps and recent events."""
+
+    __slots__ = (
+        "incident_id",
+        "version",
+        "checked_at",
+        "state",
+        "sector_positions",
+        "task_group_positions",
+        "events",
+        "events_complete",
+        "inserts",
+        "task_group_sectors",
+        "rollup_sums",
+    )
+
+    def __init__(self, incident_id, version, state, events, links=()):
+        self.incident_id = incident_id
+        self.version = version
+        self.checked_at = time.monotonic()
+        self.state = state
+        self.sector_positions = {s["id"]: i for i, s in enumerate(state["sectors"])}
+        self.task_group_positions = {t["id"]: i for i, t in enumerate(state["task_groups"])}
+        # Newest first; ``events_complete`` while it still holds the incident's whole timeline
+        self.events = deque(events, maxlen=settings.FIELD_TIMELINE_CACHE_SIZE)
+        self.events_complete = len(events) < settings.FIELD_TIMELINE_CACHE_SIZE
+        self.inserts = 0
+        # ``links`` are (task group id, sector id) pairs; state is still private here
+        self.task_group_sectors = {}
+        members = {pk: [] for pk in self.sector_positions}
+        for task_group_id, sector_id in links:
+            self.task_group_sectors.setdefault(task_group_id, []).append(sector_id)
+            members[sector_id].append(task_group_id)
+        self.rollup_sums = {}
+        for sector in state["sectors"]:
+            sums = [0] * len(_ROLLUP_ZERO)
+            for task_group_id in members[sector["id"]]:
+                task_group = state["task_groups"][self.task_group_positions[task_group_id]]
+                sums = [a + b for a, b in zip(sums, _rollup_contribution(task_group))]
+            self.rollup_sums[sector["id"]] = sums
+            sector["rollup"] = _rollup(members[sector["id"]], sums)
+
+    def replace(self, key, index, changes):
+        items = list(self.state[key])
+        items[index] = {**items[index], **changes}
+        self.state = {**self.state, key: items}
+        return items[index]
+
+    def update_task_group(self, pk, changes):
+        """Apply ``changes`` to task group ``pk`` and shift its sectors' rollups by the difference."""
+        position = self.task_group_positions[pk]
+        before = _rollup_contribution(self.state["task_groups"][position])
+        updated = self.replace("task_groups", position, changes)
+        delta = [new - old for new, old in zip(_rollup_contribution(updated), before)]
+        if any(delta):
+            for sector_id in self.task_group_sectors.get(pk, ()):
+                sums = self.rollup_sums[sector_id]
+                for i, change in enumerate(delta):
+                    sums[i] += change
+                position = self.sector_positions[sector_id]
+                members = self.state["sectors"][position]["rollup"]["task_group_ids"]
+                self.replace("sectors", position, {"rollup": _rollup(members, sums)})
+        return updated
+
+    def rollups(self, task_group_ids):
+        """``{sector id: {"rollup": ...}}`` for the sectors linked to ``task_group_ids``."""
+        sectors = self.state["sectors"]
+        return {
+            sector_id: {"rollup": sectors[self.sector_positions[sector_id]]["rollup"]}
+            for pk in task_group_ids
+            for sector_id in self.task_group_sectors.get(pk, ())
+        }
+
+    def patch_incident(self, changes):
+        self.state = {**self.state, "major_incident": {**self.state["major_incident"], **changes}}
+
+    def prepend_event(self, event):
+        if len(self.events) == self.events.maxlen:
+            self.events_complete = False
+        self.events.appendleft(event)
+
+    def head(self, limit, severity=(), event_type=()):
+        """
+        Newest ``limit`` cached events matching the filters, as ``(events, has_more)``.
+
+        Returns None when the cache cannot tell: it ran out of events
+        before filling the page but older ones exist in the database.
+        """
+        matches = (
+            event
+            for event in self.events
+            if (not severity or event["severity"] in severity) and (not event_type or event["event_type"] in event_type)
+        )
+        page = list(islice(matches, limit + 1))
+        if len(page) > limit:
+            return page[:limit], True
+        if self.events_complete:
+            return page, False
+        return None
+
+
+class FieldIncidentStore:
+    """Database-backed major incidents with a per-process, revalidated read cache."""
+
+    def __init__(self):
+        # Serializes this process's writes and cache swaps
+        self.lock = threading.RLock()
+        self._entries = {}
+        self._active = None
+        self._active_checked_at = 0.0
+        self._simulator = None
+        self.hits = 0
+        self.reloads = 0
+        self._commits = 0
+        # Metric samples folded into the time series: up to when, and the ids within the overlap
+        self._metrics_lock = threading.Lock()
+        self._metrics_synced_at = None
+        self._metrics_seen = set()
+
+    # ---- reads -------------------------------------------------------------
+
+    def active_ids(self):
+        """Ids of ``ACTIVE`` major incidents, oldest first (revalidated like the cache)."""
+        with self.lock:
+            now = time.monotonic()
+            if self._active is None or now - self._active_checked_at >= settings.FIELD_CACHE_REVALIDATE_SECONDS:
+                self._active = list(
+                    MajorIncident.objects.filter(status=MajorIncident.Status.ACTIVE)
+                    .order_by("id")
+                    .values_list("id", flat=True)
+                )
+                self._active_checked_at = now
+            return self._active
+
+    def get(self, incident_id=None, create=False):
+        """
+        One major incident as ``{major_incident, sectors, task_groups, events}``.
+
+        Sectors and task groups keep their creation order and carry their
+        ``id``. ``events`` holds the newest ``FIELD_TIMELINE_CACHE_SIZE``
+        timeline entries, newest first.
+
+        Args:
+            incident_id: major incident id; None means the oldest active one
+            create: with no ``incident_id``, declare a demo incident if none is active
+
+        Returns:
+            The cached state (treat as read-only), or None when there is no such incident
+        """
+        with self.lock:
+            entry = self._entry(incident_id, create)
+            if entry is None:
+                return None
+            return {**entry.state, "events": list(islice(entry.events, settings.FIELD_TIMELINE_PAGE_SIZE))}
+
+    def timeline(self, incident_id=None, before=None, after=None, severity=(), event_type=(), limit=None):
+        """
+        One page of an incident's timeline.
+
+        Pages run newest first, continuing with ``before=next_before``. With
+        ``after`` they run oldest first from that point, continuing with
+        ``after=next_after``, so a client can poll for what is new.
+
+        Args:
+            before: ``(created_at, id or None)`` keyset position; only older events
+            after: ``(created_at, id or None)`` keyset position; only newer events
+            severity: allowed severities (empty for all)
+            event_type: allowed event types (empty for all)
+            limit: page size, defaults to ``FIELD_TIMELINE_PAGE_SIZE``
+
+        Returns:
+            ``{"events", "has_more", "next_before" | "next_after"}``, or None if there is no such incident
+        """
+        limit = limit or settings.FIELD_TIMELINE_PAGE_SIZE
+        with self.lock:
+            entry = self._entry(incident_id)
+            if entry is None:
+                return None
+            incident_id = entry.incident_id
+            page = entry.head(limit, severity, event_type) if before is None and after is None else None
+        if page is None:
+            page = self._timeline_page(incident_id, before, after, severity, event_type, limit)
+        events, has_more = page
+        key = "next_after" if after is not None and before is None else "next_before"
+        return {"events": events, "has_more": has_more, key: event_cursor(events[-1]) if events else None}
+
+    @staticmethod
+    def _timeline_page(incident_id, before, after, severity, event_type, limit):
+        qs = IncidentEvent.objects.filter(major_incident_id=incident_id)
+        if severity:
+            qs = qs.filter(severity__in=severity)
+        if event_type:
+            qs = qs.filter(event_type__in=event_type)
+        for position, op in ((before, "lt"), (after, "gt")):
+            if position is not None:
+                created_at, pk = position
+                if pk is None:
+                    qs = qs.filter(**{f"created_at__{op}": created_at})
+                else:
+                    qs = qs.filter(Q(**{f"created_at__{op}": created_at}) | Q(created_at=created_at, **{f"id__{op}": pk}))
+        ascending = after is not None and before is None
+        qs = qs.order_by(*(("created_at", "id") if ascending else ("-created_at", "-id")))
+        rows = [_event_dict(row) for row in qs.values("id", *EVENT_FIELDS, "created_at")[: limit + 1]]
+        return rows[:limit], len(rows) > limit
+
+    def history(self, incident_id, start, end, metrics=(), sector_ids=None, resolution=None):
+        """
+        Metric history of one incident and its sectors between ``start`` and ``end`` (datetimes).
+
+        Args:
+            metrics: names from ``INCIDENT_METRICS`` / ``SECTOR_METRICS`` (default all)
+            sector_ids: sectors to include (default all of the incident's)
+            resolution: bucket seconds, one of ``TIMESERIES_TIERS`` (default chosen per series)
+
+        Returns:
+            ``{"major_incident_id", "start", "end", "incident": {metric: series},
+            "sectors": {sector id: {metric: series}}}`` with each series as
+            ``{"resolution", "points"}``, or None if there is no such incident
+
+        Raises:
+            ValueError: unknown metric, sector or resolution
+        """
+        if set(metrics) - set(INCIDENT_METRICS + SECTOR_METRICS):
+            raise ValueError(f"metric must be among {', '.join(INCIDENT_METRICS + SECTOR_METRICS)}.")
+        with self.lock:
+            entry = self._entry(incident_id)
+        if entry is None:
+            return None
+        if sector_ids is None:
+            sector_ids = list(entry.sector_positions)
+        elif not set(sector_ids) <= entry.sector_positions.keys():
+            raise ValueError("sector must list sectors of this incident.")
+        series = self._sync_metrics()
+        span = (start.timestamp(), end.timestamp())
+
+        def read(scope, pk, names):
+            found = {}
+            for name in names:
+                if not metrics or name in metrics:
+                    result = series.query((scope, pk, name), *span, resolution=resolution)
+                    if result is not None:
+                        found[name] = result
+            return found
+
+        return {
+            "major_incident_id": entry.incident_id,
+            "start": start.isoformat(),
+            "end": end.isoformat(),
+            "incident": read("incident", entry.incident_id, INCIDENT_METRICS),
+            "sectors": {pk: read("sector", pk, SECTOR_METRICS) for pk in sector_ids},
+        }
+
+    def _sync_metrics(self):
+        """
+        Fold the metric samples stored since the last call into the time series, and return it.
+
+        The first call reads back as far as the coarsest tier reaches. Later
+        calls re-read ``CATCH_UP_OVERLAP`` before the previous one and skip
+        the samples already folded.
+        """
+        series = get_timeseries()
+        with self._metrics_lock:
+            started = timezone.now()
+            if self._metrics_synced_at is None:
+                since = started - timedelta(seconds=series.retention)
+            else:
+                since = self._metrics_synced_at - CATCH_UP_OVERLAP
+            horizon = started - CATCH_UP_OVERLAP
+            rows = MetricSample.objects.filter(recorded_at__gte=since).order_by("recorded_at", "id")
+            seen = set()
+            fields = ("id", "major_incident_id", "sector_id", "metric", "value", "recorded_at")
+            for pk, incident_id, sector_id, metric, value, at in rows.values_list(*fields).iterator(chunk_size=2000):
+                if at >= horizon:
+                    seen.add(pk)
+                if pk in self._metrics_seen:
+                    continue
+                key = ("incident", incident_id, metric) if sector_id is None else ("sector", sector_id, metric)
+                series.record(key, value, at.timestamp())
+            self._metrics_seen = seen
+            self._metrics_synced_at = started
+        return series
+
+    def stats(self):
+        return {"cached_incidents": len(self._entries), "hits": self.hits, "reloads": self.reloads}
+
+    def _entry(self, incident_id=None, create=False):
+        if incident_id is None:
+            active = self.active_ids()
+            if active:
+                incident_id = active[0]
+            elif create:
+                seed = int(os.getenv("DEMO_SEED", "42"))
+                incident_id = self.declare("EARTHQUAKE", seed=seed)["major_incident"]["id"]
+            else:
+                return None
+        entry = self._entries.get(incident_id)
+        now = time.monotonic()
+        if entry is not None and now - entry.checked_at < settings.FIELD_CACHE_REVALIDATE_SECONDS:
+            self.hits += 1
+            return entry
+        version = MajorIncident.objects.filter(pk=incident_id).values_list("updated_at", flat=True).first()
+        if version is None:
+            self._entries.pop(incident_id, None)
+            return None
+        if entry is None or entry.version != version:
+            return self._load(incident_id, version)
+        self.hits += 1
+        entry.checked_at = now
+        return entry
+
+    def _load(self, incident_id, version):
+        major_incident = MajorIncident.objects.filter(pk=incident_id).values("id", *MAJOR_INCIDENT_FIELDS).first()
+        if major_incident is None:
+            self._entries.pop(incident_id, None)
+            return None
+        sectors = list(Sector.objects.filter(major_incident_id=incident_id).order_by("id").values("id", *SECTOR_FIELDS))
+        task_groups = list(
+            TaskGroup.objects.filter(major_incident_id=incident_id).order_by("id").values("id", *TASK_GROUP_FIELDS)
+        )
+        sector_names = {}
+        links = (
+            TaskGroup.sectors.through.objects.filter(taskgroup__major_incident_id=incident_id)
+            .order_by("id")
+            .values_list("taskgroup_id", "sector_id", "sector__name")
+        )
+        for task_group_id, _, name in links:
+            sector_names.setdefault(task_group_id, []).append(name)
+        for task_group in task_groups:
+            task_group["sector_ids"] = sector_names.get(task_group["id"], [])
+        events = IncidentEvent.objects.filter(major_incident_id=incident_id).order_by("-created_at", "-id")
+        events = [
+            _event_dict(row)
+            for row in events.values("id", *EVENT_FIELDS, "created_at")[: settings.FIELD_TIMELINE_CACHE_SIZE]
+        ]
+
+        entry = _CachedIncident(
+            incident_id,
+            version,
+            {"major_incident": major_incident, "sectors": sectors, "task_groups": task_groups},
+            events,
+            [(task_group_id, sector_id) for task_group_id, sector_id, _ in links],
+        )
+        self._entries[incident_id] = entry
+        self.reloads += 1
+        return entry
+
+    # ---- writes ------------------------------------------------------------
+
+    def declare(self, incident_type, location_lat=32.0853, location_lng=34.7818, seed=None):
+        """
+        Persist a generated demo incident of ``incident_type`` and return its state.
+
+        Raises:
+            UnknownIncidentType: the generator has no template for ``incident_type``
+        """
+        service = get_field_incident_service(seed=seed)
+        if incident_type not in service.INCIDENT_TYPES:
+            raise UnknownIncidentType(f"incident_type must be one of {', '.join(service.INCIDENT_TYPES)}.")
+        data = service.generate_major_incident(
+            incident_type=incident_type, location_lat=location_lat, location_lng=location_lng
+        )
+        now = timezone.now()
+        with self.lock, transaction.atomic():
+            incident = MajorIncident.objects.create(declared_at=now, **data["major_incident"])
+            sectors = Sector.objects.bulk_create(
+                Sector(major_incident=incident, **sector) for sector in data["sectors"]
+            )
+            by_name = {sector.name: sector.pk for sector in sectors}
+            groups = [(group.pop("sector_ids"), group) for group in data["task_groups"]]
+            task_groups = TaskGroup.objects.bulk_create(
+                TaskGroup(major_incident=incident, **group) for _, group in groups
+            )
+            TaskGroup.sectors.through.objects.bulk_create(
+                TaskGroup.sectors.through(taskgroup_id=task_group.pk, sector_id=by_name[name])
+                for task_group, (names, _) in zip(task_groups, groups)
+                for name in names
+            )
+            for event in data["events"]:
+                created = IncidentEvent.objects.create(
+                    major_incident=incident, **{name: event[name] for name in EVENT_FIELDS}
+                )
+                # auto_now_add ignores the generated time; backdate the initial timeline
+                age = datetime.now() - event["created_at"]
+                IncidentEvent.objects.filter(pk=created.pk).update(created_at=now - age)
+            # The starting figures every chart steps from
+            _record_metrics(
+                incident.pk, now, data["major_incident"], {s.pk: fields for s, fields in zip(sectors, data["sectors"])}
+            )
+        # Bulk inserts send no signals; sectors have no KPIs
+        track("task_group", task_groups, created=True)
+        with self.lock:
+            self._active = None
+            return self._load(incident.pk, incident.updated_at).state
+
+    def _commit(self, entry, write, incident_changes=None, sector_changes=None):
+        """
+        Run ``write(now)``, stamp the incident version and store the metric samples in one transaction.
+
+        ``incident_changes`` are also written to the incident row;
+        ``sector_changes`` (``{sector id: changes}``) only provide samples.
+
+        Returns:
+            The entry to patch if no other writer got in since its cached
+            version, otherwise None (the entry has been reloaded from the database)
+        """
+        now = timezone.now()
+        incident_changes = incident_changes or {}
+        with transaction.atomic():
+            if write is not None:
+                write(now)
+            rows = MajorIncident.objects.filter(pk=entry.incident_id)
+            coherent = rows.filter(updated_at=entry.version).update(updated_at=now, **incident_changes) == 1
+            if not coherent:
+                rows.update(updated_at=now, **incident_changes)
+            _record_metrics(entry.incident_id, now, incident_changes, sector_changes)
+        self._commits += 1
+        if self._commits % PRUNE_EVERY == 0:
+            prune_metric_samples()
+        if coherent:
+            entry.version = now
+            entry.checked_at = time.monotonic()
+            return entry
+        self._load(entry.incident_id, now)
+        return None
+
+    def _count_insert(self, entry):
+        entry.inserts += 1
+        if entry.inserts % PRUNE_EVERY == 0:
+            prune_timeline(entry.incident_id)
+
+    def update_sector(self, incident_id, sector_id, changes):
+        """Apply ``changes`` to sector ``sector_id`` of the incident; None if either does not exist."""
+        with self.lock:
+            entry = self._entry(incident_id)
+            if entry is None or sector_id not in entry.sector_positions:
+                return None
+
+            def write(now):
+                Sector.objects.filter(pk=sector_id).update(updated_at=now, **changes)
+
+            if self._commit(entry, write, sector_changes={sector_id: changes}) is not None:
+                # Rollups depend only on task groups and carry over unchanged
+                return entry.replace("sectors", entry.sector_positions[sector_id], changes)
+            return self._current(entry, "sectors", "sector_positions", sector_id)
+
+    def update_task_group(self, incident_id, task_group_id, changes):
+        """
+        Apply ``changes`` to task group ``task_group_id`` of the incident.
+
+        Returns:
+            ``(task_group, sector_updates)``, the latter ``{sector id: {"rollup": ...}}``
+            for the sectors it belongs to, or None if either does not exist
+        """
+        with self.lock:
+            entry = self._entry(incident_id)
+            if entry is None or task_group_id not in entry.task_group_positions:
+                return None
+
+            def write(now):
+                TaskGroup.objects.filter(pk=task_group_id).update(updated_at=now, **changes)
+
+            if self._commit(entry, write) is not None:
+                before = entry.state["task_groups"][entry.task_group_positions[task_group_id]]
+                entry.update_task_group(task_group_id, changes)
+                _track_task_groups(entry, {task_group_id: before})
+            task_group = self._current(entry, "task_groups", "task_group_positions", task_group_id)
+            if task_group is None:
+                return None
+            return task_group, self._entries[entry.incident_id].rollups((task_group_id,))
+
+    def _current(self, entry, key, positions_attr, pk):
+        """Row ``pk`` of the incident's current entry (after a reload), or None if it is gone."""
+        entry = self._entries.get(entry.incident_id)
+        position = getattr(entry, positions_attr).get(pk) if entry is not None else None
+        return entry.state[key][position] if position is not None else None
+
+    def update_casualties(self, incident_id, changes):
+        """Apply casualty figures to the major incident; returns it, or None if it does not exist."""
+        with self.lock:
+            entry = self._entry(incident_id)
+            if entry is None:
+                return None
+            if self._commit(entry, None, incident_changes=changes) is not None:
+                entry.patch_incident(changes)
+            entry = self._entries.get(entry.incident_id)
+            return entry.state["major_incident"] if entry is not None else None
+
+    def add_event(self, incident_id, event):
+        """Append ``event`` (``EVENT_FIELDS``) to the incident's timeline; returns the stored event, or None."""
+        with self.lock:
+            entry = self._entry(incident_id)
+            if entry is None:
+                return None
+            stored = {}
+
+            def write(now):
+                created = IncidentEvent.objects.create(major_incident_id=entry.incident_id, **event)
+                stored.update(id=created.pk, **event, created_at=created.created_at.isoformat())
+                self._count_insert(entry)
+
+            if self._commit(entry, write) is not None:
+                entry.prepend_event(stored)
+            return stored
+
+    def simulate(self, incident_id=None, create=False):
+        """
+        Generate a realistic update for one incident, persist it, and return it.
+
+        Returns:
+            ``{"major_incident_id", ...}`` with ``sector_updates`` (including
+            moved rollups) and ``task_updates`` keyed by primary key and
+            ``new_event`` as stored;
+            ``{"status": "no_change"}`` when nothing changed, None if there is
+            no such incident
+        """
+        with self.lock:
+            entry = self._entry(incident_id, create)
+            if entry is None:
+                return None
+            if self._simulator is None:
+                self._simulator = get_field_incident_service()
+            # The generator addresses sectors and task groups by list position
+            update = self._simulator.simulate_update(entry.state)
+            if update.get("status") == "no_change":
+                return update
+            sectors = {entry.state["sectors"][i]["id"]: c for i, c in update.get("sector_updates", {}).items()}
+            tasks = {entry.state["task_groups"][i]["id"]: c for i, c in update.get("task_updates", {}).items()}
+            new_event = update.get("new_event")
+            stored = {}
+
+            def write(now):
+                for pk, changes in sectors.items():
+                    Sector.objects.filter(pk=pk).update(updated_at=now, **changes)
+                for pk, changes in tasks.items():
+                    TaskGroup.objects.filter(pk=pk).update(updated_at=now, **changes)
+                if new_event:
+                    fields = {name: new_event[name] for name in EVENT_FIELDS}
+                    created = IncidentEvent.objects.create(major_incident_id=entry.incident_id, **fields)
+                    stored.update(id=created.pk, **fields, created_at=created.created_at.isoformat())
+                    self._count_insert(entry)
+
+            casualties = {}
+            if "estimated_casualties" in update:
+                casualties["estimated_casualties"] = update["estimated_casualties"]
+            if self._commit(entry, write, incident_changes=casualties, sector_changes=sectors) is not None:
+                for pk, changes in sectors.items():
+                    entry.replace("sectors", entry.sector_positions[pk], changes)
+                task_groups = entry.state["task_groups"]
+                before = {pk: task_groups[entry.task_group_positions[pk]] for pk in tasks}
+                for pk, changes in tasks.items():
+                    entry.update_task_group(pk, changes)
+                _track_task_groups(entry, before)
+                if casualties:
+                    entry.patch_incident(casualties)
+                if stored:
+                    entry.prepend_event(stored)
+
+            # Task group changes move their sectors' rollups
+            entry = self._entries.get(entry.incident_id, entry)
+            sector_updates = {pk: dict(changes) for pk, changes in sectors.items()}
+            for pk, rollup in entry.rollups(tasks).items():
+                sector_updates.setdefault(pk, {}).update(rollup)
+
+            result = {"major_incident_id": entry.incident_id, **casualties}
+            if sector_updates:
+                result["sector_updates"] = sector_updates
+            if tasks:
+                result["task_updates"] = tasks
+            if stored:
+                result["new_event"] = stored
+            return result
+
+
+def _record_metrics(incident_id, at, incident_changes=None, sector_changes=None):
+    """Store the changed history metrics of an incident and its sectors (``{sector id: changes}``) at ``at``."""
+    samples = []
+    for name in INCIDENT_METRICS:
+        if (incident_changes or {}).get(name) is not None:
+            samples.append((None, name, incident_changes[name]))
+    for sector_id, changes in (sector_changes or {}).items():
+        if changes.get("estimated_survivors") is not None:
+            samples.append((sector_id, "estimated_survivors", changes["estimated_survivors"]))
+        if changes.get("hazard_level") in HAZARD_SCALE:
+            samples.append((sector_id, "hazard_level", HAZARD_SCALE[changes["hazard_level"]]))
+    if samples:
+        MetricSample.objects.bulk_create(
+            MetricSample(major_incident_id=incident_id, sector_id=sector_id, metric=name, value=value, recorded_at=at)
+            for sector_id, name, value in samples
+        )
+
+
+def prune_metric_samples():
+    """
+    Delete metric samples older than the coarsest time series tier reaches.
+
+    Returns:
+        Number of samples deleted
+    """
+    cutoff = timezone.now() - timedelta(seconds=get_timeseries().retention)
+    deleted, _ = MetricSample.objects.filter(recorded_at__lt=cutoff).delete()
+    return deleted
+
+
+def _track_task_groups(entry, before):
+    """Move the entry's task groups from ``before`` (``{pk: old task group}``) to their current state in the KPIs."""
+    task_groups = entry.state["task_groups"]
+    incident = {"major_incident_id": entry.incident_id}
+    track_changes(
+        "task_group",
+        (
+            ({**old, **incident}, {**task_groups[entry.task_group_positions[pk]], **incident})
+            for pk, old in before.items()
+        ),
+    )
+
+
+def prune_timeline(incident_id):
+    """
+    Delete the incident's events beyond the newest ``FIELD_TIMELINE_RETENTION`` (0 keeps all).
+
+    Returns:
+        Number of events deleted
+    """
+    keep = settings.FIELD_TIMELINE_RETENTION
+    if not keep:
+        return 0
+    events = IncidentEvent.objects.filter(major_incident_id=incident_id)
+    oldest_kept = events.order_by("-created_at", "-id").values_list("created_at", "id")[keep - 1 : keep].first()
+    if oldest_kept is None:
+        return 0
+    created_at, pk = oldest_kept
+    deleted, _ = events.filter(Q(created_at__lt=created_at) | Q(created_at=created_at, id__lt=pk)).delete()
+    return deleted
+
+
+# Global instance
+_field_store = None
+_field_store_lock = threading.Lock()
+
+
+def get_field_store() -> FieldIncidentStore:
+    """Get or create this process's field incident store."""
+    global _field_store
+    if _field_store is None:
+        with _field_store_lock:
+            if _field_store is None:
+                _field_store = FieldIncidentStore()
+    return _field_store
@@ -0,0 +1,58 @@
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from rest_framework.exceptions import ParseError
+
+
+def _values(params, name):
+    """Comma-separated query param as a list (empty if absent)."""
+    return [v for v in params.get(name, "").split(",") if v]
+
+
+def filter_choices(qs, params, **fields):
+    """Filter by exact values for each ``query_param=model_field`` pair, e.g. ``?status=OPEN,IN_PROGRESS``."""
+    for param, field in fields.items():
+        values = _values(params, param)
+        if values:
+            qs = qs.filter(**{f"{field}__in": values})
+    return qs
+
+
+def parse_bbox(value):
+    """Parse ``min_lat,min_lng,max_lat,max_lng`` into a tuple of floats."""
+    try:
+        min_lat, min_lng, max_lat, max_lng = (float(v) for v in value.split(","))
+    except ValueError:
+        raise ParseError("bbox must be min_lat,min_lng,max_lat,max_lng.")
+    return min_lat, min_lng, max_lat, max_lng
+
+
+def filter_bbox(qs, params, lat_field="location_lat", lng_field="location_lng"):
+    """Filter to ``?bbox=min_lat,min_lng,max_lat,max_lng``."""
+    bbox = params.get("bbox")
+    if not bbox:
+        return qs
+    min_lat, min_lng, max_lat, max_lng = parse_bbox(bbox)
+    return qs.filter(**{
+        f"{lat_field}__gte": min_lat,
+        f"{lat_field}__lte": max_lat,
+        f"{lng_field}__gte": min_lng,
+        f"{lng_field}__lte": max_lng,
+    })
+
+
+def parse_since(value):
+    """Parse an ISO-8601 timestamp; naive values are taken in the server time zone."""
+    since = parse_datetime(value)
+    if since is None:
+        raise ParseError("updated_since must be an ISO-8601 datetime.")
+    if timezone.is_naive(since):
+        since = timezone.make_aware(since)
+    return since
+
+
+def filter_updated_since(qs, params, field="updated_at"):
+    """Filter to rows changed at or after ``?updated_since=<ISO datetime>``."""
+    value = params.get("updated_since")
+    if not value:
+        return qs
+    return qs.filter(**{f"{field}__gte": parse_since(value)})
@@ -0,0 +1,66 @@
+"""
+Benchmark the map cluster index: build, moves and viewport queries.
+
+Scatters N points (100k by default) over a metro-sized area, then times
+viewport queries from region to street level. Query time and result size
+should follow the viewport, staying flat as ``--points`` grows.
+
+    python manage.py bench_clusters --points 100000
+"""
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.clusters import ClusterIndex
+
+
+def _median_ms(fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = "Time map cluster index builds, point moves and viewport queries"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--points", type=int, default=100_000, help="Points to index")
+        parser.add_argument("--moves", type=int, default=20_000, help="Location updates to apply")
+
+    def handle(self, *args, **options):
+        total, moves = options["points"], options["moves"]
+        rng = random.Random(1)
+        points = [
+            (n, 31.9 + rng.random() * 0.4, 34.7 + rng.random() * 0.4, (rng.choice(("LOW", "MED", "HIGH")), "OPEN"))
+            for n in range(total)
+        ]
+        index = ClusterIndex({"severity": "severity", "status": "status"}, "title")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("build"))
+        started = time.perf_counter()
+        for pk, lat, lng, values in points:
+            index.upsert(pk, lat, lng, values)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"  {total} points in {elapsed:.2f}s, {elapsed / total * 1e6:.1f}us each")
+
+        started = time.perf_counter()
+        for pk, lat, lng, values in rng.sample(points, min(moves, total)):
+            index.upsert(pk, lat + rng.uniform(-0.0005, 0.0005), lng + rng.uniform(-0.0005, 0.0005), values)
+        elapsed = time.perf_counter() - started
+        self.stdout.write(f"  {min(moves, total)} moves of up to ~50m, {elapsed / max(min(moves, total), 1) * 1e6:.1f}us each")
+
+        self.stdout.write(self.style.MIGRATE_HEADING("query (1280x800 px viewport)"))
+        for zoom in (9, 11, 13, 15, 17):
+            # Degrees covered by 1280 x 800 px at this zoom, near the centre of the data
+            width = 1280 / 256 * 360 / 2 ** zoom
+            height = width * 800 / 1280 * 0.85
+            bbox = (32.1 - height / 2, 34.9 - width / 2, 32.1 + height / 2, 34.9 + width / 2)
+            result = index.query(bbox, zoom)
+            ms = _median_ms(lambda: index.query(bbox, zoom))
+            points_in = sum(item["count"] for item in result)
+            self.stdout.write(f"  zoom {zoom:>2}: {len(result):>6} items for {points_in:>7} points {ms:8.2f}ms")
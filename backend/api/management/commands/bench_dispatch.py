@@ -0,0 +1,55 @@
+"""
+Benchmark for the batch dispatch recommender.
+
+Generates synthetic incidents and available units across the service area
+and times a full recommendation (cost matrix + assignment).
+
+    python manage.py bench_dispatch --units 2000 --incidents 300
+"""
+import random
+
+from django.core.management.base import BaseCommand
+
+from utils.dispatch import SEVERITY_SLOTS, UNIT_TYPE_FACTOR, recommend_dispatch
+
+LAT_RANGE = (29.5, 33.3)
+LNG_RANGE = (34.2, 35.9)
+
+
+class Command(BaseCommand):
+    help = "Time a dispatch recommendation for N units x M incidents"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--units", type=int, default=2000)
+        parser.add_argument("--incidents", type=int, default=300)
+        parser.add_argument("--runs", type=int, default=3)
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        incidents = [
+            {
+                "id": i,
+                "location_lat": rng.uniform(*LAT_RANGE),
+                "location_lng": rng.uniform(*LNG_RANGE),
+                "severity": rng.choice(list(SEVERITY_SLOTS)),
+            }
+            for i in range(1, options["incidents"] + 1)
+        ]
+        units = [
+            {
+                "id": i,
+                "location_lat": rng.uniform(*LAT_RANGE),
+                "location_lng": rng.uniform(*LNG_RANGE),
+                "type": rng.choice(list(UNIT_TYPE_FACTOR)),
+            }
+            for i in range(1, options["units"] + 1)
+        ]
+        slots = sum(SEVERITY_SLOTS[i["severity"]] for i in incidents)
+        self.stdout.write(f"{len(units)} units x {len(incidents)} incidents ({slots} requested slots)")
+        for run in range(options["runs"]):
+            result = recommend_dispatch(incidents, units)
+            self.stdout.write(
+                f"run {run + 1}: {result['elapsed_ms']}ms, {len(result['plan'])} assignments, "
+                f"{sum(result['unfilled'].values())} unfilled, total cost {result['total_cost']}"
+            )
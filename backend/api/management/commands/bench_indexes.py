@@ -0,0 +1,229 @@
+"""
+Benchmark the hot read paths with and without the composite indexes.
+
+Seeds tasks and timeline events (1M each by default) plus their incidents,
+major incidents and task groups, then runs each hot query after dropping the
+models' ``Meta.indexes`` and again after rebuilding them, printing the query
+plan and median latency for both. The connection is reopened between phases
+so no statement prepared under the other schema is reused. Benchmark rows
+are deleted at the end unless ``--keep`` is given.
+
+Dropping the indexes affects every user of the database, and an interrupted
+run leaves it without them, so the command refuses to run unless
+``--drop-indexes`` confirms the database is a disposable copy.
+
+    python manage.py bench_indexes --rows 1000000 --drop-indexes
+"""
+import random
+import statistics
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from api.models import Incident, IncidentEvent, MajorIncident, Task, TaskGroup
+
+BENCH_PREFIX = "bench-"
+INDEXED_MODELS = (Incident, Task, IncidentEvent, TaskGroup)
+
+
+def _queries(incident_id, major_incident_id, since):
+    return [
+        ("tasks of incident", Task.objects.filter(incident_id=incident_id).order_by("-timestamp")[:50]),
+        ("major incident timeline", IncidentEvent.objects.filter(major_incident_id=major_incident_id)[:50]),
+        ("incident timeline", IncidentEvent.objects.filter(incident_id=incident_id)[:50]),
+        ("task groups of major incident", TaskGroup.objects.filter(major_incident_id=major_incident_id)[:50]),
+        (
+            "open HIGH incidents",
+            Incident.objects.filter(status="OPEN", severity="HIGH").order_by("-created_at")[:100],
+        ),
+        ("incidents updated since", Incident.objects.filter(updated_at__gte=since)[:100]),
+    ]
+
+
+def _insert_rows(model, fields, rows, batch_size):
+    """Plain multi-row INSERT, bypassing model instantiation for large seeds."""
+    columns = [model._meta.get_field(name).column for name in fields]
+    sql = "INSERT INTO {} ({}) VALUES ({})".format(
+        connection.ops.quote_name(model._meta.db_table),
+        ", ".join(connection.ops.quote_name(c) for c in columns),
+        ", ".join(["%s"] * len(columns)),
+    )
+    with connection.cursor() as cursor:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= batch_size:
+                cursor.executemany(sql, batch)
+                batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+
+
+class Command(BaseCommand):
+    help = "Seed N rows and compare query plans and latency with and without indexes"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1_000_000, help="Tasks and timeline events to seed (each)")
+        parser.add_argument("--repeat", type=int, default=20, help="Runs per query for the median")
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument("--keep", action="store_true", help="Keep benchmark rows after the run")
+        parser.add_argument(
+            "--drop-indexes",
+            action="store_true",
+            help="Confirm that the database is a disposable copy whose indexes may be dropped",
+        )
+
+    def handle(self, *args, **options):
+        if not options["drop_indexes"]:
+            raise CommandError(
+                f"bench_indexes drops the indexes of {connection.settings_dict['NAME']} while it runs. "
+                "Run it on a copy of the database and pass --drop-indexes to confirm."
+            )
+        started = time.perf_counter()
+        incident_id, major_incident_id, since = self._seed(options["rows"], options["batch_size"])
+        self.stdout.write(
+            f"seeded {options['rows']} tasks + {options['rows']} events in {time.perf_counter() - started:.1f}s"
+        )
+        queries = _queries(incident_id, major_incident_id, since)
+        try:
+            self._set_indexes(present=False)
+            before = self._measure(queries, options["repeat"])
+            started = time.perf_counter()
+            self._set_indexes(present=True)
+            self.stdout.write(f"rebuilt indexes in {time.perf_counter() - started:.1f}s\n")
+            after = self._measure(queries, options["repeat"])
+        finally:
+            self._set_indexes(present=True)
+            if not options["keep"]:
+                self._cleanup()
+
+        for label, _ in queries:
+            (plan_before, ms_before), (plan_after, ms_after) = before[label], after[label]
+            self.stdout.write(self.style.MIGRATE_HEADING(label))
+            self.stdout.write(f"  before: {ms_before:8.3f}ms  {plan_before}")
+            self.stdout.write(f"  after:  {ms_after:8.3f}ms  {plan_after}")
+
+    def _seed(self, rows, batch_size):
+        rng = random.Random(1)
+        now = timezone.now()
+        stamp = connection.ops.adapt_datetimefield_value
+        with transaction.atomic():
+            majors = MajorIncident.objects.bulk_create(
+                MajorIncident(
+                    title=f"{BENCH_PREFIX}major-{i}",
+                    incident_type=MajorIncident.IncidentType.EARTHQUAKE,
+                    description="",
+                    location_lat=32.0,
+                    location_lng=34.8,
+                )
+                for i in range(20)
+            )
+            incidents = Incident.objects.bulk_create(
+                (
+                    Incident(
+                        title=f"{BENCH_PREFIX}incident-{i}",
+                        location_lat=32.0,
+                        location_lng=34.8,
+                        severity=rng.choice(["LOW", "MED", "HIGH"]),
+                        status=rng.choice(["OPEN", "IN_PROGRESS", "CLOSED", "CLOSED"]),
+                    )
+                    for i in range(max(rows // 100, 1))
+                ),
+                batch_size=batch_size,
+            )
+            TaskGroup.objects.bulk_create(
+                (
+                    TaskGroup(
+                        major_incident=rng.choice(majors),
+                        title=f"{BENCH_PREFIX}group-{i}",
+                        category=TaskGroup.Category.MEDICAL,
+                    )
+                    for i in range(max(rows // 100, 1))
+                ),
+                batch_size=batch_size,
+            )
+            incident_ids = [i.pk for i in incidents]
+            major_ids = [m.pk for m in majors]
+            # Spread timestamps over a day so ordering by time is meaningful
+            _insert_rows(
+                Task,
+                ("incident", "title", "status", "timestamp"),
+                (
+                    (rng.choice(incident_ids), f"{BENCH_PREFIX}task", "PENDING", stamp(now - timedelta(seconds=rng.randrange(86400))))
+                    for _ in range(rows)
+                ),
+                batch_size,
+            )
+            _insert_rows(
+                IncidentEvent,
+                ("incident", "major_incident", "event_type", "severity", "title", "description", "created_by", "created_at"),
+                (
+                    (
+                        None if n % 2 else rng.choice(incident_ids),
+                        rng.choice(major_ids) if n % 2 else None,
+                        "UPDATE",
+                        "INFO",
+                        f"{BENCH_PREFIX}event",
+                        "",
+                        "",
+                        stamp(now - timedelta(seconds=rng.randrange(86400))),
+                    )
+                    for n in range(rows)
+                ),
+                batch_size,
+            )
+        return incident_ids[len(incident_ids) // 2], major_ids[0], now - timedelta(minutes=5)
+
+    def _set_indexes(self, present):
+        """Drop or (re)create every ``Meta.indexes`` entry of the benchmarked models."""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT 1")
+            existing = {
+                name
+                for model in INDEXED_MODELS
+                for name, info in connection.introspection.get_constraints(cursor, model._meta.db_table).items()
+                if info["index"]
+            }
+        with connection.schema_editor() as editor:
+            for model in INDEXED_MODELS:
+                for index in model._meta.indexes:
+                    if present and index.name not in existing:
+                        editor.add_index(model, index)
+                    elif not present and index.name in existing:
+                        editor.remove_index(model, index)
+        connection.close()
+
+    def _measure(self, queries, repeat):
+        results = {}
+        for label, qs in queries:
+            plan = " | ".join(line.strip() for line in qs.explain().splitlines())
+            # Time the SQL itself; model instantiation would dominate small result sets
+            sql, params = qs.query.get_compiler(connection=connection).as_sql()
+            timings = []
+            with connection.cursor() as cursor:
+                for _ in range(repeat):
+                    started = time.perf_counter()
+                    cursor.execute(sql, params)
+                    cursor.fetchall()
+                    timings.append(time.perf_counter() - started)
+            results[label] = (plan, statistics.median(timings) * 1000)
+        return results
+
+    def _cleanup(self):
+        started = time.perf_counter()
+        with transaction.atomic(), connection.cursor() as cursor:
+            # Plain DELETEs: going through the ORM would load every row and
+            # leave sync tombstones for rows no client has ever seen
+            for model, title_field in ((Task, "title"), (IncidentEvent, "title"), (Incident, "title")):
+                cursor.execute(
+                    "DELETE FROM {} WHERE {} LIKE %s".format(
+                        connection.ops.quote_name(model._meta.db_table), connection.ops.quote_name(title_field)
+                    ),
+                    [f"{BENCH_PREFIX}%"],
+                )
+            TaskGroup.objects.filter(title__startswith=BENCH_PREFIX).delete()
+            MajorIncident.objects.filter(title__startswith=BENCH_PREFIX).delete()
+        self.stdout.write(f"removed benchmark rows in {time.perf_counter() - started:.1f}s")
@@ -0,0 +1,79 @@
+"""
+Benchmark for the unit spatial index.
+
+Builds the index over N synthetic units spread across the service area, then
+times k-nearest queries (filtered by availability and optionally by type) and
+checks a sample of them against a brute-force scan.
+
+    python manage.py bench_spatial --units 50000 --queries 2000 --k 5
+"""
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.spatial import UnitSpatialIndex, haversine_km
+
+# Roughly the bounding box of the mock feed's service area
+LAT_RANGE = (29.5, 33.3)
+LNG_RANGE = (34.2, 35.9)
+UNIT_TYPES = ("Police", "Fire", "EMS", "HomeFront")
+STATUSES = ("AVAILABLE", "BUSY", "OFFLINE")
+
+
+class Command(BaseCommand):
+    help = "Time k-nearest-unit queries on the in-memory spatial index"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--units", type=int, default=50000)
+        parser.add_argument("--queries", type=int, default=2000)
+        parser.add_argument("--k", type=int, default=5)
+        parser.add_argument("--cell", type=float, default=0.05, help="Grid cell size in degrees")
+        parser.add_argument("--verify", type=int, default=50, help="Queries checked against brute force")
+        parser.add_argument("--seed", type=int, default=1)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        rows = [
+            (
+                unit_id,
+                rng.uniform(*LAT_RANGE),
+                rng.uniform(*LNG_RANGE),
+                rng.choice(UNIT_TYPES),
+                rng.choices(STATUSES, weights=(6, 3, 1))[0],
+            )
+            for unit_id in range(1, options["units"] + 1)
+        ]
+        index = UnitSpatialIndex(cell_deg=options["cell"])
+        started = time.perf_counter()
+        index.load(rows)
+        self.stdout.write(f"indexed {len(index)} units in {(time.perf_counter() - started) * 1000:.1f}ms")
+
+        k = options["k"]
+        points = [(rng.uniform(*LAT_RANGE), rng.uniform(*LNG_RANGE)) for _ in range(options["queries"])]
+        for label, unit_type in (("available, any type", None), ("available EMS", "EMS")):
+            timings = []
+            for lat, lng in points:
+                started = time.perf_counter()
+                index.nearest(lat, lng, k=k, unit_type=unit_type)
+                timings.append(time.perf_counter() - started)
+            timings.sort()
+            self.stdout.write(
+                f"k={k} {label}: "
+                f"p50={statistics.median(timings) * 1000:.3f}ms "
+                f"p95={timings[int(len(timings) * 0.95) - 1] * 1000:.3f}ms "
+                f"max={timings[-1] * 1000:.3f}ms"
+            )
+
+        mismatches = 0
+        for lat, lng in points[: options["verify"]]:
+            expected = sorted(
+                (haversine_km(lat, lng, ulat, ulng), unit_id)
+                for unit_id, ulat, ulng, unit_type, status in rows
+                if unit_type == "EMS" and status == "AVAILABLE"
+            )[:k]
+            got = index.nearest(lat, lng, k=k, unit_type="EMS")
+            if [unit_id for _, unit_id in got] != [unit_id for _, unit_id in expected]:
+                mismatches += 1
+        self.stdout.write(f"brute-force check: {mismatches} mismatches in {options['verify']} queries")
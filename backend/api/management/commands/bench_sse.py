@@ -0,0 +1,90 @@
+"""
+Load harness for the async SSE streams.
+
+Opens N in-process SSE clients on the async stream generator, reports the
+memory each connection holds, then broadcasts events from a publisher thread
+and reports delivery latency across all clients.
+
+    python manage.py bench_sse --clients 2000 --events 50
+"""
+import asyncio
+import json
+import statistics
+import threading
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+
+from api.views import _sse_events_async
+from utils.realtime import get_realtime_service
+
+BENCH_STREAM = "bench"
+
+
+class Command(BaseCommand):
+    help = "Open N local SSE clients and report memory per connection and delivery latency"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=1000)
+        parser.add_argument("--events", type=int, default=20)
+        parser.add_argument("--rate", type=float, default=20.0, help="Events per second published")
+
+    def handle(self, *args, **options):
+        asyncio.run(self._run(options["clients"], options["events"], options["rate"]))
+
+    async def _run(self, clients, events, rate):
+        service = get_realtime_service(BENCH_STREAM)
+        latencies = []
+        received = [0]
+
+        async def client(connected):
+            stream = _sse_events_async(service)
+            await stream.__anext__()  # "connected" frame; subscription follows on next await
+            connected.release()
+            async for chunk in stream:
+                event = json.loads(chunk.split("data: ", 1)[1])
+                if event.get("type") == "bench":
+                    latencies.append(time.perf_counter() - event["sent"])
+                    received[0] += 1
+
+        tracemalloc.start()
+        baseline = tracemalloc.get_traced_memory()[0]
+        connected = asyncio.Semaphore(0)
+        tasks = [asyncio.create_task(client(connected)) for _ in range(clients)]
+        for _ in range(clients):
+            await connected.acquire()
+        while service.stats()["subscribers"] < clients:
+            await asyncio.sleep(0.01)
+        per_connection = (tracemalloc.get_traced_memory()[0] - baseline) / clients
+        tracemalloc.stop()
+        self.stdout.write(f"clients connected: {clients}")
+        self.stdout.write(f"memory per connection: {per_connection / 1024:.2f} KiB")
+
+        def publish():
+            for seq in range(events):
+                service.broadcast({"type": "bench", "seq": seq, "sent": time.perf_counter()})
+                time.sleep(1 / rate)
+
+        publisher = threading.Thread(target=publish)
+        publisher.start()
+        expected = clients * events
+        deadline = time.perf_counter() + events / rate + 10
+        while received[0] < expected and time.perf_counter() < deadline:
+            await asyncio.sleep(0.05)
+        publisher.join()
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+        self.stdout.write(f"events delivered: {received[0]}/{expected}")
+        if latencies:
+            latencies.sort()
+            self.stdout.write(
+                "delivery latency ms: "
+                f"p50={statistics.median(latencies) * 1000:.2f} "
+                f"p95={latencies[int(len(latencies) * 0.95) - 1] * 1000:.2f} "
+                f"max={latencies[-1] * 1000:.2f}"
+            )
+        self.stdout.write(f"hub stats: {service.stats()}")
@@ -0,0 +1,156 @@
+"""
+Benchmark the field timeline: append cost and page reads at 1M events.
+
+Seeds one major incident with N timeline events (1M by default), then times:
+
+* appends through the store (database insert + deque append) on that incident
+  and on an empty one, plus the in-memory append alone (deque vs list.insert)
+* page reads: the head page served from memory, and keyset pages from the
+  database at increasing depth, with and without filters
+
+Append latency should not depend on timeline length, and page latency should
+depend on the page size, not on depth or N. Benchmark rows are deleted at the
+end unless ``--keep`` is given.
+
+    python manage.py bench_timeline --events 1000000
+"""
+import random
+import statistics
+import time
+from collections import deque
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from api.field_store import FieldIncidentStore
+from api.models import IncidentEvent, MajorIncident
+
+from .bench_indexes import BENCH_PREFIX, _insert_rows
+
+SEVERITIES = [choice for choice, _ in IncidentEvent.Severity.choices]
+EVENT_TYPES = [choice for choice, _ in IncidentEvent.EventType.choices]
+
+
+def _median_ms(fn, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = "Seed N timeline events and time appends and paginated reads"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--events", type=int, default=1_000_000, help="Timeline events to seed")
+        parser.add_argument("--page", type=int, default=50, help="Page size")
+        parser.add_argument("--repeat", type=int, default=50, help="Runs per measurement for the median")
+        parser.add_argument("--batch-size", type=int, default=10000)
+        parser.add_argument("--keep", action="store_true", help="Keep benchmark rows after the run")
+
+    def handle(self, *args, **options):
+        total, page, repeat = options["events"], options["page"], options["repeat"]
+        started = time.perf_counter()
+        big, small, base = self._seed(total, options["batch_size"])
+        self.stdout.write(f"seeded {total} events in {time.perf_counter() - started:.1f}s\n")
+
+        # No pruning during the run, and no revalidation queries inside the timings
+        with override_settings(FIELD_TIMELINE_RETENTION=0, FIELD_CACHE_REVALIDATE_SECONDS=3600):
+            try:
+                self._bench_appends(big, small, total, repeat)
+                self._bench_reads(big, base, total, page, repeat)
+            finally:
+                if not options["keep"]:
+                    self._cleanup()
+
+    def _seed(self, total, batch_size):
+        rng = random.Random(1)
+        stamp = connection.ops.adapt_datetimefield_value
+        base = timezone.now() - timedelta(seconds=total + 60)
+        with transaction.atomic():
+            big, small = (
+                MajorIncident.objects.create(
+                    title=f"{BENCH_PREFIX}{name}",
+                    incident_type=MajorIncident.IncidentType.EARTHQUAKE,
+                    description="",
+                    location_lat=32.0,
+                    location_lng=34.8,
+                )
+                for name in ("timeline", "timeline-empty")
+            )
+            # One event per second, oldest first
+            _insert_rows(
+                IncidentEvent,
+                ("major_incident", "event_type", "severity", "title", "description", "created_by", "created_at"),
+                (
+                    (
+                        big.pk,
+                        rng.choice(EVENT_TYPES),
+                        rng.choice(SEVERITIES),
+                        f"{BENCH_PREFIX}event",
+                        "",
+                        "",
+                        stamp(base + timedelta(seconds=n)),
+                    )
+                    for n in range(total)
+                ),
+                batch_size,
+            )
+        return big.pk, small.pk, base
+
+    def _bench_appends(self, big, small, total, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING("append"))
+        store = FieldIncidentStore()
+        event = {"event_type": "UPDATE", "severity": "INFO", "title": f"{BENCH_PREFIX}append", "description": "", "created_by": ""}
+        for label, incident_id in ((f"{total} events", big), ("empty timeline", small)):
+            store.get(incident_id)
+            ms = _median_ms(lambda: store.add_event(incident_id, event), repeat)
+            self.stdout.write(f"  store.add_event, {label:>16}: {ms:8.3f}ms")
+
+        # The in-memory part alone, at the full timeline length
+        items = list(range(total))
+        ring = deque(items, maxlen=total)
+        ms = _median_ms(lambda: ring.appendleft(0), repeat)
+        self.stdout.write(f"  deque.appendleft, {total} items: {ms * 1000:8.2f}us")
+        ms = _median_ms(lambda: items.insert(0, 0), repeat)
+        self.stdout.write(f"  list.insert(0), {total} items:   {ms * 1000:8.2f}us")
+
+    def _bench_reads(self, big, base, total, page, repeat):
+        self.stdout.write(self.style.MIGRATE_HEADING(f"read one page of {page}"))
+        store = FieldIncidentStore()
+        store.get(big)
+
+        def at_depth(fraction):
+            # Position of the event ``fraction`` of the way back from the newest
+            return base + timedelta(seconds=int(total * (1 - fraction))), None
+
+        cases = [
+            ("head (memory)", {}),
+            ("head, severity=CRITICAL", {"severity": ["CRITICAL"]}),
+            ("before, 10% deep", {"before": at_depth(0.10)}),
+            ("before, 50% deep", {"before": at_depth(0.50)}),
+            ("before, 99% deep", {"before": at_depth(0.99)}),
+            ("after, 50% deep", {"after": at_depth(0.50)}),
+            ("before 50%, severity=CRITICAL", {"before": at_depth(0.50), "severity": ["CRITICAL"]}),
+            ("before 50%, type=EVACUATION", {"before": at_depth(0.50), "event_type": ["EVACUATION"]}),
+        ]
+        for label, kwargs in cases:
+            result = store.timeline(big, limit=page, **kwargs)
+            assert len(result["events"]) == page, label
+            ms = _median_ms(lambda: store.timeline(big, limit=page, **kwargs), repeat)
+            self.stdout.write(f"  {label:<36} {ms:8.3f}ms")
+
+    def _cleanup(self):
+        started = time.perf_counter()
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM {} WHERE title LIKE %s".format(connection.ops.quote_name(IncidentEvent._meta.db_table)),
+                [f"{BENCH_PREFIX}%"],
+            )
+            MajorIncident.objects.filter(title__startswith=BENCH_PREFIX).delete()
+        self.stdout.write(f"removed benchmark rows in {time.perf_counter() - started:.1f}s")
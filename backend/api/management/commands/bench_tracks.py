@@ -0,0 +1,74 @@
+"""
+Benchmark the unit track store: append throughput, encoded size and reads.
+
+Feeds N random-walk fixes (1M by default) round-robin across U units into a
+fresh ``TrackStore`` on one thread, then times a one-unit range read with and
+without Douglas-Peucker simplification and a playback of every unit.
+Appends should sustain well over 10k fixes per second.
+
+    python manage.py bench_tracks --fixes 1000000 --units 200
+"""
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+
+from utils.tracks import TrackStore
+
+
+def _median_ms(fn, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+class Command(BaseCommand):
+    help = "Time unit track appends, encoded size, range reads and playback"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--fixes", type=int, default=1_000_000, help="Position fixes to append")
+        parser.add_argument("--units", type=int, default=200, help="Units the fixes are spread over")
+        parser.add_argument("--interval", type=float, default=1.0, help="Seconds between one unit's fixes")
+        parser.add_argument("--tolerance", type=float, default=25.0, help="Simplification tolerance (m)")
+
+    def handle(self, *args, **options):
+        total, units, interval = options["fixes"], options["units"], options["interval"]
+        rng = random.Random(1)
+        positions = [[32.0 + rng.random() * 0.3, 34.7 + rng.random() * 0.3] for _ in range(units)]
+        base = time.time() - total // units * interval
+
+        # Generate first so only the store is timed
+        fixes = []
+        for n in range(total):
+            unit = n % units
+            position = positions[unit]
+            position[0] += rng.uniform(-0.0002, 0.0002)
+            position[1] += rng.uniform(-0.0002, 0.0002)
+            fixes.append((unit, position[0], position[1], base + n // units * interval))
+
+        store = TrackStore()
+        started = time.perf_counter()
+        for unit, lat, lng, at in fixes:
+            store.append(unit, lat, lng, at)
+        elapsed = time.perf_counter() - started
+        del fixes
+        stats = store.stats()
+        sealed = stats["fixes"] - stats["buffered_fixes"]
+        self.stdout.write(self.style.MIGRATE_HEADING("append"))
+        self.stdout.write(f"  {total} fixes in {elapsed:.2f}s: {total / elapsed:,.0f} fixes/s, {elapsed / total * 1e6:.2f}us each")
+        if sealed:
+            self.stdout.write(f"  {stats['sealed_bytes'] / sealed:.1f} bytes per sealed fix (24 unencoded)")
+
+        end = base + total // units * interval
+        self.stdout.write(self.style.MIGRATE_HEADING("read"))
+        for label, kwargs in (("whole track", {}), (f"simplified, {options['tolerance']:g}m", {"tolerance_m": options["tolerance"]})):
+            track = store.track(0, base, end, **kwargs)
+            ms = _median_ms(lambda: store.track(0, base, end, **kwargs))
+            self.stdout.write(f"  unit 0, {label:<20} {track['fixes']:>8} -> {len(track['points']):>8} points {ms:8.2f}ms")
+        frames = store.playback(base, end, (end - base) / 300)
+        ms = _median_ms(lambda: store.playback(base, end, (end - base) / 300))
+        self.stdout.write(f"  playback, {len(frames['times'])} frames x {len(frames['units'])} units {ms:8.2f}ms")
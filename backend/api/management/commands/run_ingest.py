@@ -0,0 +1,93 @@
+"""
+Dedicated external feed ingest runner.
+
+Replaces the per-process polling thread: start exactly one of these next to
+the web workers. A second instance exits immediately while the leader lock
+is held.
+
+The leader also advances the field incident simulation every
+``FIELD_SIMULATION_INTERVAL`` (unless ``--no-field-simulation``), so the demo
+writes one update per tick however many web workers stream it.
+
+    python manage.py run_ingest --interval 5
+"""
+import asyncio
+import signal
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, close_old_connections
+
+from api.field_feed import simulate_active_incidents
+from utils.ingest import IngestScheduler, LeaderLock
+from utils.polling_service import sync_with_external
+
+
+class Command(BaseCommand):
+    help = "Run the external feed ingest loop (single leader, adaptive interval)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--interval", type=float, default=settings.POLLING_INTERVAL)
+        parser.add_argument("--max-interval", type=float, default=settings.INGEST_MAX_INTERVAL)
+        parser.add_argument("--jitter", type=float, default=0.1, help="Relative jitter applied to each delay")
+        parser.add_argument("--lock-file", default=str(settings.INGEST_LOCK_FILE))
+        parser.add_argument("--metrics-file", default=str(settings.INGEST_METRICS_FILE))
+        parser.add_argument("--once", action="store_true", help="Run a single sync and exit")
+        parser.add_argument(
+            "--no-field-simulation", action="store_true", help="Do not advance the field incident simulation"
+        )
+
+    def handle(self, *args, **options):
+        lock = LeaderLock(options["lock_file"])
+        if not lock.acquire():
+            raise CommandError(f"Another ingest runner holds {options['lock_file']}")
+
+        scheduler = IngestScheduler(
+            sync_with_external,
+            interval=options["interval"],
+            max_interval=options["max_interval"],
+            jitter=options["jitter"],
+            metrics_path=options["metrics_file"],
+        )
+        self.stdout.write(f"Ingest runner started (interval {options['interval']}s)")
+        try:
+            simulate = not (options["once"] or options["no_field_simulation"])
+            asyncio.run(self._run(scheduler, options["once"], simulate))
+        finally:
+            lock.release()
+        self.stdout.write(
+            f"Ingest runner stopped after {scheduler.metrics.syncs_total} syncs "
+            f"({scheduler.metrics.errors_total} errors)"
+        )
+
+    async def _run(self, scheduler, once, simulate):
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, scheduler.stop)
+            except (NotImplementedError, RuntimeError):
+                # Windows event loops do not support signal handlers
+                pass
+        simulation = asyncio.create_task(self._simulate_fields()) if simulate else None
+        try:
+            await scheduler.run(once=once)
+        finally:
+            if simulation is not None:
+                simulation.cancel()
+                await asyncio.gather(simulation, return_exceptions=True)
+
+    async def _simulate_fields(self):
+        while True:
+            await asyncio.sleep(settings.FIELD_SIMULATION_INTERVAL)
+            try:
+                await asyncio.to_thread(self._simulate_tick)
+            except DatabaseError as exc:
+                self.stderr.write(f"Field simulation tick failed: {exc}")
+
+    @staticmethod
+    def _simulate_tick():
+        close_old_connections()
+        try:
+            simulate_active_incidents()
+        finally:
+            close_old_connections()
@@ -0,0 +1,59 @@
+# Generated by Django 5.0.2 on 2026-10-17 10:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0003_external_fingerprint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="incident",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="unit",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddIndex(
+            model_name="incident",
+            index=models.Index(fields=["status", "-created_at"], name="incident_status_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="incident",
+            index=models.Index(fields=["severity", "-created_at"], name="incident_sev_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="incident",
+            index=models.Index(fields=["updated_at"], name="incident_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="incident",
+            index=models.Index(fields=["location_lat", "location_lng"], name="incident_lat_lng_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["-timestamp"], name="task_timestamp_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="unit",
+            index=models.Index(fields=["type", "availability_status"], name="unit_type_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="unit",
+            index=models.Index(fields=["availability_status"], name="unit_status_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="unit",
+            index=models.Index(fields=["updated_at"], name="unit_updated_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="unit",
+            index=models.Index(fields=["location_lat", "location_lng"], name="unit_lat_lng_idx"),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 5.0.2 on 2026-10-17 11:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0004_list_filters_and_updated_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="incident",
+            index=models.Index(fields=["status", "severity"], name="incident_status_sev_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="incidentevent",
+            index=models.Index(fields=["major_incident", "-created_at"], name="event_mi_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="incidentevent",
+            index=models.Index(fields=["incident", "-created_at"], name="event_incident_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="sector",
+            index=models.Index(fields=["major_incident", "name"], name="sector_mi_name_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["incident", "-timestamp"], name="task_incident_ts_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="taskgroup",
+            index=models.Index(fields=["major_incident", "-priority", "-created_at"], name="taskgroup_mi_priority_idx"),
+        ),
+    ]
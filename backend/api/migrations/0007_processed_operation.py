@@ -0,0 +1,32 @@
+# Generated by Django 5.0.2 on 2026-10-17 13:55
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0006_tombstone"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ProcessedOperation",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("op_id", models.CharField(max_length=100)),
+                ("result", models.JSONField()),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("user", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="processed_operations", to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                "indexes": [models.Index(fields=["created_at"], name="processed_op_created_idx")],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name="processedoperation",
+            constraint=models.UniqueConstraint(fields=("user", "op_id"), name="unique_user_operation"),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.2 on 2026-10-17 15:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_processed_operation"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="MetricSample",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("metric", models.CharField(max_length=30)),
+                ("value", models.FloatField()),
+                ("recorded_at", models.DateTimeField()),
+                ("major_incident", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="metric_samples", to="api.majorincident")),
+                ("sector", models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name="metric_samples", to="api.sector")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["recorded_at", "id"], name="metric_sample_recorded_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.0.2 on 2026-10-17 16:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_metric_sample"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UnitPosition",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("location_lat", models.FloatField()),
+                ("location_lng", models.FloatField()),
+                ("recorded_at", models.DateTimeField()),
+                ("unit", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="positions", to="api.unit")),
+            ],
+            options={
+                "indexes": [models.Index(fields=["recorded_at", "id"], name="unit_position_recorded_idx")],
+            },
+        ),
+    ]
@@ -32,6 +32,21 @@ class Incident(models.Model):
     severity = models.CharField(max_length=10, choices=Severity.choices, default=Severity.LOW)
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.OPEN)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # External feed identity and content hash, used to skip unchanged records on sync
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    external_fingerprint = models.CharField(max_length=40, blank=True)
+
+    class Meta:
+        # List filters: status/severity (newest first), updated since, bounding box
+        indexes = [
+            models.Index(fields=["status", "-created_at"], name="incident_status_created_idx"),
+            models.Index(fields=["severity", "-created_at"], name="incident_sev_created_idx"),
+            models.Index(fields=["updated_at"], name="incident_updated_idx"),
+            models.Index(fields=["location_lat", "location_lng"], name="incident_lat_lng_idx"),
+            models.Index(fields=["status", "severity"], name="incident_status_sev_idx"),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.status})"
@@ -49,6 +64,20 @@ class Unit(models.Model):
     location_lat = models.FloatField()
     location_lng = models.FloatField()
     availability_status = models.CharField(max_length=50, default="AVAILABLE")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    # External feed identity and content hash, used to skip unchanged records on sync
+    external_id = models.CharField(max_length=100, unique=True, null=True, blank=True)
+    external_fingerprint = models.CharField(max_length=40, blank=True)
+
+    class Meta:
+        # List filters: type/availability, updated since, bounding box
+        indexes = [
+            models.Index(fields=["type", "availability_status"], name="unit_type_status_idx"),
+            models.Index(fields=["availability_status"], name="unit_status_idx"),
+            models.Index(fields=["updated_at"], name="unit_updated_idx"),
+            models.Index(fields=["location_lat", "location_lng"], name="unit_lat_lng_idx"),
+        ]
 
     def __str__(self):
         return f"{self.name} ({self.type})"
@@ -66,10 +95,70 @@ class Task(models.Model):
     status = models.CharField(max_length=20, choices=Status.choices, default=Status.PENDING)
     timestamp = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["-timestamp"], name="task_timestamp_idx"),
+            # Tasks of one incident, newest first (TaskViewSet ?incident=, by-incident)
+            models.Index(fields=["incident", "-timestamp"], name="task_incident_ts_idx"),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.status})"
 
 
+class ProcessedOperation(models.Model):
+    """Result of an applied batch write, keyed by the client's operation id so retries are not re-applied."""
+
+    user = models.ForeignKey(User, related_name="processed_operations", on_delete=models.CASCADE)
+    op_id = models.CharField(max_length=100)
+    result = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["user", "op_id"], name="unique_user_operation"),
+        ]
+        indexes = [
+            models.Index(fields=["created_at"], name="processed_op_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.op_id} ({self.user_id})"
+
+
+class Tombstone(models.Model):
+    """Record of a deleted incident, task or unit, so offline clients can sync deletions."""
+
+    entity = models.CharField(max_length=20)
+    object_id = models.BigIntegerField()
+    deleted_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["deleted_at", "id"], name="tombstone_deleted_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.entity} {self.object_id} deleted"
+
+
+class UnitPosition(models.Model):
+    """A unit's position when it was saved, read back into every process's track store (``utils.tracks``)."""
+
+    unit = models.ForeignKey(Unit, related_name="positions", on_delete=models.CASCADE)
+    location_lat = models.FloatField()
+    location_lng = models.FloatField()
+    recorded_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["recorded_at", "id"], name="unit_position_recorded_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.unit_id} at {self.location_lat},{self.location_lng}"
+
+
 # ============================================
 # FIELD INCIDENT COMMAND DASHBOARD MODELS
 # ============================================
@@ -163,6 +252,9 @@ class Sector(models.Model):
 
     class Meta:
         ordering = ["name"]
+        indexes = [
+            models.Index(fields=["major_incident", "name"], name="sector_mi_name_idx"),
+        ]
 
     def __str__(self):
         return f"{self.major_incident.title} - {self.name}"
@@ -226,6 +318,9 @@ class TaskGroup(models.Model):
 
     class Meta:
         ordering = ["-priority", "-created_at"]
+        indexes = [
+            models.Index(fields=["major_incident", "-priority", "-created_at"], name="taskgroup_mi_priority_idx"),
+        ]
 
     def __str__(self):
         return f"{self.major_incident.title} - {self.title}"
@@ -268,6 +363,30 @@ class IncidentEvent(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        # Timeline of one incident or major incident, newest first
+        indexes = [
+            models.Index(fields=["major_incident", "-created_at"], name="event_mi_created_idx"),
+            models.Index(fields=["incident", "-created_at"], name="event_incident_created_idx"),
+        ]
 
     def __str__(self):
         return f"{self.event_type} - {self.title}"
+
+
+class MetricSample(models.Model):
+    """One change of a charted field incident metric (see ``api.field_store.history``)."""
+
+    major_incident = models.ForeignKey(MajorIncident, related_name="metric_samples", on_delete=models.CASCADE)
+    # Set for sector metrics, empty for the major incident's own
+    sector = models.ForeignKey(Sector, null=True, blank=True, related_name="metric_samples", on_delete=models.CASCADE)
+    metric = models.CharField(max_length=30)
+    value = models.FloatField()
+    recorded_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["recorded_at", "id"], name="metric_sample_recorded_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.metric} = {self.value} at {self.recorded_at}"
@@ -0,0 +1,22 @@
+from rest_framework.pagination import CursorPagination
+
+
+class IncidentCursorPagination(CursorPagination):
+    """Keyset pagination, newest incidents first."""
+
+    ordering = ("-created_at", "-id")
+    page_size = 100
+    page_size_query_param = "page_size"
+    max_page_size = 1000
+
+
+class TaskCursorPagination(IncidentCursorPagination):
+    """Keyset pagination, most recently changed tasks first."""
+
+    ordering = ("-timestamp", "-id")
+
+
+class UnitCursorPagination(IncidentCursorPagination):
+    """Keyset pagination in id order."""
+
+    ordering = ("id",)
@@ -2,14 +2,35 @@ from rest_framework import serializers
 from .models import Incident, Task, Unit
 
 
+class SparseFieldsMixin:
+    """
+    Trim a serializer to the fields the caller asked for.
+
+    Reads ``fields`` (names to keep) and ``expand`` (nested fields to include)
+    from the serializer context. Fields listed in ``expandable_fields`` are
+    dropped unless expanded; views decide the default expansion.
+    """
+
+    expandable_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        wanted = self.context.get("fields")
+        expand = self.context.get("expand") or set()
+        for name in list(self.fields):
+            if (wanted and name not in wanted) or (name in self.expandable_fields and name not in expand):
+                self.fields.pop(name)
+
+
 class TaskSerializer(serializers.ModelSerializer):
     class Meta:
         model = Task
         fields = ["id", "incident", "assigned_unit", "title", "status", "timestamp"]
 
 
-class IncidentSerializer(serializers.ModelSerializer):
+class IncidentSerializer(SparseFieldsMixin, serializers.ModelSerializer):
     tasks = TaskSerializer(many=True, read_only=True)
+    expandable_fields = ("tasks",)
 
     class Meta:
         model = Incident
@@ -22,6 +43,7 @@ class IncidentSerializer(serializers.ModelSerializer):
             "severity",
             "status",
             "created_at",
+            "updated_at",
             "tasks",
         ]
 
@@ -36,4 +58,5 @@ class UnitSerializer(serializers.ModelSerializer):
             "location_lat",
             "location_lng",
             "availability_status",
+            "updated_at",
         ]
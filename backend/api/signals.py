@@ -0,0 +1,102 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from utils.clusters import cluster_records, uncluster_record
+from utils.kpis import remember, remember_stored, track, untrack
+from utils.spatial import index_units, unindex_unit
+from utils.tracks import record_units
+
+from .models import Incident, Task, Tombstone, Unit
+
+
+@receiver(post_save, sender=Unit)
+def unit_saved(sender, instance, **kwargs):
+    index_units([instance])
+    record_units([instance])
+
+
+@receiver(post_delete, sender=Unit)
+def unit_deleted(sender, instance, **kwargs):
+    unindex_unit(instance.pk)
+
+
+@receiver(pre_save, sender=Incident)
+@receiver(pre_save, sender=Task)
+@receiver(pre_save, sender=Unit)
+def kpi_saving(sender, instance, using, **kwargs):
+    remember_stored(sender._meta.model_name, instance, using)
+
+
+@receiver(pre_delete, sender=Incident)
+@receiver(pre_delete, sender=Task)
+@receiver(pre_delete, sender=Unit)
+def kpi_deleting(sender, instance, **kwargs):
+    # Deleted instances (cascades included) are fetched as stored
+    remember(sender._meta.model_name, instance)
+
+
+@receiver(post_save, sender=Incident)
+@receiver(post_save, sender=Task)
+@receiver(post_save, sender=Unit)
+def kpi_saved(sender, instance, **kwargs):
+    track(sender._meta.model_name, [instance])
+
+
+@receiver(post_delete, sender=Incident)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Unit)
+def kpi_deleted(sender, instance, **kwargs):
+    untrack(sender._meta.model_name, instance)
+
+
+@receiver(post_save, sender=Incident)
+@receiver(post_save, sender=Unit)
+def cluster_saved(sender, instance, **kwargs):
+    cluster_records(f"{sender._meta.model_name}s", [instance])
+
+
+@receiver(post_delete, sender=Incident)
+@receiver(post_delete, sender=Unit)
+def cluster_deleted(sender, instance, **kwargs):
+    uncluster_record(f"{sender._meta.model_name}s", instance.pk)
+
+
+@receiver(post_delete, sender=Incident)
+@receiver(post_delete, sender=Task)
+@receiver(post_delete, sender=Unit)
+def record_tombstone(sender, instance, using, **kwargs):
+    tombstone = Tombstone(entity=sender._meta.model_name, object_id=instance.pk)
+    connection = transaction.get_connection(using)
+    if connection.in_atomic_block:
+        _pending_tombstones(connection, using).append(tombstone)
+    else:
+        tombstone.save(using=using)
+
+
+class _TombstoneBatch(list):
+    """Tombstones of one (savepoint of a) transaction, written by one bulk INSERT on commit."""
+
+    def __init__(self, using):
+        super().__init__()
+        self.using = using
+
+    def __call__(self):
+        Tombstone.objects.using(self.using).bulk_create(self)
+
+
+def _pending_tombstones(connection, using):
+    """
+    The open batch of the current savepoint, registered with ``on_commit`` on first use.
+
+    A queryset or cascading delete sends ``post_delete`` per row, and all of
+    them land in one batch. Rolling back the savepoint discards its batch
+    with the rows it would have tombstoned.
+    """
+    savepoints = set(connection.savepoint_ids)
+    for registered, callback, _ in reversed(connection.run_on_commit):
+        if registered == savepoints and isinstance(callback, _TombstoneBatch):
+            return callback
+    batch = _TombstoneBatch(using)
+    transaction.on_commit(batch, using=using)
+    return batch
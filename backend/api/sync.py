@@ -0,0 +1,149 @@
+"""
+Delta sync for offline clients.
+
+Each entity table (and the tombstone table for deletions) is read as a
+change feed ordered by ``(modified, id)``. The sync token is an opaque
+base64 encoding of the last ``(modified, id)`` position per feed; a request
+returns only rows past those positions, at most ``limit`` per feed, and a
+new token.
+
+Once a feed is caught up its position moves to ``SYNC_OVERLAP_SECONDS``
+before the read, so rows whose transaction committed after a sync read, but
+with an earlier timestamp, are still picked up. Clients therefore
+see a few rows twice and must apply changes as idempotent upserts.
+"""
+import base64
+import binascii
+import json
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Incident, Task, Tombstone, Unit
+from .serializers import IncidentSerializer, TaskSerializer, UnitSerializer
+
+TOKEN_VERSION = 1
+
+# name -> (model, modified field, serializer)
+FEEDS = {
+    "incident": (Incident, "updated_at", IncidentSerializer),
+    "task": (Task, "timestamp", TaskSerializer),
+    "unit": (Unit, "updated_at", UnitSerializer),
+}
+TOMBSTONE_FEED = "deleted"
+
+_last_prune = 0.0
+
+
+class InvalidToken(ValueError):
+    pass
+
+
+class ExpiredToken(ValueError):
+    pass
+
+
+def _to_micros(value: datetime) -> int:
+    return int(value.timestamp() * 1_000_000)
+
+
+def _from_micros(value: int) -> datetime:
+    return datetime.fromtimestamp(value / 1_000_000, tz=dt_timezone.utc)
+
+
+def encode_token(positions: dict) -> str:
+    raw = json.dumps({"v": TOKEN_VERSION, "p": positions}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_token(token: str) -> dict:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)))
+        version = data["v"]
+        positions = {name: (int(ts), int(pk)) for name, (ts, pk) in data["p"].items()}
+    except (binascii.Error, ValueError, KeyError, TypeError, AttributeError):
+        raise InvalidToken("Invalid sync token.")
+    if version != TOKEN_VERSION:
+        raise InvalidToken("Unsupported sync token version.")
+    return positions
+
+
+def _read_feed(qs, field, position, limit):
+    """Rows of ``qs`` strictly after ``position`` in ``(field, id)`` order, at most ``limit``."""
+    if position is not None:
+        since = _from_micros(position[0])
+        qs = qs.filter(Q(**{f"{field}__gt": since}) | Q(**{field: since, "id__gt": position[1]}))
+    rows = list(qs.order_by(field, "id")[: limit + 1])
+    return rows[:limit], len(rows) > limit
+
+
+def _next_position(rows, field, has_more, horizon):
+    if has_more:
+        last = rows[-1]
+        return (_to_micros(getattr(last, field)), last.pk)
+    # Caught up: restart from the overlap horizon so late commits are not skipped
+    return horizon
+
+
+def prune_tombstones():
+    """Delete tombstones past the retention period, at most once an hour per process."""
+    global _last_prune
+    now = time.monotonic()
+    if now - _last_prune < 3600:
+        return
+    _last_prune = now
+    cutoff = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)
+    Tombstone.objects.filter(deleted_at__lt=cutoff).delete()
+
+
+def build_sync(token=None, limit=500):
+    """
+    Changes since ``token`` (everything when None, without past deletions).
+
+    Returns:
+        Dictionary with ``incidents``, ``tasks``, ``units``, ``deleted`` ids per
+        entity, the next ``token`` and ``has_more`` (call again immediately)
+
+    Raises:
+        InvalidToken: token cannot be decoded
+        ExpiredToken: token predates tombstone retention; client must resync from scratch
+    """
+    positions = decode_token(token) if token else {}
+    now = timezone.now()
+    # Entity feeds read live rows and never expire; only deletions are pruned
+    deleted_position = positions.get(TOMBSTONE_FEED)
+    if deleted_position is not None:
+        if deleted_position[0] < _to_micros(now - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS)):
+            raise ExpiredToken("Sync token expired; full resync required.")
+    horizon = (_to_micros(now - timedelta(seconds=settings.SYNC_OVERLAP_SECONDS)), 0)
+
+    result = {"deleted": {name: [] for name in FEEDS}}
+    next_positions = {}
+    has_more = False
+    for name, (model, field, serializer_class) in FEEDS.items():
+        qs = model.objects.all()
+        context = {}
+        if model is Incident:
+            # Tasks travel in their own feed
+            context = {"expand": set()}
+        rows, more = _read_feed(qs, field, positions.get(name), limit)
+        result[f"{name}s"] = serializer_class(rows, many=True, context=context).data
+        next_positions[name] = _next_position(rows, field, more, horizon)
+        has_more |= more
+
+    if positions:
+        tombstones, more = _read_feed(Tombstone.objects.all(), "deleted_at", positions.get(TOMBSTONE_FEED), limit)
+        for tombstone in tombstones:
+            result["deleted"].setdefault(tombstone.entity, []).append(tombstone.object_id)
+        next_positions[TOMBSTONE_FEED] = _next_position(tombstones, "deleted_at", more, horizon)
+        has_more |= more
+    else:
+        # A first sync has nothing to delete: start the tombstone feed at the present
+        next_positions[TOMBSTONE_FEED] = horizon
+
+    result["token"] = encode_token(next_positions)
+    result["has_more"] = has_more
+    return result
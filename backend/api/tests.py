@@ -0,0 +1,282 @@
+import json
+from datetime import timedelta
+from unittest import mock
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APITestCase
+
+from utils import timeseries, tracks
+from utils.kpis import KPIAggregator, get_kpis
+from utils.polling_service import apply_external_payload
+from utils.realtime import get_realtime_service
+
+from .field_feed import FieldChangeFeed, field_stream_name
+from .field_store import FieldIncidentStore, get_field_store
+from .models import Incident, MetricSample, Task, Unit, UnitPosition, User
+from .sync import TOMBSTONE_FEED, ExpiredToken, build_sync, decode_token, encode_token
+
+
+class IncidentQueryCountTests(APITestCase):
+    """Incident list queries must not grow with the number of rows (N+1)."""
+
+    ENDPOINTS = (
+        "/api/incidents/",
+        "/api/incidents/?expand=tasks",
+        "/api/incidents/?fields=id,title,status,severity",
+        "/api/incidents/?fields=id,title,tasks",
+    )
+    TASKS_PER_INCIDENT = 3
+
+    def setUp(self):
+        self.unit = Unit.objects.create(name="qc-unit", type=Unit.UnitType.EMS, location_lat=32.0, location_lng=34.8)
+
+    def _seed(self, count):
+        incidents = Incident.objects.bulk_create(
+            Incident(title=f"qc-{Incident.objects.count() + i}", location_lat=32.0, location_lng=34.8)
+            for i in range(count)
+        )
+        Task.objects.bulk_create(
+            Task(incident=incident, assigned_unit=self.unit, title=f"qc-task-{n}")
+            for incident in incidents
+            for n in range(self.TASKS_PER_INCIDENT)
+        )
+
+    def _count_queries(self, endpoint):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(endpoint)
+        self.assertEqual(response.status_code, 200, endpoint)
+        return len(ctx.captured_queries)
+
+    def test_list_queries_do_not_scale_with_rows(self):
+        self._seed(5)
+        expected = {endpoint: self._count_queries(endpoint) for endpoint in self.ENDPOINTS}
+        self._seed(95)
+        for endpoint, queries in expected.items():
+            with self.subTest(endpoint=endpoint), self.assertNumQueries(queries):
+                self.client.get(endpoint)
+
+    def test_list_includes_tasks_by_default(self):
+        self._seed(2)
+        row = self.client.get("/api/incidents/").json()["results"][0]
+        self.assertEqual(len(row["tasks"]), self.TASKS_PER_INCIDENT)
+
+    def test_sparse_fields_drop_tasks(self):
+        self._seed(2)
+        row = self.client.get("/api/incidents/?fields=id,title").json()["results"][0]
+        self.assertEqual(set(row), {"id", "title"})
+
+
+class SyncRetentionTests(TestCase):
+    def test_first_sync_pages_through_rows_older_than_retention(self):
+        Incident.objects.bulk_create(
+            Incident(title=f"old-{i}", location_lat=32.0, location_lng=34.8) for i in range(25)
+        )
+        Incident.objects.update(updated_at=timezone.now() - timedelta(days=60))
+
+        seen, token, has_more = [], None, True
+        while has_more:
+            result = build_sync(token, limit=10)
+            seen += [row["id"] for row in result["incidents"]]
+            token, has_more = result["token"], result["has_more"]
+        self.assertEqual(sorted(seen), sorted(Incident.objects.values_list("id", flat=True)))
+
+    def test_deleted_position_past_retention_expires(self):
+        positions = decode_token(build_sync()["token"])
+        stale = timezone.now() - timedelta(days=settings.SYNC_TOMBSTONE_RETENTION_DAYS + 1)
+        positions[TOMBSTONE_FEED] = (int(stale.timestamp() * 1_000_000), 0)
+        with self.assertRaises(ExpiredToken):
+            build_sync(encode_token(positions))
+
+
+class BatchOperationTests(APITestCase):
+    def setUp(self):
+        incident = Incident.objects.create(title="batch", location_lat=32.0, location_lng=34.8)
+        self.task = Task.objects.create(incident=incident, title="batch-task")
+
+    def _post(self, role, operations):
+        self.client.force_authenticate(User.objects.create_user(f"batch-{role}", password="x", role=role))
+        response = self.client.post("/api/batch/", {"operations": operations}, format="json")
+        self.assertEqual(response.status_code, 200)
+        return response.json()["results"]
+
+    def test_roles_are_checked_per_operation(self):
+        results = self._post("fieldunit", [
+            {"op_id": "a", "type": "task_status", "task_id": self.task.pk, "status": "DONE"},
+            {"op_id": "b", "type": "create_incident", "data": {"title": "x", "location_lat": 1, "location_lng": 1}},
+        ])
+        self.assertEqual([r["status"] for r in results], ["ok", "error"])
+        self.assertEqual(Incident.objects.count(), 1)
+
+    def test_repeated_op_id_is_an_error_not_a_replay(self):
+        results = self._post("dispatcher", [
+            {"op_id": "a", "type": "task_status", "task_id": self.task.pk, "status": "BOGUS"},
+            {"op_id": "a", "type": "task_status", "task_id": self.task.pk, "status": "DONE"},
+        ])
+        self.assertEqual([r["status"] for r in results], ["error", "error"])
+        self.assertNotIn("replayed", results[1])
+
+
+class FieldChangeFeedTests(TestCase):
+    def test_poll_publishes_only_what_changed(self):
+        store = get_field_store()
+        incident_id = store.declare("EARTHQUAKE", seed=1)["major_incident"]["id"]
+        feed = FieldChangeFeed(interval=0)
+        feed.poll()  # first sight is the clients' snapshot, not an update
+        self.assertEqual(feed.updates_published, 0)
+
+        subscription = get_realtime_service(field_stream_name(incident_id)).subscribe()
+        sector_id = store.get(incident_id)["sectors"][0]["id"]
+        store.update_sector(incident_id, sector_id, {"estimated_survivors": 321})
+        store.add_event(incident_id, {
+            "event_type": "UPDATE", "severity": "INFO", "title": "t", "description": "d", "created_by": "test",
+        })
+        feed.poll()
+        feed.poll()  # nothing new since the last publish
+
+        self.assertEqual(feed.updates_published, 1)
+        frame = subscription.get(timeout=0)
+        update = json.loads(frame.split("data: ", 1)[1])["data"]
+        self.assertEqual(update["sector_updates"], {str(sector_id): {"estimated_survivors": 321}})
+        self.assertEqual([event["title"] for event in update["new_events"]], ["t"])
+        self.assertNotIn("estimated_casualties", update)
+
+
+class FieldIncidentEventsTests(APITestCase):
+    def test_bad_limit_is_a_clear_error(self):
+        incident_id = get_field_store().declare("EARTHQUAKE", seed=1)["major_incident"]["id"]
+        for limit in ("abc", "0", "-5"):
+            with self.subTest(limit=limit):
+                response = self.client.get(f"/api/field/incidents/{incident_id}/events/?limit={limit}")
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json(), {"detail": "limit must be a positive integer."})
+
+
+class KPIIncrementalTests(APITestCase):
+    """Writes in this process keep the KPIs equal to a fresh aggregate, without a reload."""
+
+    def setUp(self):
+        self.kpis = get_kpis()
+        self.kpis.refresh_from_db()
+
+    def assertMatchesDatabase(self):
+        self.assertFalse(self.kpis.stale)
+        fresh = KPIAggregator()
+        fresh.refresh_from_db()
+        self.assertEqual(self.kpis.snapshot(), fresh.snapshot())
+
+    def test_model_saves_and_deletes(self):
+        incident = Incident.objects.create(title="kpi", location_lat=32.0, location_lng=34.8)
+        task = Task.objects.create(incident=incident, title="kpi-task")
+        loaded = Incident.objects.get(pk=incident.pk)
+        loaded.status = Incident.Status.CLOSED
+        loaded.save()
+        Task.objects.get(pk=task.pk).delete()
+        self.assertMatchesDatabase()
+
+    def test_loading_rows_does_not_snapshot_them(self):
+        Incident.objects.create(title="kpi", location_lat=32.0, location_lng=34.8)
+        self.assertFalse(hasattr(Incident.objects.get(), "_kpi_state"))
+
+    def test_declare_counts_task_groups(self):
+        before = self.kpis.snapshot()["task_groups"]["total"]
+        state = get_field_store().declare("EARTHQUAKE", seed=1)
+        self.assertEqual(self.kpis.snapshot()["task_groups"]["total"], before + len(state["task_groups"]))
+        self.assertMatchesDatabase()
+
+    def test_ingest_and_batch_writes(self):
+        unit = {"external_id": "u-1", "name": "kpi-unit", "availability_status": "AVAILABLE"}
+        apply_external_payload({"units": [unit]})
+        apply_external_payload({"units": [dict(unit, availability_status="BUSY")]})
+        task = Task.objects.create(
+            incident=Incident.objects.create(title="kpi", location_lat=32.0, location_lng=34.8), title="kpi-task"
+        )
+        self.client.force_authenticate(User.objects.create_user("kpi", password="x", role="dispatcher"))
+        self.client.post("/api/batch/", {"operations": [
+            {"op_id": "a", "type": "task_status", "task_id": task.pk, "status": "DONE"},
+            {"op_id": "b", "type": "task_status", "task_id": task.pk, "status": "IN_PROGRESS"},
+            {"op_id": "c", "type": "create_incident", "data": {"title": "x", "location_lat": 1, "location_lng": 1}},
+        ]}, format="json")
+        self.assertMatchesDatabase()
+
+    def test_drift_below_zero_marks_the_kind_stale(self):
+        with self.assertLogs("utils.kpis", "WARNING"):
+            self.kpis.move("task", [({"status": "NO_SUCH_STATUS"}, {"status": "DONE"})])
+        self.assertIn("task", self.kpis.stale)
+
+
+class FieldMetricHistoryTests(TestCase):
+    """Metric history comes from stored samples, so every process serves the same one."""
+
+    def setUp(self):
+        patcher = mock.patch.object(timeseries, "_store", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.store = FieldIncidentStore()
+        self.incident_id = self.store.declare("EARTHQUAKE", seed=1)["major_incident"]["id"]
+
+    def _casualty_samples(self, store):
+        now = timezone.now()
+        history = store.history(self.incident_id, now - timedelta(hours=1), now + timedelta(hours=1), resolution=60)
+        return sum(point["samples"] for point in history["incident"]["estimated_casualties"]["points"])
+
+    def test_reloads_record_nothing(self):
+        self.store.update_casualties(self.incident_id, {"estimated_casualties": 10})
+        stored = MetricSample.objects.count()
+        self.store._entries.clear()
+        self.store.get(self.incident_id)
+        self.assertEqual(MetricSample.objects.count(), stored)
+        # Declared figures and the one update
+        self.assertEqual(self._casualty_samples(self.store), 2)
+
+    def test_other_processes_see_the_same_history(self):
+        self.store.update_casualties(self.incident_id, {"estimated_casualties": 10})
+        self.assertEqual(self._casualty_samples(self.store), 2)
+        with mock.patch.object(timeseries, "_store", None):
+            self.assertEqual(self._casualty_samples(FieldIncidentStore()), 2)
+        # A write by another process reaches this one's history without repeating what it already holds
+        FieldIncidentStore().update_casualties(self.incident_id, {"estimated_casualties": 12})
+        self.assertEqual(self._casualty_samples(self.store), 3)
+
+
+class UnitTrackTests(APITestCase):
+    """Unit tracks come from stored positions, whichever process saved the unit."""
+
+    def setUp(self):
+        patcher = mock.patch.object(tracks, "_track_stores", {})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client.force_authenticate(User.objects.create_user("tracks", password="x", role="dispatcher"))
+
+    def _track(self, unit_id, **params):
+        response = self.client.get(f"/api/units/{unit_id}/track/", params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def test_positions_saved_by_another_process_are_served(self):
+        unit = {"external_id": "u-1", "name": "tracked", "location_lat": 32.0, "location_lng": 34.8}
+        apply_external_payload({"units": [unit]})
+        unit_id = Unit.objects.get().pk
+        self.assertEqual(self._track(unit_id)["fixes"], 1)
+        # The ingest runner moves the unit; this process's store catches up
+        apply_external_payload({"units": [dict(unit, location_lat=32.01)]})
+        track = self._track(unit_id)
+        self.assertEqual(track["fixes"], 2)
+        self.assertEqual(track["last_known"][1:], [32.01, 34.8])
+        with mock.patch.object(tracks, "_track_stores", {}):
+            self.assertEqual(self._track(unit_id)["fixes"], 2)
+
+    def test_unit_that_did_not_move_in_range_has_a_last_known_position(self):
+        unit = Unit.objects.create(name="parked", type=Unit.UnitType.EMS, location_lat=32.0, location_lng=34.8)
+        UnitPosition.objects.update(recorded_at=timezone.now() - timedelta(hours=2))
+        track = self._track(unit.pk)
+        self.assertEqual((track["fixes"], track["last_known"][1:]), (0, [32.0, 34.8]))
+
+    def test_unit_without_stored_positions_falls_back_to_its_row(self):
+        unit = Unit.objects.create(name="legacy", type=Unit.UnitType.EMS, location_lat=32.0, location_lng=34.8)
+        UnitPosition.objects.all().delete()
+        track = self._track(unit.pk)
+        self.assertEqual((track["fixes"], track["last_known"][1:]), (0, [32.0, 34.8]))
@@ -1,17 +1,25 @@
 from rest_framework.routers import DefaultRouter
+from django.conf import settings
 from django.urls import path, include
 
 from .views import (
-    IncidentViewSet, TaskViewSet, UnitViewSet,
-    mock_incidents, mock_units, mock_events, mock_incident_detail,
+    IncidentViewSet, TaskViewSet, UnitViewSet, ingest_metrics, realtime_metrics, dispatch_recommend, sync_changes,
+    batch_operations, kpis, map_clusters,
+    mock_incidents, mock_units, mock_unit_track, mock_units_playback, mock_map_clusters, mock_events, mock_incident_detail,
     mock_incident_status, mock_incident_severity, mock_incident_assign,
     mock_incident_note, mock_simulate_update, mock_updates_stream,
-    field_incident_detail, field_incident_sectors, field_incident_task_groups,
-    field_incident_events, field_incident_sector_update, field_incident_task_group_update,
+    field_incidents, field_incident_detail, field_incident_sectors, field_incident_task_groups,
+    field_incident_events, field_incident_history, field_incident_sector_update, field_incident_task_group_update,
     field_incident_casualty_update, field_incident_add_event, field_incident_simulate,
-    field_incident_updates_stream
+    field_incident_updates_stream, mock_updates_stream_async, field_incident_updates_stream_async
 )
 
+# Async SSE views hold connections as coroutines under ASGI; the sync versions
+# serve the same streams under WSGI (runserver, gunicorn sync workers).
+if settings.REALTIME_ASYNC_STREAMS:
+    mock_updates_stream = mock_updates_stream_async
+    field_incident_updates_stream = field_incident_updates_stream_async
+
 router = DefaultRouter()
 router.register(r"incidents", IncidentViewSet)
 router.register(r"tasks", TaskViewSet)
@@ -19,9 +27,19 @@ router.register(r"units", UnitViewSet)
 
 urlpatterns = [
     path("", include(router.urls)),
+    path("ingest/metrics/", ingest_metrics, name="ingest_metrics"),
+    path("realtime/metrics/", realtime_metrics, name="realtime_metrics"),
+    path("kpis/", kpis, name="kpis"),
+    path("map/clusters/", map_clusters, name="map_clusters"),
+    path("dispatch/recommend/", dispatch_recommend, name="dispatch_recommend"),
+    path("sync/", sync_changes, name="sync_changes"),
+    path("batch/", batch_operations, name="batch_operations"),
     # Mock data API endpoints for regional dashboard demo
     path("mock/incidents/", mock_incidents, name="mock_incidents"),
     path("mock/units/", mock_units, name="mock_units"),
+    path("mock/units/playback/", mock_units_playback, name="mock_units_playback"),
+    path("mock/units/<int:unit_id>/track/", mock_unit_track, name="mock_unit_track"),
+    path("mock/map/clusters/", mock_map_clusters, name="mock_map_clusters"),
     path("mock/events/", mock_events, name="mock_events"),
     path("mock/incidents/<int:incident_id>/", mock_incident_detail, name="mock_incident_detail"),
     path("mock/incidents/<int:incident_id>/status/", mock_incident_status, name="mock_incident_status"),
@@ -36,10 +54,25 @@ urlpatterns = [
     path("field/sectors/", field_incident_sectors, name="field_incident_sectors"),
     path("field/task-groups/", field_incident_task_groups, name="field_incident_task_groups"),
     path("field/events/", field_incident_events, name="field_incident_events"),
+    path("field/history/", field_incident_history, name="field_incident_history"),
     path("field/sectors/<int:sector_id>/", field_incident_sector_update, name="field_incident_sector_update"),
     path("field/task-groups/<int:task_group_id>/", field_incident_task_group_update, name="field_incident_task_group_update"),
     path("field/casualty-update/", field_incident_casualty_update, name="field_incident_casualty_update"),
     path("field/add-event/", field_incident_add_event, name="field_incident_add_event"),
     path("field/simulate/", field_incident_simulate, name="field_incident_simulate"),
     path("field/updates/stream/", field_incident_updates_stream, name="field_incident_updates_stream"),
+    # The same endpoints for one of several concurrent major incidents; the
+    # unprefixed routes above act on the oldest active incident
+    path("field/incidents/", field_incidents, name="field_incidents"),
+    path("field/incidents/<int:incident_id>/", field_incident_detail, name="field_incident_detail_by_id"),
+    path("field/incidents/<int:incident_id>/sectors/", field_incident_sectors, name="field_incident_sectors_by_id"),
+    path("field/incidents/<int:incident_id>/task-groups/", field_incident_task_groups, name="field_incident_task_groups_by_id"),
+    path("field/incidents/<int:incident_id>/events/", field_incident_events, name="field_incident_events_by_id"),
+    path("field/incidents/<int:incident_id>/history/", field_incident_history, name="field_incident_history_by_id"),
+    path("field/incidents/<int:incident_id>/sectors/<int:sector_id>/", field_incident_sector_update, name="field_incident_sector_update_by_id"),
+    path("field/incidents/<int:incident_id>/task-groups/<int:task_group_id>/", field_incident_task_group_update, name="field_incident_task_group_update_by_id"),
+    path("field/incidents/<int:incident_id>/casualty-update/", field_incident_casualty_update, name="field_incident_casualty_update_by_id"),
+    path("field/incidents/<int:incident_id>/add-event/", field_incident_add_event, name="field_incident_add_event_by_id"),
+    path("field/incidents/<int:incident_id>/simulate/", field_incident_simulate, name="field_incident_simulate_by_id"),
+    path("field/incidents/<int:incident_id>/updates/stream/", field_incident_updates_stream, name="field_incident_updates_stream_by_id"),
 ]
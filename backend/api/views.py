@@ -1,36 +1,137 @@
 from rest_framework import viewsets, status
 from rest_framework.response import Response
-from rest_framework.decorators import action, api_view
+from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.permissions import IsAuthenticated
+from django.db.models import Prefetch
 from django.http import JsonResponse, StreamingHttpResponse
 import json
 import time
-import random
-import os
+from datetime import timedelta
 
-from .models import Incident, Task, Unit
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.utils import timezone
+
+from .models import Incident, IncidentEvent, MajorIncident, Sector, Task, TaskGroup, Unit
 from .serializers import IncidentSerializer, TaskSerializer, UnitSerializer
 from .permissions import ReadOnlyOrAdminDispatcher, TaskPermission
+from .pagination import IncidentCursorPagination, TaskCursorPagination, UnitCursorPagination
+from .filters import filter_bbox, filter_choices, filter_updated_since, parse_bbox
+from .conditional import ConditionalGetMixin
+from .sync import ExpiredToken, InvalidToken, build_sync, prune_tombstones
+from .batch import ConcurrentBatch, apply_batch, prune_processed_operations
+from .field_feed import field_stream_name, get_field_feed, poke_field_feed
+from .field_store import (
+    CASUALTY_EDITABLE, EVENT_FIELDS, MAJOR_INCIDENT_FIELDS, SECTOR_EDITABLE, TASK_GROUP_EDITABLE, clean_changes,
+    get_field_store, parse_history_time, parse_timeline_cursor,
+)
 from utils.mock_data import get_mock_service
-from utils.realtime import get_realtime_service
-from utils.field_incident_data import get_field_incident_service
+from utils.realtime import get_realtime_service, get_realtime_stats
+from utils.ingest import read_metrics_snapshot
+from utils.spatial import get_unit_index
+from utils.kpis import get_kpis
+from utils.clusters import get_clusters
+from utils.tracks import get_track_store, get_unit_tracks
+from utils.dispatch import recommend_dispatch
 
 
-class IncidentViewSet(viewsets.ModelViewSet):
+class IncidentViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Incident.objects.all().order_by("-created_at")
     serializer_class = IncidentSerializer
     permission_classes = [ReadOnlyOrAdminDispatcher]
+    pagination_class = IncidentCursorPagination
+
+    # Columns TaskSerializer reads; tasks are fetched in one extra query per request
+    TASK_COLUMNS = ("id", "incident_id", "assigned_unit_id", "title", "status", "timestamp")
+
+    def _sparse_fields(self):
+        """
+        Requested ``?fields=`` and ``?expand=`` sets.
 
+        Tasks are expanded by default, as before sparse fields existed; a
+        ``?fields=`` list without ``tasks`` leaves them out.
+        """
+        fields = {f for f in self.request.query_params.get("fields", "").split(",") if f}
+        expand = {f for f in self.request.query_params.get("expand", "").split(",") if f}
+        expand.add("tasks")
+        if fields:
+            expand &= fields
+        return fields, expand
 
-class TaskViewSet(viewsets.ModelViewSet):
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action == "list":
+            params = self.request.query_params
+            qs = filter_choices(qs, params, status="status", severity="severity")
+            qs = filter_updated_since(filter_bbox(qs, params), params)
+        fields, expand = self._sparse_fields()
+        if fields:
+            columns = {f.name for f in Incident._meta.concrete_fields} & fields
+            qs = qs.only("id", "created_at", *columns)
+        if "tasks" in expand:
+            qs = qs.prefetch_related(Prefetch("tasks", queryset=Task.objects.only(*self.TASK_COLUMNS)))
+        return qs
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["fields"], context["expand"] = self._sparse_fields()
+        return context
+
+    def get_version_sources(self):
+        sources = [(Incident, "updated_at")]
+        if "tasks" in self._sparse_fields()[1]:
+            sources.append((Task, "timestamp"))
+        return sources
+
+    def get_object_version_filters(self, lookup):
+        return {Incident: {"pk": lookup}, Task: {"incident_id": lookup}}
+
+    @action(detail=True, methods=["get"], url_path="nearest-units")
+    def nearest_units(self, request, pk=None):
+        """
+        Get the k closest units to this incident by great-circle distance.
+
+        Query params: ``type`` (unit type), ``k`` (default 5, max 100) and
+        ``availability_status`` (default AVAILABLE, ``any`` for all units).
+        """
+        incident = self.get_object()
+        try:
+            k = min(max(int(request.query_params.get("k", 5)), 1), 100)
+        except ValueError:
+            return Response({"detail": "k must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+        availability = request.query_params.get("availability_status", "AVAILABLE")
+        hits = get_unit_index().nearest(
+            incident.location_lat,
+            incident.location_lng,
+            k=k,
+            unit_type=request.query_params.get("type") or None,
+            status=None if availability == "any" else availability,
+        )
+        units = Unit.objects.in_bulk([unit_id for _, unit_id in hits])
+        results = []
+        for distance, unit_id in hits:
+            unit = units.get(unit_id)
+            if unit is not None:
+                results.append(dict(UnitSerializer(unit).data, distance_km=round(distance, 3)))
+        return Response(results)
+
+
+class TaskViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Task.objects.select_related("incident", "assigned_unit").all().order_by("-timestamp")
     serializer_class = TaskSerializer
     permission_classes = [TaskPermission]
+    pagination_class = TaskCursorPagination
+    version_sources = [(Task, "timestamp")]
 
     def get_queryset(self):
         incident_id = self.request.query_params.get("incident")
         qs = super().get_queryset()
         if incident_id:
             qs = qs.filter(incident_id=incident_id)
+        if self.action == "list":
+            params = self.request.query_params
+            qs = filter_choices(qs, params, status="status")
+            qs = filter_updated_since(qs, params, field="timestamp")
         return qs
 
     def partial_update(self, request, *args, **kwargs):
@@ -54,10 +155,258 @@ class TaskViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class UnitViewSet(viewsets.ModelViewSet):
+class UnitViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     queryset = Unit.objects.all()
     serializer_class = UnitSerializer
     permission_classes = [ReadOnlyOrAdminDispatcher]
+    pagination_class = UnitCursorPagination
+    version_sources = [(Unit, "updated_at")]
+
+    def get_queryset(self):
+        qs = super().get_queryset()
+        if self.action == "list":
+            params = self.request.query_params
+            qs = filter_choices(qs, params, type="type", availability_status="availability_status")
+            qs = filter_updated_since(filter_bbox(qs, params), params)
+        return qs
+
+    @action(detail=True, methods=["get"])
+    def track(self, request, pk=None):
+        """Get this unit's position history (see ``_unit_track``)."""
+        unit = self.get_object()
+        # A unit with no stored position in the retention window is where its row says
+        current = [int(unit.updated_at.timestamp() * 1000), unit.location_lat, unit.location_lng]
+        return _unit_track(get_unit_tracks(), unit.pk, request.query_params, current)
+
+    @action(detail=False, methods=["get"])
+    def playback(self, request):
+        """Get every unit's position at fixed steps (see ``_unit_playback``)."""
+        return _unit_playback(get_unit_tracks(), request.query_params)
+
+
+def _track_range(params):
+    end = parse_history_time(params["end"]) if params.get("end") else timezone.now()
+    start = parse_history_time(params["start"]) if params.get("start") else end - timedelta(hours=1)
+    return start.timestamp(), end.timestamp()
+
+
+def _unit_track(store, unit_id, params, current=None):
+    """
+    Position history of one unit, oldest first, as ``[epoch ms, lat, lng]`` points.
+
+    Query params: ``start`` / ``end`` (ISO timestamps, default the last hour),
+    ``tolerance`` (metres; simplify with Douglas-Peucker for map rendering)
+    and ``limit`` (newest points kept after simplification). ``last_known``
+    is the newest fix up to ``end``, so a unit that did not move in the range
+    still has a position; ``current`` stands in when the store has none.
+    """
+    try:
+        start, end = _track_range(params)
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        tolerance = float(params.get("tolerance", 0))
+        limit = int(params.get("limit", 0))
+    except ValueError:
+        return Response({"detail": "tolerance must be a number and limit an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    if tolerance < 0 or limit < 0:
+        return Response({"detail": "tolerance and limit must not be negative."}, status=status.HTTP_400_BAD_REQUEST)
+    track = store.track(unit_id, start, end, tolerance_m=tolerance, limit=limit)
+    track = track or {"unit_id": unit_id, "fixes": 0, "points": [], "last_known": None}
+    if track["last_known"] is None and current is not None and current[0] <= end * 1000:
+        track["last_known"] = current
+    return Response(track)
+
+
+def _unit_playback(store, params):
+    """
+    Every unit's last known position at ``start``, ``start + step``, ... ``end``.
+
+    Query params: ``start`` / ``end`` (ISO timestamps, default the last hour),
+    ``step`` (seconds, default spreading ``TRACK_PLAYBACK_MAX_FRAMES`` over
+    the range) and ``units`` (comma list of ids).
+    """
+    max_frames = settings.TRACK_PLAYBACK_MAX_FRAMES
+    try:
+        start, end = _track_range(params)
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        step = float(params["step"]) if params.get("step") else max((end - start) / max_frames, 1.0)
+        unit_ids = [int(v) for v in params["units"].split(",") if v] if params.get("units") else None
+    except ValueError:
+        return Response({"detail": "step must be a number and units a comma list of ids."}, status=status.HTTP_400_BAD_REQUEST)
+    if end < start or step <= 0 or (end - start) / step >= max_frames:
+        return Response(
+            {"detail": f"start must precede end, with at most {max_frames} frames of step seconds."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    return Response(store.playback(start, end, step, unit_ids))
+
+
+def _map_clusters(clusters, params):
+    """
+    Clusters and single points of ``clusters`` in a map viewport.
+
+    Query params: ``bbox`` (``min_lat,min_lng,max_lat,max_lng``, required),
+    ``zoom`` (map zoom level, required) and ``layers`` (comma list of
+    ``incidents`` and ``units``, default both).
+    """
+    if not params.get("bbox") or not params.get("zoom"):
+        return Response({"detail": "bbox and zoom are required."}, status=status.HTTP_400_BAD_REQUEST)
+    min_lat, min_lng, max_lat, max_lng = bbox = parse_bbox(params["bbox"])
+    if min_lat > max_lat or min_lng > max_lng:
+        return Response(
+            {"detail": "bbox minimums must not exceed its maximums (split boxes crossing 180 degrees)."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    try:
+        zoom = int(float(params["zoom"]))
+    except (OverflowError, ValueError):
+        zoom = -1
+    if not 0 <= zoom <= 30:
+        return Response({"detail": "zoom must be a number from 0 to 30."}, status=status.HTTP_400_BAD_REQUEST)
+    layers = [v for v in params.get("layers", "").split(",") if v] or ["incidents", "units"]
+    if not set(layers) <= {"incidents", "units"}:
+        return Response({"detail": "layers must be incidents and/or units."}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({"zoom": zoom, **clusters.query(bbox, zoom, layers)})
+
+
+@api_view(["GET"])
+def ingest_metrics(request):
+    """Get sync lag, duration histogram and error counts from the ingest runner."""
+    snapshot = read_metrics_snapshot(settings.INGEST_METRICS_FILE)
+    if snapshot is None:
+        return Response({"detail": "Ingest runner has not reported yet."}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    return Response(snapshot)
+
+
+@api_view(["GET"])
+def realtime_metrics(request):
+    """Get per-stream fan-out counters and location coalescing input/output rates."""
+    return Response(get_realtime_stats())
+
+
+@api_view(["GET"])
+def kpis(request):
+    """
+    Get dashboard counters: incidents, units, tasks, field task groups and the mock dashboard's data.
+
+    Counters are kept up to date on every write, so this does not read the
+    entity tables (beyond a periodic reload for other processes' writes).
+    """
+    # Starts the mock service, whose deltas keep the "mock" counters current
+    get_mock_service()
+    return Response(get_kpis().snapshot())
+
+
+@api_view(["GET"])
+def map_clusters(request):
+    """
+    Get incident and unit clusters for a map viewport (see ``_map_clusters``).
+
+    Served from an in-memory grid per zoom level, so the response grows with
+    the viewport, not with the number of incidents and units.
+    """
+    return _map_clusters(get_clusters("db"), request.query_params)
+
+
+@api_view(["GET"])
+@permission_classes([IsAuthenticated])
+def sync_changes(request):
+    """
+    Get incidents, tasks and units changed or deleted since ``?since=<token>``.
+
+    Omit ``since`` for a full initial sync. Call again with the returned
+    ``token`` right away while ``has_more`` is true. ``?limit=`` caps rows per
+    entity (default 500, max 2000).
+    """
+    try:
+        limit = min(max(int(request.query_params.get("limit", 500)), 1), 2000)
+    except ValueError:
+        return Response({"detail": "limit must be an integer."}, status=status.HTTP_400_BAD_REQUEST)
+    prune_tombstones()
+    try:
+        return Response(build_sync(request.query_params.get("since") or None, limit=limit))
+    except InvalidToken as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    except ExpiredToken as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_410_GONE)
+
+
+@api_view(["POST"])
+@permission_classes([IsAuthenticated])
+def batch_operations(request):
+    """
+    Apply a batch of offline-queued writes in one transaction.
+
+    Body: ``{"operations": [{"op_id": ..., "type": "task_status" | "create_incident", ...}]}``.
+    Each result reports "ok" or validation errors, including operations the
+    user's role may not perform and ``op_id`` repeats within the batch;
+    operations applied by an earlier batch return their stored result with
+    ``replayed``.
+    """
+    operations = request.data.get("operations")
+    if not isinstance(operations, list):
+        return Response({"detail": "operations must be a list."}, status=status.HTTP_400_BAD_REQUEST)
+    if len(operations) > settings.BATCH_MAX_OPERATIONS:
+        return Response(
+            {"detail": f"At most {settings.BATCH_MAX_OPERATIONS} operations per batch."},
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+    prune_processed_operations()
+    try:
+        return Response({"results": apply_batch(request.user, operations)})
+    except ConcurrentBatch:
+        return Response(
+            {"detail": "Some operations are being applied by another request; retry the batch."},
+            status=status.HTTP_409_CONFLICT,
+        )
+
+
+@api_view(["POST"])
+def dispatch_recommend(request):
+    """
+    Propose a unit-to-incident plan for all open incidents and available units.
+
+    Body (all optional): ``incident_ids``, ``unit_ids``, ``max_distance_km``,
+    and ``source`` ("db", default, or "mock" for the dashboard demo data).
+    Nothing is assigned; the plan is returned for the dispatcher to confirm.
+    """
+    source = request.data.get("source", "db")
+    incident_ids = request.data.get("incident_ids")
+    unit_ids = request.data.get("unit_ids")
+    max_distance_km = request.data.get("max_distance_km")
+    try:
+        max_distance_km = float(max_distance_km) if max_distance_km is not None else None
+    except (TypeError, ValueError):
+        return Response({"detail": "max_distance_km must be a number."}, status=status.HTTP_400_BAD_REQUEST)
+    for name, ids in (("incident_ids", incident_ids), ("unit_ids", unit_ids)):
+        if ids is not None and not (
+            isinstance(ids, list) and all(isinstance(v, int) and not isinstance(v, bool) for v in ids)
+        ):
+            return Response({"detail": f"{name} must be a list of integer ids."}, status=status.HTTP_400_BAD_REQUEST)
+
+    if source == "mock":
+        mock_service = get_mock_service()
+        incidents = [i for i in mock_service.get_incidents() if i["status"] != "CLOSED"]
+        units = [u for u in mock_service.get_units() if u["status"] == "Available"]
+    elif source == "db":
+        fields = ("id", "location_lat", "location_lng")
+        incidents = list(
+            Incident.objects.exclude(status=Incident.Status.CLOSED).values(*fields, "severity")
+        )
+        units = list(Unit.objects.filter(availability_status="AVAILABLE").values(*fields, "type"))
+    else:
+        return Response({"detail": "source must be 'db' or 'mock'."}, status=status.HTTP_400_BAD_REQUEST)
+
+    if incident_ids is not None:
+        wanted = set(incident_ids)
+        incidents = [i for i in incidents if i["id"] in wanted]
+    if unit_ids is not None:
+        wanted = set(unit_ids)
+        units = [u for u in units if u["id"] in wanted]
+    return Response(recommend_dispatch(incidents, units, max_distance_km=max_distance_km))
 
 
 # Mock Data API Endpoints (for dashboard demo)
@@ -75,6 +424,28 @@ def mock_units(request):
     return Response(mock_service.get_units())
 
 
+@api_view(["GET"])
+def mock_unit_track(request, unit_id):
+    """Get a mock unit's position history (see ``_unit_track``)."""
+    if unit_id not in {unit["id"] for unit in get_mock_service().get_units()}:
+        return Response({"detail": "Unit not found"}, status=status.HTTP_404_NOT_FOUND)
+    return _unit_track(get_track_store("mock"), unit_id, request.query_params)
+
+
+@api_view(["GET"])
+def mock_units_playback(request):
+    """Get every mock unit's position at fixed steps (see ``_unit_playback``)."""
+    get_mock_service()
+    return _unit_playback(get_track_store("mock"), request.query_params)
+
+
+@api_view(["GET"])
+def mock_map_clusters(request):
+    """Get mock incident and unit clusters for a map viewport (see ``_map_clusters``)."""
+    get_mock_service()
+    return _map_clusters(get_clusters("mock"), request.query_params)
+
+
 @api_view(["GET"])
 def mock_events(request):
     """Get mock event log for dashboard."""
@@ -161,45 +532,14 @@ def mock_simulate_update(request):
     return Response(update or {})
 
 
-# Server-Sent Events endpoint for real-time updates
-def mock_updates_stream(request):
-    """Stream real-time updates using Server-Sent Events."""
-    mock_service = get_mock_service()
-    realtime_service = get_realtime_service()
-    
-    def event_generator():
-        # Send initial connection message
-        yield f"data: {json.dumps({'type': 'connected', 'timestamp': time.time()})}\n\n"
-        
-        # Queue for events
-        events_queue = []
-        
-        def on_event(event):
-            events_queue.append(event)
-        
-        # Subscribe to updates
-        unsubscribe = realtime_service.subscribe(on_event)
-        
-        # Keep connection alive and send events
-        try:
-            last_heartbeat = time.time()
-            while True:
-                # Send queued events
-                while events_queue:
-                    event = events_queue.pop(0)
-                    yield f"data: {json.dumps(event)}\n\n"
-                
-                # Send heartbeat every 10 seconds
-                if time.time() - last_heartbeat > 10:
-                    yield f"data: {json.dumps({'type': 'heartbeat'})}\n\n"
-                    last_heartbeat = time.time()
-                
-                time.sleep(0.1)
-        finally:
-            unsubscribe()
-    
+# Server-Sent Events helpers shared by the regional and field streams
+def _sse_message(event):
+    return f"data: {json.dumps(event)}\n\n"
+
+
+def _sse_response(stream):
     response = StreamingHttpResponse(
-        event_generator(),
+        stream,
         content_type="text/event-stream"
     )
     response["Cache-Control"] = "no-cache"
@@ -207,224 +547,336 @@ def mock_updates_stream(request):
     return response
 
 
+def _last_event_id(request):
+    """Id of the event the client last received, from the SSE header or query string."""
+    value = request.headers.get("Last-Event-ID") or request.GET.get("last_event_id")
+    return value.strip() if value else None
+
+
+def _sse_events(realtime_service, last_event_id=None):
+    """Blocking SSE generator; holds one worker thread per connection (WSGI)."""
+    # Send initial connection message
+    yield _sse_message({'type': 'connected', 'timestamp': time.time()})
+    
+    # Bounded per-client queue, pre-filled with any frames missed since last_event_id
+    subscription = realtime_service.subscribe(last_event_id=last_event_id)
+    heartbeat_interval = settings.REALTIME_HEARTBEAT_INTERVAL
+    
+    try:
+        if subscription.snapshot_frame is not None:
+            yield subscription.snapshot_frame
+        if subscription.resync_required:
+            yield _sse_message({'type': 'resync', 'last_event_id': realtime_service.event_log.last_event_id})
+        last_sent = time.time()
+        while not subscription.closed:
+            timeout = max(0.0, heartbeat_interval - (time.time() - last_sent))
+            frame = subscription.get(timeout=timeout)
+            if frame is not None:
+                yield frame
+                last_sent = time.time()
+            elif time.time() - last_sent >= heartbeat_interval:
+                yield _sse_message({'type': 'heartbeat'})
+                last_sent = time.time()
+    finally:
+        subscription.close()
+
+
+async def _sse_events_async(realtime_service, last_event_id=None):
+    """Async SSE generator; an idle connection costs a coroutine, not a thread (ASGI)."""
+    yield _sse_message({'type': 'connected', 'timestamp': time.time()})
+    
+    subscription = realtime_service.subscribe_async(last_event_id=last_event_id)
+    heartbeat_interval = settings.REALTIME_HEARTBEAT_INTERVAL
+    
+    try:
+        if subscription.snapshot_frame is not None:
+            yield subscription.snapshot_frame
+        if subscription.resync_required:
+            yield _sse_message({'type': 'resync', 'last_event_id': realtime_service.event_log.last_event_id})
+        last_sent = time.time()
+        while not subscription.closed:
+            timeout = max(0.0, heartbeat_interval - (time.time() - last_sent))
+            frame = await subscription.get(timeout=timeout)
+            if frame is not None:
+                yield frame
+                last_sent = time.time()
+            elif time.time() - last_sent >= heartbeat_interval:
+                yield _sse_message({'type': 'heartbeat'})
+                last_sent = time.time()
+    finally:
+        subscription.close()
+
+
+# Server-Sent Events endpoint for real-time updates
+def mock_updates_stream(request):
+    """Stream real-time updates using Server-Sent Events (snapshot, then deltas)."""
+    get_mock_service()  # wires the mock data deltas into the stream
+    return _sse_response(_sse_events(get_realtime_service(), _last_event_id(request)))
+
+
+async def mock_updates_stream_async(request):
+    """Stream real-time updates using Server-Sent Events (ASGI)."""
+    get_mock_service()  # wires the mock data deltas into the stream
+    return _sse_response(_sse_events_async(get_realtime_service(), _last_event_id(request)))
+
+
 # ============================================
 # FIELD INCIDENT COMMAND DASHBOARD ENDPOINTS
 # ============================================
 
-# Global field incident instance (mock data)
-_field_incident_data = None
+def _no_major_incident(incident_id):
+    if incident_id is None:
+        return Response({"detail": "No major incident active"}, status=status.HTTP_404_NOT_FOUND)
+    return Response({"detail": "Major incident not found"}, status=status.HTTP_404_NOT_FOUND)
+
+
+@api_view(["GET", "POST"])
+def field_incidents(request):
+    """List major incidents (``?status=ACTIVE``), or declare a new one from a demo template."""
+    if request.method == "POST":
+        try:
+            location = {
+                name: float(request.data[name]) for name in ("location_lat", "location_lng") if name in request.data
+            }
+            state = get_field_store().declare(request.data.get("incident_type", "EARTHQUAKE"), **location)
+        except (TypeError, ValueError) as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(state, status=status.HTTP_201_CREATED)
+    
+    qs = filter_choices(MajorIncident.objects.order_by("id"), request.query_params, status="status", type="incident_type")
+    return Response({
+        "major_incidents": list(qs.values("id", *MAJOR_INCIDENT_FIELDS, "created_at", "updated_at")),
+    })
 
 
 @api_view(["GET"])
-def field_incident_detail(request):
-    """Get current major incident with all sectors and task groups."""
-    global _field_incident_data
-    
-    if _field_incident_data is None:
-        seed = int(os.getenv("DEMO_SEED", "42"))
-        field_service = get_field_incident_service(seed=seed)
-        _field_incident_data = field_service.generate_major_incident(incident_type="EARTHQUAKE")
-    
-    return Response(_field_incident_data)
+def field_incident_detail(request, incident_id=None):
+    """Get a major incident (default: the oldest active one) with all sectors and task groups."""
+    state = get_field_store().get(incident_id, create=incident_id is None)
+    if state is None:
+        return _no_major_incident(incident_id)
+    return Response(state)
 
 
 @api_view(["GET"])
-def field_incident_sectors(request):
-    """Get all sectors for current major incident."""
-    global _field_incident_data
-    
-    if _field_incident_data is None:
-        return Response({"detail": "No major incident active"}, status=status.HTTP_404_NOT_FOUND)
+def field_incident_sectors(request, incident_id=None):
+    """Get all sectors for a major incident."""
+    state = get_field_store().get(incident_id)
+    if state is None:
+        return _no_major_incident(incident_id)
     
     return Response({
-        "sectors": _field_incident_data.get("sectors", []),
-        "major_incident": _field_incident_data.get("major_incident", {})
+        "sectors": state["sectors"],
+        "major_incident": state["major_incident"],
     })
 
 
 @api_view(["GET"])
-def field_incident_task_groups(request):
-    """Get all task groups for current major incident."""
-    global _field_incident_data
-    
-    if _field_incident_data is None:
-        return Response({"detail": "No major incident active"}, status=status.HTTP_404_NOT_FOUND)
+def field_incident_task_groups(request, incident_id=None):
+    """Get all task groups for a major incident."""
+    state = get_field_store().get(incident_id)
+    if state is None:
+        return _no_major_incident(incident_id)
     
     return Response({
-        "task_groups": _field_incident_data.get("task_groups", []),
+        "task_groups": state["task_groups"],
     })
 
 
 @api_view(["GET"])
-def field_incident_events(request):
-    """Get operational timeline events."""
-    global _field_incident_data
-    
-    if _field_incident_data is None:
-        return Response({"detail": "No major incident active"}, status=status.HTTP_404_NOT_FOUND)
-    
-    return Response({
-        "events": _field_incident_data.get("events", []),
-    })
+def field_incident_events(request, incident_id=None):
+    """
+    Get one page of the operational timeline, newest first.
+    
+    Query params: ``before`` / ``after`` (ISO timestamp, or a ``next_before`` /
+    ``next_after`` cursor from a previous page), ``severity`` and ``type``
+    (comma lists) and ``limit``.
+    """
+    params = request.query_params
+    try:
+        before = parse_timeline_cursor(params["before"]) if params.get("before") else None
+        after = parse_timeline_cursor(params["after"]) if params.get("after") else None
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(int(params.get("limit", settings.FIELD_TIMELINE_PAGE_SIZE)), settings.FIELD_TIMELINE_MAX_PAGE_SIZE)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        return Response({"detail": "limit must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+    
+    page = get_field_store().timeline(
+        incident_id,
+        before=before,
+        after=after,
+        severity=[v for v in params.get("severity", "").split(",") if v],
+        event_type=[v for v in params.get("type", "").split(",") if v],
+        limit=limit,
+    )
+    if page is None:
+        return _no_major_incident(incident_id)
+    return Response(page)
+
+
+@api_view(["GET"])
+def field_incident_history(request, incident_id=None):
+    """
+    Get casualty, displaced, survivor and hazard history for charts.
+    
+    Query params: ``start`` / ``end`` (ISO timestamps, default the last hour),
+    ``metric`` and ``sector`` (comma lists; default all) and ``resolution``
+    (bucket seconds; default the finest tier holding the whole range).
+    Hazard levels are charted as 1 (LOW) to 4 (CRITICAL).
+    """
+    params = request.query_params
+    try:
+        end = parse_history_time(params["end"]) if params.get("end") else timezone.now()
+        start = parse_history_time(params["start"]) if params.get("start") else end - timedelta(hours=1)
+        try:
+            sectors = [int(v) for v in params["sector"].split(",") if v] if params.get("sector") else None
+            resolution = int(params["resolution"]) if params.get("resolution") else None
+        except ValueError:
+            raise ValueError("sector and resolution must be integers.")
+        history = get_field_store().history(
+            incident_id,
+            start,
+            end,
+            metrics=[v for v in params.get("metric", "").split(",") if v],
+            sector_ids=sectors,
+            resolution=resolution,
+        )
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    if history is None:
+        return _no_major_incident(incident_id)
+    return Response(history)
 
 
 @api_view(["PATCH"])
-def field_incident_sector_update(request, sector_id):
-    """Update sector hazard level and status."""
-    global _field_incident_data
-    
-    if _field_incident_data is None:
-        return Response({"detail": "No major incident active"}, status=status.HTTP_404_NOT_FOUND)
+def field_incident_sector_update(request, sector_id, incident_id=None):
+    """Update sector hazard level and status; ``sector_id`` is the sector's id."""
+    store = get_field_store()
+    state = store.get(incident_id)
+    if state is None:
+        return _no_major_incident(incident_id)
+    try:
+        changes = clean_changes(Sector, request.data, SECTOR_EDITABLE)
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
     
-    sectors = _field_incident_data.get("sectors", [])
-    if sector_id >= len(sectors):
+    incident_id = state["major_incident"]["id"]
+    sector = store.update_sector(incident_id, sector_id, changes)
+    if sector is None:
         return Response({"detail": "Sector not found"}, status=status.HTTP_404_NOT_FOUND)
-    
-    sector = sectors[sector_id]
-    
-    # Update fields if provided
-    if "hazard_level" in request.data:
-        sector["hazard_level"] = request.data["hazard_level"]
-    if "status" in request.data:
-        sector["status"] = request.data["status"]
-    if "estimated_survivors" in request.data:
-        sector["estimated_survivors"] = request.data["estimated_survivors"]
-    
+    poke_field_feed()
     return Response(sector)
 
 
 @api_view(["PATCH"])
-def field_incident_task_group_update(request, task_group_id):
-    """Update task group progress and status."""
-    global _field_incident_data
-    
-    if _field_incident_data is None:
-        return Response({"detail": "No major incident active"}, status=status.HTTP_404_NOT_FOUND)
+def field_incident_task_group_update(request, task_group_id, incident_id=None):
+    """
+    Update task group progress and status; ``task_group_id`` is the task group's id.
+
+    The change and its sectors' new rollups are pushed to the incident's stream.
+    """
+    store = get_field_store()
+    state = store.get(incident_id)
+    if state is None:
+        return _no_major_incident(incident_id)
+    try:
+        changes = clean_changes(TaskGroup, request.data, TASK_GROUP_EDITABLE)
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
     
-    task_groups = _field_incident_data.get("task_groups", [])
-    if task_group_id >= len(task_groups):
+    incident_id = state["major_incident"]["id"]
+    updated = store.update_task_group(incident_id, task_group_id, changes)
+    if updated is None:
         return Response({"detail": "Task group not found"}, status=status.HTTP_404_NOT_FOUND)
-    
-    task_group = task_groups[task_group_id]
-    
-    # Update fields if provided
-    if "progress_percent" in request.data:
-        task_group["progress_percent"] = request.data["progress_percent"]
-    if "status" in request.data:
-        task_group["status"] = request.data["status"]
-    if "completed_subtasks" in request.data:
-        task_group["completed_subtasks"] = request.data["completed_subtasks"]
-    if "notes" in request.data:
-        task_group["notes"] = request.data["notes"]
-    
+    task_group, _ = updated
+    poke_field_feed()
     return Response(task_group)
 
 
 @api_view(["PATCH"])
-def field_incident_casualty_update(request):
-    """Update casualty estimates for major incident."""
-    global _field_incident_data
-    
-    if _field_incident_data is None:
-        return Response({"detail": "No major incident active"}, status=status.HTTP_404_NOT_FOUND)
-    
-    major_incident = _field_incident_data.get("major_incident", {})
-    
-    if "estimated_casualties" in request.data:
-        major_incident["estimated_casualties"] = request.data["estimated_casualties"]
-    if "confirmed_deaths" in request.data:
-        major_incident["confirmed_deaths"] = request.data["confirmed_deaths"]
-    if "displaced_persons" in request.data:
-        major_incident["displaced_persons"] = request.data["displaced_persons"]
-    
+def field_incident_casualty_update(request, incident_id=None):
+    """Update casualty estimates for a major incident."""
+    try:
+        changes = clean_changes(MajorIncident, request.data, CASUALTY_EDITABLE)
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    major_incident = get_field_store().update_casualties(incident_id, changes)
+    if major_incident is None:
+        return _no_major_incident(incident_id)
+    poke_field_feed()
     return Response(major_incident)
 
 
 @api_view(["POST"])
-def field_incident_add_event(request):
-    """Add event to operational timeline."""
-    global _field_incident_data
-    
-    if _field_incident_data is None:
-        return Response({"detail": "No major incident active"}, status=status.HTTP_404_NOT_FOUND)
-    
-    events = _field_incident_data.get("events", [])
-    
-    event = {
+def field_incident_add_event(request, incident_id=None):
+    """Add event to a major incident's operational timeline."""
+    data = {
         "event_type": request.data.get("event_type", "UPDATE"),
         "severity": request.data.get("severity", "INFO"),
         "title": request.data.get("title", "Event"),
         "description": request.data.get("description", ""),
         "created_by": request.data.get("created_by", "User"),
-        "created_at": time.time(),
     }
-    
-    events.insert(0, event)  # Add to beginning of list
+    try:
+        event = clean_changes(IncidentEvent, data, EVENT_FIELDS)
+    except ValueError as exc:
+        return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+    
+    event = get_field_store().add_event(incident_id, event)
+    if event is None:
+        return _no_major_incident(incident_id)
+    poke_field_feed()
     return Response(event)
 
 
 @api_view(["GET"])
-def field_incident_simulate(request):
-    """Simulate realistic updates to the field incident."""
-    global _field_incident_data
-    
-    if _field_incident_data is None:
-        import os
-        seed = int(os.getenv("DEMO_SEED", "42"))
-        field_service = get_field_incident_service(seed=seed)
-        _field_incident_data = field_service.generate_major_incident(incident_type="EARTHQUAKE")
-    
-    # Get service and simulate update
-    field_service = get_field_incident_service()
-    update = field_service.simulate_update(_field_incident_data)
-    
-    # Apply updates to data
-    if "estimated_casualties" in update:
-        _field_incident_data["major_incident"]["estimated_casualties"] = update["estimated_casualties"]
-    
-    if "sector_updates" in update:
-        for idx, sector_update in update["sector_updates"].items():
-            _field_incident_data["sectors"][idx].update(sector_update)
-    
-    if "task_updates" in update:
-        for idx, task_update in update["task_updates"].items():
-            _field_incident_data["task_groups"][idx].update(task_update)
-    
-    if "new_event" in update:
-        update["new_event"]["created_at"] = time.time()
-        _field_incident_data["events"].insert(0, update["new_event"])
-    
-    return Response(update if update else {"status": "no_change"})
+def field_incident_simulate(request, incident_id=None):
+    """Simulate realistic updates to a major incident."""
+    update = get_field_store().simulate(incident_id, create=incident_id is None)
+    if update is None:
+        return _no_major_incident(incident_id)
+    if update.get("status") != "no_change":
+        poke_field_feed()
+    return Response(update)
 
 
-def field_incident_updates_stream(request):
-    """Stream real-time field incident updates using Server-Sent Events."""
-    def event_generator():
-        yield f"data: {json.dumps({'type': 'connected', 'timestamp': time.time()})}\n\n"
-        
-        try:
-            last_heartbeat = time.time()
-            while True:
-                # Simulate update every 2-4 seconds
-                if random.random() < 0.3:
-                    field_service = get_field_incident_service()
-                    update = field_service.simulate_update(_field_incident_data or {})
-                    if update.get("status") != "no_change":
-                        yield f"data: {json.dumps({'type': 'incident_update', 'data': update})}\n\n"
-                
-                # Heartbeat every 10 seconds
-                if time.time() - last_heartbeat > 10:
-                    yield f"data: {json.dumps({'type': 'heartbeat'})}\n\n"
-                    last_heartbeat = time.time()
-                
-                time.sleep(1)
-        except GeneratorExit:
-            pass
-    
-    response = StreamingHttpResponse(
-        event_generator(),
-        content_type="text/event-stream"
-    )
-    response["Cache-Control"] = "no-cache"
-    response["X-Accel-Buffering"] = "no"
-    return response
+def _field_realtime_service(incident_id=None):
+    """Field stream hub (all incidents, or one), fed by this process's change feed."""
+    get_field_feed()
+    if incident_id is None:
+        return get_realtime_service("field")
+    return get_realtime_service(field_stream_name(incident_id))
+
+
+def _field_stream_incident(request, incident_id):
+    """Incident the stream is filtered to, from the URL or ``?incident=``; raises ValueError if malformed."""
+    if incident_id is None and request.GET.get("incident"):
+        incident_id = int(request.GET["incident"])
+    return incident_id
+
+
+def field_incident_updates_stream(request, incident_id=None):
+    """Stream real-time field incident updates (all incidents, or one) using Server-Sent Events."""
+    try:
+        incident_id = _field_stream_incident(request, incident_id)
+    except ValueError:
+        return JsonResponse({"detail": "incident must be an integer id."}, status=400)
+    if incident_id is not None and get_field_store().get(incident_id) is None:
+        return JsonResponse({"detail": "Major incident not found"}, status=404)
+    return _sse_response(_sse_events(_field_realtime_service(incident_id), _last_event_id(request)))
+
+
+async def field_incident_updates_stream_async(request, incident_id=None):
+    """Stream real-time field incident updates (all incidents, or one) using Server-Sent Events (ASGI)."""
+    try:
+        incident_id = _field_stream_incident(request, incident_id)
+    except ValueError:
+        return JsonResponse({"detail": "incident must be an integer id."}, status=400)
+    if incident_id is not None and await sync_to_async(get_field_store().get)(incident_id) is None:
+        return JsonResponse({"detail": "Major incident not found"}, status=404)
+    return _sse_response(_sse_events_async(_field_realtime_service(incident_id), _last_event_id(request)))
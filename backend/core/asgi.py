@@ -2,5 +2,7 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "core.settings")
+# Serve the realtime streams with the async SSE views under ASGI
+os.environ.setdefault("REALTIME_ASYNC_STREAMS", "1")
 
 application = get_asgi_application()
@@ -92,3 +92,79 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(hours=8),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
 }
+
+# External feed ingest. Run `python manage.py run_ingest` as a single dedicated
+# process; set POLLING_IN_PROCESS=1 to fall back to the in-process polling thread.
+POLLING_INTERVAL = int(os.environ.get("POLLING_INTERVAL", "5"))
+POLLING_IN_PROCESS = os.environ.get("POLLING_IN_PROCESS", "0") == "1"
+INGEST_MAX_INTERVAL = int(os.environ.get("INGEST_MAX_INTERVAL", "60"))
+INGEST_LOCK_FILE = Path(os.environ.get("INGEST_LOCK_FILE", BASE_DIR / "ingest.lock"))
+INGEST_METRICS_FILE = Path(os.environ.get("INGEST_METRICS_FILE", BASE_DIR / "ingest_metrics.json"))
+# Comma-separated connector names from external.connectors (mock, police_cad, ems, fire)
+INGEST_CONNECTORS = [c.strip() for c in os.environ.get("INGEST_CONNECTORS", "mock").split(",") if c.strip()]
+INGEST_FETCH_WORKERS = int(os.environ.get("INGEST_FETCH_WORKERS", "4"))
+
+# Real-time fan-out: per-client buffer size and what to do when a client falls
+# behind ("drop_oldest" keeps the connection, "disconnect" forces a reconnect).
+REALTIME_SUBSCRIBER_BUFFER = int(os.environ.get("REALTIME_SUBSCRIBER_BUFFER", "256"))
+REALTIME_SLOW_CONSUMER_POLICY = os.environ.get("REALTIME_SLOW_CONSUMER_POLICY", "drop_oldest")
+REALTIME_HEARTBEAT_INTERVAL = int(os.environ.get("REALTIME_HEARTBEAT_INTERVAL", "10"))
+# Recent events kept per stream for Last-Event-ID replay, and an optional
+# directory for their append-only on-disk log (one directory per process:
+# event ids are only valid in the process that issued them).
+REALTIME_EVENT_LOG_CAPACITY = int(os.environ.get("REALTIME_EVENT_LOG_CAPACITY", "1024"))
+REALTIME_EVENT_LOG_DIR = os.environ.get("REALTIME_EVENT_LOG_DIR") or None
+# Window for batching unit location updates into one frame (0 sends each immediately)
+REALTIME_COALESCE_WINDOW_MS = int(os.environ.get("REALTIME_COALESCE_WINDOW_MS", "250"))
+# Set by core/asgi.py: use the async SSE stream views
+REALTIME_ASYNC_STREAMS = os.environ.get("REALTIME_ASYNC_STREAMS", "0") == "1"
+
+# Unit spatial index for nearest-unit queries: grid cell size in degrees, and
+# how often a web process catches up on units the ingest runner changed or deleted.
+SPATIAL_INDEX_CELL_DEGREES = float(os.environ.get("SPATIAL_INDEX_CELL_DEGREES", "0.05"))
+SPATIAL_INDEX_REFRESH_SECONDS = int(os.environ.get("SPATIAL_INDEX_REFRESH_SECONDS", "10"))
+
+# Delta sync (/api/sync/): how long deletions are remembered (older tokens must
+# resync from scratch) and how far each caught-up feed is re-read for late commits.
+SYNC_TOMBSTONE_RETENTION_DAYS = int(os.environ.get("SYNC_TOMBSTONE_RETENTION_DAYS", "30"))
+SYNC_OVERLAP_SECONDS = int(os.environ.get("SYNC_OVERLAP_SECONDS", "2"))
+
+# Batched offline writes (/api/batch/): operations per request and how long
+# applied operation ids are remembered for safe retries.
+BATCH_MAX_OPERATIONS = int(os.environ.get("BATCH_MAX_OPERATIONS", "500"))
+BATCH_OPERATION_RETENTION_DAYS = int(os.environ.get("BATCH_OPERATION_RETENTION_DAYS", "7"))
+
+# Field incident store: how often a process re-checks the database for other
+# workers' writes (0 checks on every read), and timeline entries kept in memory.
+FIELD_CACHE_REVALIDATE_SECONDS = float(os.environ.get("FIELD_CACHE_REVALIDATE_SECONDS", "1"))
+FIELD_TIMELINE_CACHE_SIZE = int(os.environ.get("FIELD_TIMELINE_CACHE_SIZE", "200"))
+# Timeline pages (default and largest ?limit=) and events kept per major incident (0 keeps all)
+FIELD_TIMELINE_PAGE_SIZE = int(os.environ.get("FIELD_TIMELINE_PAGE_SIZE", "50"))
+FIELD_TIMELINE_MAX_PAGE_SIZE = int(os.environ.get("FIELD_TIMELINE_MAX_PAGE_SIZE", "500"))
+FIELD_TIMELINE_RETENTION = int(os.environ.get("FIELD_TIMELINE_RETENTION", "10000"))
+# Demo simulation tick (run once, by `manage.py run_ingest`) and how often each
+# web process polls for field changes to stream.
+FIELD_SIMULATION_INTERVAL = float(os.environ.get("FIELD_SIMULATION_INTERVAL", "3"))
+FIELD_STREAM_POLL_SECONDS = float(os.environ.get("FIELD_STREAM_POLL_SECONDS", "1"))
+
+# Dashboard KPIs (/api/kpis/) are updated on every write in this process and
+# re-aggregated from the database (one GROUP BY per table) this often to pick
+# up other processes' writes.
+KPI_REFRESH_SECONDS = int(os.environ.get("KPI_REFRESH_SECONDS", "10"))
+
+# Field metric history, kept in memory per process: resolution_seconds:buckets
+# tiers (the most buckets per series; rings grow to it as samples arrive) and
+# the most series kept before the least recently written is dropped.
+TIMESERIES_TIERS = os.environ.get("TIMESERIES_TIERS", "1:900,60:1440,900:2880")
+TIMESERIES_MAX_SERIES = int(os.environ.get("TIMESERIES_MAX_SERIES", "500"))
+
+# Unit position history (utils.tracks): fixes kept per unit before the oldest
+# chunks are dropped (0 keeps all; delta-encoded fixes take ~6-12 bytes each).
+TRACK_MAX_FIXES_PER_UNIT = int(os.environ.get("TRACK_MAX_FIXES_PER_UNIT", "200000"))
+TRACK_PLAYBACK_MAX_FRAMES = int(os.environ.get("TRACK_PLAYBACK_MAX_FRAMES", "600"))
+# Stored database unit positions older than this are pruned (0 keeps all)
+TRACK_RETENTION_DAYS = int(os.environ.get("TRACK_RETENTION_DAYS", "7"))
+
+# Map clusters (/api/map/clusters/) are updated on every write in this process
+# and catch up on other processes' changes and deletions this often.
+CLUSTER_INDEX_REFRESH_SECONDS = int(os.environ.get("CLUSTER_INDEX_REFRESH_SECONDS", "5"))
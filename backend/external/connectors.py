@@ -0,0 +1,169 @@
+"""
+Pluggable external feed connectors.
+
+Each agency feed is a ``FeedConnector`` registered under a name. The ingest
+sync fetches every enabled connector concurrently on a bounded thread pool,
+gives each one its own timeout, and merges the results into one normalized
+batch for the bulk reconcile.
+"""
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from django.conf import settings
+
+from external.mock_api_client import fetch_mock_agency_events, fetch_mock_events
+
+logger = logging.getLogger(__name__)
+
+_registry = {}
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = {}
+
+
+class FeedConnector:
+    """Base class for an external incident/unit feed."""
+
+    name = None
+    timeout = 5.0
+
+    def fetch(self):
+        """Return a raw payload with ``incidents`` and ``units`` lists."""
+        raise NotImplementedError
+
+    def normalize(self, payload):
+        """Tag every record with its source; connectors may override to map fields."""
+        incidents = [dict(inc, source=self.name) for inc in payload.get("incidents", [])]
+        units = [dict(unit, source=self.name) for unit in payload.get("units", [])]
+        return {"incidents": incidents, "units": units}
+
+
+def register_connector(cls):
+    """Class decorator adding a connector to the registry under ``cls.name``."""
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} must define a name")
+    _registry[cls.name] = cls
+    return cls
+
+
+def get_connector(name):
+    return _registry[name]()
+
+
+def get_enabled_connectors():
+    """Instantiate the connectors listed in ``settings.INGEST_CONNECTORS``."""
+    connectors = []
+    for name in settings.INGEST_CONNECTORS:
+        if name not in _registry:
+            logger.warning("Unknown ingest connector %r ignored", name)
+            continue
+        connectors.append(get_connector(name))
+    return connectors
+
+
+@register_connector
+class MockFeedConnector(FeedConnector):
+    name = "mock"
+
+    def fetch(self):
+        return fetch_mock_events()
+
+
+class MockAgencyConnector(FeedConnector):
+    """Simulated agency dispatch feed."""
+
+    unit_type = None
+
+    def fetch(self):
+        return fetch_mock_agency_events(self.name, self.unit_type)
+
+
+@register_connector
+class PoliceCADConnector(MockAgencyConnector):
+    name = "police_cad"
+    unit_type = "Police"
+
+
+@register_connector
+class EMSConnector(MockAgencyConnector):
+    name = "ems"
+    unit_type = "EMS"
+
+
+@register_connector
+class FireConnector(MockAgencyConnector):
+    name = "fire"
+    unit_type = "Fire"
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=settings.INGEST_FETCH_WORKERS, thread_name_prefix="feed-connector"
+            )
+    return _executor
+
+
+def _timed_fetch(connector):
+    started = time.perf_counter()
+    payload = connector.normalize(connector.fetch())
+    return payload, (time.perf_counter() - started) * 1000
+
+
+def fetch_all_sources(connectors=None):
+    """
+    Fetch all connectors concurrently and merge them into one batch.
+
+    A connector that exceeds its timeout is reported as ``timeout`` and left
+    to finish in the background; it is skipped on later cycles until that
+    fetch returns, so one slow agency never holds up the others or piles up
+    threads.
+
+    Returns:
+        Tuple of the merged payload and a per-source report with status,
+        latency and record counts
+    """
+    connectors = get_enabled_connectors() if connectors is None else connectors
+    executor = _get_executor()
+
+    submitted = []
+    report = {}
+    for connector in connectors:
+        pending = _in_flight.get(connector.name)
+        if pending is not None and not pending.done():
+            report[connector.name] = {"status": "busy", "latency_ms": None}
+            continue
+        future = executor.submit(_timed_fetch, connector)
+        _in_flight[connector.name] = future
+        submitted.append((connector, future, time.perf_counter() + connector.timeout))
+
+    incidents = {}
+    units = {}
+    for connector, future, deadline in submitted:
+        try:
+            payload, latency_ms = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+        except FutureTimeoutError:
+            report[connector.name] = {"status": "timeout", "latency_ms": connector.timeout * 1000}
+            logger.warning("Connector %s timed out after %ss", connector.name, connector.timeout)
+            continue
+        except Exception as exc:
+            report[connector.name] = {"status": "error", "latency_ms": None, "error": str(exc)}
+            logger.exception("Connector %s failed", connector.name)
+            continue
+
+        for inc in payload["incidents"]:
+            incidents[inc.get("external_id") or ("title", inc["title"])] = inc
+        for unit in payload["units"]:
+            units[unit.get("external_id") or ("name", unit["name"])] = unit
+        report[connector.name] = {
+            "status": "ok",
+            "latency_ms": round(latency_ms, 2),
+            "incidents": len(payload["incidents"]),
+            "units": len(payload["units"]),
+        }
+
+    return {"incidents": list(incidents.values()), "units": list(units.values())}, report
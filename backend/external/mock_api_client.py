@@ -21,6 +21,7 @@ def fetch_mock_events():
     ]
     units = [
         {
+            "external_id": f"unit-{now % 100}-{i}",
             "name": f"Unit-{now % 100}-{i}",
             "type": random.choice(UNIT_TYPES),
             "location_lat": 32.5 + random.random(),
@@ -30,3 +31,32 @@ def fetch_mock_events():
         for i in range(1, 3)
     ]
     return {"incidents": incidents, "units": units}
+
+
+def fetch_mock_agency_events(agency, unit_type):
+    """Simulated single-agency feed (police CAD, EMS, fire) with its own id space."""
+    time.sleep(random.uniform(0.05, 0.3))
+    incidents = [
+        {
+            "external_id": f"{agency}-inc-{i}",
+            "title": f"{agency.upper()} Incident {i}",
+            "description": f"Reported via {agency} feed",
+            "location_lat": 32.0 + random.random(),
+            "location_lng": 34.0 + random.random(),
+            "severity": random.choice(SEVERITIES),
+            "status": random.choice(["OPEN", "IN_PROGRESS"]),
+        }
+        for i in range(1, 3)
+    ]
+    units = [
+        {
+            "external_id": f"{agency}-unit-{i}",
+            "name": f"{unit_type}-{agency}-{i}",
+            "type": unit_type,
+            "location_lat": 32.5 + random.random(),
+            "location_lng": 34.5 + random.random(),
+            "availability_status": random.choice(["AVAILABLE", "BUSY"]),
+        }
+        for i in range(1, 6)
+    ]
+    return {"incidents": incidents, "units": units}
@@ -0,0 +1,336 @@
+"""
+In-memory map clustering for incidents and units.
+
+Points are projected to Web Mercator and counted into one grid per zoom
+level, with cells of 1/``CELLS_PER_TILE`` of a map tile (64 px). Each cell
+keeps its point count, coordinate sums (for the centroid), counts per
+dimension value (e.g. severity and status) and its member ids. A point
+update adjusts one cell per level, so the index stays current without
+rebuilding.
+
+A viewport query reads only the cells of its zoom level that intersect the
+bounding box. The response size is therefore bounded by the viewport (about
+one cluster per 64 x 64 px), however many points exist. Single-point cells
+come back as the point itself, and zooms past ``MAX_ZOOM`` return every
+point in view.
+"""
+import math
+import threading
+import time
+from datetime import timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+MAX_ZOOM = 16
+CELLS_PER_TILE = 4
+MAX_LAT = 85.05112878
+# Re-read this far back on each catch-up, for rows committed late by slower writers
+CATCH_UP_OVERLAP = timedelta(seconds=2)
+
+
+def _field(record, name):
+    return record.get(name) if isinstance(record, dict) else getattr(record, name)
+
+
+def _pk(record):
+    return record["id"] if isinstance(record, dict) else record.pk
+
+
+def project(lat: float, lng: float) -> Tuple[float, float]:
+    """Web Mercator position in [0, 1) x [0, 1), y growing southwards."""
+    lat = max(-MAX_LAT, min(MAX_LAT, lat))
+    x = (lng + 180.0) / 360.0
+    sin = math.sin(math.radians(lat))
+    y = 0.5 - math.log((1 + sin) / (1 - sin)) / (4 * math.pi)
+    return min(max(x, 0.0), 1 - 1e-12), min(max(y, 0.0), 1 - 1e-12)
+
+
+class _Cell:
+    """Aggregate of the points in one grid cell, created from its first point."""
+
+    __slots__ = ("count", "lat", "lng", "breakdown", "members")
+
+    def __init__(self, pk, lat, lng, slots):
+        self.count = 1
+        self.lat = lat
+        self.lng = lng
+        # (dimension index, value) -> count
+        self.breakdown = dict.fromkeys(slots, 1)
+        self.members = {pk}
+
+
+class ClusterIndex:
+    """
+    Hierarchical grid of one kind of point.
+
+    ``dims`` maps output dimension names to record fields, e.g.
+    ``{"type": "type", "status": "availability_status"}``; ``label`` is the
+    record field shown for single points.
+    """
+
+    def __init__(self, dims: Dict[str, str], label: str, max_zoom: int = MAX_ZOOM):
+        self.dims = tuple(dims)
+        self.fields = tuple(dims.values())
+        self.label = label
+        self.max_zoom = max_zoom
+        self._levels: List[Dict[Tuple[int, int], _Cell]] = [{} for _ in range(max_zoom + 1)]
+        # pk -> (lat, lng, dimension values, label, cell at max_zoom)
+        self._points = {}
+
+    def __len__(self):
+        return len(self._points)
+
+    def upsert_record(self, record):
+        """Insert or move a record (dict or model instance) with ``location_lat`` / ``location_lng``."""
+        self.upsert(
+            _pk(record),
+            _field(record, "location_lat"),
+            _field(record, "location_lng"),
+            tuple(_field(record, name) for name in self.fields),
+            _field(record, self.label),
+        )
+
+    def patch(self, pk, changes: dict):
+        """Apply changed record fields to a known point; unknown points are ignored."""
+        point = self._points.get(pk)
+        if point is None:
+            return
+        lat, lng, values, label, _ = point
+        self.upsert(
+            pk,
+            changes.get("location_lat", lat),
+            changes.get("location_lng", lng),
+            tuple(changes.get(name, values[i]) for i, name in enumerate(self.fields)),
+            changes.get(self.label, label),
+        )
+
+    def upsert(self, pk, lat: float, lng: float, values: tuple, label=None):
+        if lat is None or lng is None:
+            self.remove(pk)
+            return
+        x, y = project(lat, lng)
+        # Cell at the finest level; each coarser level halves it
+        scale = (1 << self.max_zoom) * CELLS_PER_TILE
+        cx, cy = int(x * scale), int(y * scale)
+        old = self._points.get(pk)
+        if old is None:
+            for shift, level in enumerate(reversed(self._levels)):
+                self._enter(level, (cx >> shift, cy >> shift), pk, lat, lng, values)
+        elif old[2] != values:
+            self._discard(pk, old)
+            for shift, level in enumerate(reversed(self._levels)):
+                self._enter(level, (cx >> shift, cy >> shift), pk, lat, lng, values)
+        elif old[:2] != (lat, lng):
+            # Moves usually stay in the same coarse cells, which only shift their centroid
+            old_lat, old_lng, _, _, (ox, oy) = old
+            for shift, level in enumerate(reversed(self._levels)):
+                key = (cx >> shift, cy >> shift)
+                previous = (ox >> shift, oy >> shift)
+                if key == previous:
+                    cell = level[key]
+                    cell.lat += lat - old_lat
+                    cell.lng += lng - old_lng
+                else:
+                    self._leave(level, previous, pk, old_lat, old_lng, values)
+                    self._enter(level, key, pk, lat, lng, values)
+        self._points[pk] = (lat, lng, values, label, (cx, cy))
+
+    def remove(self, pk):
+        old = self._points.get(pk)
+        if old is not None:
+            self._discard(pk, old)
+            del self._points[pk]
+
+    def _discard(self, pk, point):
+        lat, lng, values, _, (cx, cy) = point
+        for shift, level in enumerate(reversed(self._levels)):
+            self._leave(level, (cx >> shift, cy >> shift), pk, lat, lng, values)
+
+    @staticmethod
+    def _enter(level, key, pk, lat, lng, values):
+        cell = level.get(key)
+        if cell is None:
+            level[key] = _Cell(pk, lat, lng, enumerate(values))
+            return
+        cell.count += 1
+        cell.lat += lat
+        cell.lng += lng
+        breakdown = cell.breakdown
+        for slot in enumerate(values):
+            breakdown[slot] = breakdown.get(slot, 0) + 1
+        cell.members.add(pk)
+
+    @staticmethod
+    def _leave(level, key, pk, lat, lng, values):
+        cell = level[key]
+        cell.count -= 1
+        if not cell.count:
+            del level[key]
+            return
+        cell.lat -= lat
+        cell.lng -= lng
+        breakdown = cell.breakdown
+        for slot in enumerate(values):
+            breakdown[slot] -= 1
+            if not breakdown[slot]:
+                del breakdown[slot]
+        cell.members.discard(pk)
+
+    def _point(self, pk):
+        lat, lng, values, label, _ = self._points[pk]
+        return {"id": pk, "count": 1, "lat": lat, "lng": lng, "label": label, **dict(zip(self.dims, values))}
+
+    def query(self, bbox: Tuple[float, float, float, float], zoom: int) -> List[dict]:
+        """
+        Clusters and single points in ``(min_lat, min_lng, max_lat, max_lng)`` at ``zoom``.
+
+        Clusters are ``{"count", "lat", "lng", "by_<dim>": {value: count}}`` with
+        the centroid of their points; single points carry their ``id``,
+        ``label`` and dimension values instead. Clusters on the edge of the
+        box are returned whole, so they may count points just outside it.
+        """
+        min_lat, min_lng, max_lat, max_lng = bbox
+        expand = zoom > self.max_zoom
+        zoom = min(max(int(zoom), 0), self.max_zoom)
+        level = self._levels[zoom]
+        scale = (1 << zoom) * CELLS_PER_TILE
+        west, north = project(max_lat, min_lng)
+        east, south = project(min_lat, max_lng)
+        x0, x1 = int(west * scale), int(east * scale)
+        y0, y1 = int(north * scale), int(south * scale)
+        if (x1 - x0 + 1) * (y1 - y0 + 1) <= len(level):
+            cells = (
+                ((x, y), level[(x, y)])
+                for x in range(x0, x1 + 1)
+                for y in range(y0, y1 + 1)
+                if (x, y) in level
+            )
+        else:
+            cells = ((key, cell) for key, cell in level.items() if x0 <= key[0] <= x1 and y0 <= key[1] <= y1)
+
+        results = []
+        for _, cell in cells:
+            if cell.count == 1 or expand:
+                for pk in cell.members:
+                    lat, lng = self._points[pk][:2]
+                    # Edge cells reach past the box; points must be inside it
+                    if min_lat <= lat <= max_lat and min_lng <= lng <= max_lng:
+                        results.append(self._point(pk))
+                continue
+            cluster = {"count": cell.count, "lat": cell.lat / cell.count, "lng": cell.lng / cell.count}
+            for i, dim in enumerate(self.dims):
+                cluster[f"by_{dim}"] = {}
+            for (i, value), count in cell.breakdown.items():
+                cluster[f"by_{self.dims[i]}"][value] = count
+            results.append(cluster)
+        return results
+
+
+class ClusterLayers:
+    """The ``incidents`` and ``units`` indexes of one data source, behind one lock."""
+
+    def __init__(self, units_status_field: str):
+        self.lock = threading.Lock()
+        self.layers = {
+            "incidents": ClusterIndex({"severity": "severity", "status": "status"}, "title"),
+            "units": ClusterIndex({"type": "type", "status": units_status_field}, "name"),
+        }
+        self.loaded_at = None
+        self.synced_at = None
+
+    def track(self, layer: str, records: Iterable):
+        with self.lock:
+            index = self.layers[layer]
+            for record in records:
+                index.upsert_record(record)
+
+    def untrack(self, layer: str, pk):
+        with self.lock:
+            self.layers[layer].remove(pk)
+
+    def on_mock_delta(self, delta, coalesce_key=None):
+        """``MockDataService`` listener: creates carry the full record, updates the changed fields."""
+        layer = {"incident": "incidents", "unit": "units"}.get(delta["e"])
+        if layer is None:
+            return
+        with self.lock:
+            if delta.get("op") == "create":
+                self.layers[layer].upsert_record(delta["c"])
+            else:
+                self.layers[layer].patch(delta["id"], delta["c"])
+
+    def query(self, bbox, zoom, layers: Iterable[str] = ("incidents", "units")) -> Dict:
+        with self.lock:
+            return {layer: self.layers[layer].query(bbox, zoom) for layer in layers}
+
+    def sync_from_db(self):
+        """Load everything on first use, then only rows changed or deleted since the last sync."""
+        from django.utils import timezone
+
+        from api.models import Incident, Tombstone, Unit
+
+        started = timezone.now()
+        since = self.synced_at - CATCH_UP_OVERLAP if self.synced_at is not None else None
+        for layer, model in (("incidents", Incident), ("units", Unit)):
+            index = self.layers[layer]
+            rows = model.objects.all()
+            if since is not None:
+                rows = rows.filter(updated_at__gte=since)
+            fields = ("id", "location_lat", "location_lng", index.label, *index.fields)
+            self.track(layer, rows.values(*fields))
+            if since is not None:
+                deleted = Tombstone.objects.filter(entity=model._meta.model_name, deleted_at__gte=since)
+                for pk in deleted.values_list("object_id", flat=True):
+                    self.untrack(layer, pk)
+        self.synced_at = started
+        self.loaded_at = time.monotonic()
+
+
+# Sources: "db" (database incidents and units) and "mock" (demo data)
+_clusters: Dict[str, ClusterLayers] = {}
+_clusters_lock = threading.Lock()
+
+
+def get_clusters(source: str = "db", refresh: bool = True) -> Optional[ClusterLayers]:
+    """
+    Cluster index of a data source.
+
+    ``mock`` is created empty and fed by the mock service. ``db`` is loaded
+    on first use and then catches up on other processes' writes once older
+    than ``CLUSTER_INDEX_REFRESH_SECONDS``; with ``refresh=False`` it is
+    returned as-is (None if never loaded).
+    """
+    if source == "mock":
+        with _clusters_lock:
+            if "mock" not in _clusters:
+                _clusters["mock"] = ClusterLayers("status")
+            return _clusters["mock"]
+
+    layers = _clusters.get("db")
+    if not refresh:
+        return layers
+
+    from django.conf import settings
+
+    max_age = settings.CLUSTER_INDEX_REFRESH_SECONDS
+    if layers is not None and (not max_age or time.monotonic() - layers.loaded_at < max_age):
+        return layers
+    with _clusters_lock:
+        layers = _clusters.get("db") or ClusterLayers("availability_status")
+        if layers.loaded_at is None or (max_age and time.monotonic() - layers.loaded_at >= max_age):
+            layers.sync_from_db()
+            _clusters["db"] = layers
+    return layers
+
+
+def cluster_records(layer: str, records: Iterable):
+    """Apply saved incidents or units to the database clusters if this process has loaded them."""
+    layers = get_clusters("db", refresh=False)
+    if layers is not None:
+        layers.track(layer, records)
+
+
+def uncluster_record(layer: str, pk):
+    """Drop a deleted incident or unit from the database clusters if this process has loaded them."""
+    layers = get_clusters("db", refresh=False)
+    if layers is not None:
+        layers.untrack(layer, pk)
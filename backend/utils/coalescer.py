@@ -0,0 +1,67 @@
+"""
+Coalescing stage for high-frequency location updates.
+
+Position updates are keyed per entity; within each window only the latest
+update per key survives, and all survivors go out together as one batched
+frame. Discrete changes (status, severity, assignment) bypass this stage.
+"""
+import threading
+import time
+from typing import Callable, Hashable
+
+
+class LocationCoalescer:
+    """Keeps the latest update per key and flushes them as one batch every ``window`` seconds."""
+
+    def __init__(self, publish: Callable[[dict], object], window: float = 0.25):
+        self.publish = publish
+        self.window = window
+        self._pending = {}
+        self._cond = threading.Condition()
+        self._thread = None
+        self.started_at = None
+        self.input_updates = 0
+        self.output_frames = 0
+        self.output_items = 0
+
+    def submit(self, key: Hashable, update: dict):
+        """Queue ``update``, replacing any pending update for the same key."""
+        with self._cond:
+            if self._thread is None:
+                self.started_at = time.time()
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self.input_updates += 1
+            self._pending[key] = update
+            self._cond.notify()
+
+    def flush(self):
+        """Publish everything pending as one batch frame."""
+        with self._cond:
+            if not self._pending:
+                return
+            items = list(self._pending.values())
+            self._pending = {}
+        self.output_frames += 1
+        self.output_items += len(items)
+        self.publish({"type": "batch", "items": items})
+
+    def _run(self):
+        while True:
+            # Sleep until something arrives; an idle stream costs no wakeups
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+            time.sleep(self.window)
+            self.flush()
+
+    def stats(self) -> dict:
+        elapsed = time.time() - self.started_at if self.started_at else 0.0
+        return {
+            "window_ms": int(self.window * 1000),
+            "input_updates": self.input_updates,
+            "output_frames": self.output_frames,
+            "output_items": self.output_items,
+            "input_rate_per_s": round(self.input_updates / elapsed, 2) if elapsed else 0.0,
+            "output_frame_rate_per_s": round(self.output_frames / elapsed, 2) if elapsed else 0.0,
+        }
@@ -0,0 +1,126 @@
+"""
+Sequence-numbered log of broadcast realtime events.
+
+Every event published on a realtime hub gets a monotonic sequence number and
+is kept, already encoded as an SSE frame, in a fixed-size ring. Event ids are
+``<epoch>-<seq>``, the epoch being random per log, so an id issued by another
+worker process or by a restarted one is never mistaken for a local sequence.
+Reconnecting clients send the last id they saw (``Last-Event-ID``) and receive
+only the frames they missed, or must resync if the id is from another epoch.
+An optional append-only JSON-lines file keeps the epoch, sequence and recent
+history across restarts; it belongs to one process and must not be shared.
+"""
+import json
+import logging
+import os
+import secrets
+import threading
+from collections import deque
+from typing import List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+def encode_frame(event_id: str, event: dict) -> str:
+    """Encode an event as an SSE frame carrying ``event_id`` as its id."""
+    return f"id: {event_id}\ndata: {json.dumps(event, separators=(',', ':'))}\n\n"
+
+
+class EventLog:
+    """Bounded in-memory ring of recent frames with an optional on-disk append log."""
+
+    def __init__(self, capacity: int = 1024, path: Optional[str] = None, max_bytes: int = 10 * 1024 * 1024):
+        self.capacity = capacity
+        self.path = path
+        self.max_bytes = max_bytes
+        self.epoch = secrets.token_hex(4)
+        self.last_seq = 0
+        self._ring: List[Optional[Tuple[int, str]]] = [None] * capacity
+        self._lock = threading.Lock()
+        self._file = None
+        if path:
+            self._restore()
+            self._file = open(path, "a", encoding="utf-8")
+
+    def event_id(self, seq: int) -> str:
+        return f"{self.epoch}-{seq}"
+
+    @property
+    def last_event_id(self) -> str:
+        return self.event_id(self.last_seq)
+
+    def append(self, event: dict) -> Tuple[int, str]:
+        """Assign the next sequence number to ``event`` and store its frame."""
+        with self._lock:
+            seq = self.last_seq + 1
+            frame = encode_frame(self.event_id(seq), event)
+            self._ring[seq % self.capacity] = (seq, frame)
+            self.last_seq = seq
+            if self._file is not None:
+                self._write(seq, event)
+            return seq, frame
+
+    def replay(self, last_event_id: str) -> Optional[List[str]]:
+        """
+        Frames published after the event ``last_event_id``, oldest first.
+
+        Returns None when the gap cannot be filled from the ring (too old, or
+        an id from another epoch: another worker, or before a restart without
+        a disk log); the client must then reload a full snapshot.
+        """
+        epoch, _, seq = last_event_id.rpartition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        last_seq = int(seq)
+        with self._lock:
+            if last_seq > self.last_seq or last_seq < self.last_seq - self.capacity:
+                return None
+            frames = []
+            for seq in range(last_seq + 1, self.last_seq + 1):
+                entry = self._ring[seq % self.capacity]
+                if entry is None or entry[0] != seq:
+                    return None
+                frames.append(entry[1])
+            return frames
+
+    def _write(self, seq: int, event: dict):
+        self._file.write(json.dumps({"epoch": self.epoch, "seq": seq, "event": event}) + "\n")
+        self._file.flush()
+        if self._file.tell() > self.max_bytes:
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the disk log with only the frames still held in the ring."""
+        self._file.close()
+        entries = sorted(entry for entry in self._ring if entry is not None)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            for seq, frame in entries:
+                event = json.loads(frame.split("data: ", 1)[1])
+                fh.write(json.dumps({"epoch": self.epoch, "seq": seq, "event": event}) + "\n")
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _restore(self):
+        """Reload the tail of the disk log into the ring, continuing its epoch."""
+        try:
+            with open(self.path, encoding="utf-8") as fh:
+                tail = deque(fh, maxlen=self.capacity)
+        except FileNotFoundError:
+            return
+        records = []
+        for line in tail:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                logger.warning("Skipping corrupt event log line in %s", self.path)
+        if not records or "epoch" not in records[-1]:
+            # Empty, or written before ids had epochs: start a fresh epoch
+            return
+        self.epoch = records[-1]["epoch"]
+        for record in records:
+            if record.get("epoch") != self.epoch:
+                continue
+            seq = record["seq"]
+            self._ring[seq % self.capacity] = (seq, encode_frame(self.event_id(seq), record["event"]))
+            self.last_seq = max(self.last_seq, seq)
@@ -0,0 +1,255 @@
+"""
+Asyncio ingest scheduler for the external feed sync.
+
+Runs the sync on a single leader process (guarded by a file lock), never lets
+two syncs overlap, and adapts its interval when syncs overrun or fail.
+Metrics are published to a JSON file so the web workers can serve them.
+"""
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from bisect import bisect_left
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the sync duration histogram buckets
+DURATION_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class IngestMetrics:
+    """Counters and duration histogram for the ingest loop."""
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.syncs_total = 0
+        self.errors_total = 0
+        self.overruns_total = 0
+        self.consecutive_errors = 0
+        self.last_attempt_at = None
+        self.last_success_at = None
+        self.last_duration_seconds = None
+        self.last_error = None
+        self.last_stats = None
+        self.current_interval_seconds = None
+        self.duration_buckets = [0] * (len(DURATION_BUCKETS) + 1)
+        self.duration_sum_seconds = 0.0
+        self.sources = {}
+
+    def observe(self, duration, stats=None, error=None):
+        """Record the outcome of one sync attempt."""
+        self.syncs_total += 1
+        self.last_attempt_at = time.time()
+        self.last_duration_seconds = round(duration, 4)
+        self.duration_sum_seconds += duration
+        self.duration_buckets[bisect_left(DURATION_BUCKETS, duration)] += 1
+        if error is None:
+            self.last_success_at = self.last_attempt_at
+            self.last_stats = stats
+            self.consecutive_errors = 0
+            self._observe_sources((stats or {}).get("sources", {}))
+        else:
+            self.errors_total += 1
+            self.consecutive_errors += 1
+            self.last_error = f"{type(error).__name__}: {error}"
+
+    def _observe_sources(self, report):
+        """Accumulate per-connector fetch outcomes and latency."""
+        for name, result in report.items():
+            source = self.sources.setdefault(
+                name,
+                {"ok": 0, "error": 0, "timeout": 0, "busy": 0, "last_latency_ms": None, "latency_sum_ms": 0.0},
+            )
+            source[result["status"]] += 1
+            if result["status"] == "ok":
+                source["last_latency_ms"] = result["latency_ms"]
+                source["latency_sum_ms"] += result["latency_ms"]
+
+    def snapshot(self):
+        """Return the metrics as a JSON-serializable dictionary."""
+        cumulative = 0
+        histogram = []
+        for bound, count in zip(DURATION_BUCKETS + ("+Inf",), self.duration_buckets):
+            cumulative += count
+            histogram.append({"le": bound, "count": cumulative})
+        return {
+            "pid": os.getpid(),
+            "started_at": self.started_at,
+            "updated_at": time.time(),
+            "syncs_total": self.syncs_total,
+            "errors_total": self.errors_total,
+            "overruns_total": self.overruns_total,
+            "consecutive_errors": self.consecutive_errors,
+            "last_attempt_at": self.last_attempt_at,
+            "last_success_at": self.last_success_at,
+            "last_duration_seconds": self.last_duration_seconds,
+            "last_error": self.last_error,
+            "last_stats": self.last_stats,
+            "current_interval_seconds": self.current_interval_seconds,
+            "duration_histogram": histogram,
+            "duration_sum_seconds": round(self.duration_sum_seconds, 4),
+            "sources": {
+                name: dict(
+                    source,
+                    avg_latency_ms=round(source["latency_sum_ms"] / source["ok"], 2) if source["ok"] else None,
+                )
+                for name, source in self.sources.items()
+            },
+        }
+
+    def write(self, path):
+        """Atomically publish the snapshot to ``path``."""
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as fh:
+            json.dump(self.snapshot(), fh)
+        os.replace(tmp_path, path)
+
+
+def read_metrics_snapshot(path):
+    """Load the published ingest metrics, adding the current sync lag."""
+    try:
+        with open(path, encoding="utf-8") as fh:
+            snapshot = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    last_success = snapshot.get("last_success_at")
+    snapshot["sync_lag_seconds"] = round(time.time() - last_success, 3) if last_success else None
+    return snapshot
+
+
+class LeaderLock:
+    """Non-blocking exclusive file lock; only the holder runs the ingest loop."""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self._fh = None
+
+    def acquire(self):
+        fh = open(self.path, "a+")
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            fh.close()
+            return False
+        fh.seek(0)
+        fh.truncate()
+        fh.write(str(os.getpid()))
+        fh.flush()
+        self._fh = fh
+        return True
+
+    def release(self):
+        if self._fh is None:
+            return
+        try:
+            if os.name == "nt":
+                import msvcrt
+
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+            else:
+                import fcntl
+
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+
+class IngestScheduler:
+    """
+    Runs ``sync_fn`` repeatedly on a worker thread, one call at a time.
+
+    The delay between syncs is the base interval scaled by a backoff factor
+    that doubles whenever a sync overruns the interval or fails, and decays
+    back to 1 after healthy syncs. Each delay is jittered so that restarts do
+    not line up with the upstream feed's own schedule.
+    """
+
+    def __init__(
+        self,
+        sync_fn,
+        interval=5.0,
+        max_interval=60.0,
+        jitter=0.1,
+        metrics=None,
+        metrics_path=None,
+    ):
+        self.sync_fn = sync_fn
+        self.interval = interval
+        self.max_interval = max(max_interval, interval)
+        self.jitter = jitter
+        self.metrics = metrics or IngestMetrics()
+        self.metrics_path = metrics_path
+        self._backoff = 1.0
+        self._stopping = asyncio.Event()
+
+    def stop(self):
+        self._stopping.set()
+
+    def next_delay(self, duration, failed):
+        """Compute the sleep before the next sync from the last outcome."""
+        if failed or duration > self.interval:
+            if not failed:
+                self.metrics.overruns_total += 1
+            self._backoff = min(self._backoff * 2, self.max_interval / self.interval)
+        else:
+            self._backoff = max(1.0, self._backoff / 2)
+
+        interval = min(self.interval * self._backoff, self.max_interval)
+        self.metrics.current_interval_seconds = round(interval, 3)
+        delay = max(0.0, interval - duration)
+        return delay * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _sync(self):
+        """``sync_fn`` on a pool thread, which keeps its database connection between ticks."""
+        from django.db import close_old_connections
+
+        # Drop connections that broke or outlived CONN_MAX_AGE since the last tick
+        close_old_connections()
+        try:
+            return self.sync_fn()
+        finally:
+            close_old_connections()
+
+    async def run_once(self):
+        started = time.perf_counter()
+        stats, error = None, None
+        try:
+            stats = await asyncio.to_thread(self._sync)
+        except Exception as exc:
+            error = exc
+            logger.exception("Ingest sync failed")
+        duration = time.perf_counter() - started
+        self.metrics.observe(duration, stats=stats, error=error)
+        return duration, error is not None
+
+    async def run(self, once=False):
+        while not self._stopping.is_set():
+            duration, failed = await self.run_once()
+            delay = self.next_delay(duration, failed)
+            self._publish()
+            if once:
+                break
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def _publish(self):
+        if not self.metrics_path:
+            return
+        try:
+            self.metrics.write(self.metrics_path)
+        except OSError:
+            logger.exception("Could not write ingest metrics to %s", self.metrics_path)
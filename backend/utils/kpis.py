@@ -0,0 +1,443 @@
+"""
+Incrementally maintained dashboard KPIs.
+
+Each entity kind (incidents, units, tasks, field task groups, and the mock
+dashboard's incidents and units) is tallied by a few dimension values, e.g.
+incidents by ``(status, severity)``. Every mutation moves one entity from its
+old tally key to its new one in O(1), so serving the KPIs costs only the
+number of distinct keys (bounded by the choice lists), not the number of rows.
+
+Database-backed kinds hold only those per-key counts: they are loaded with
+one ``GROUP BY`` query per table, and reloaded once older than
+``KPI_REFRESH_SECONDS`` to pick up writes from other processes (e.g. the
+ingest runner) and bulk ``QuerySet.update()`` calls that send no signals.
+Writes in this process move their entity directly: single saves read the
+row's stored key first (``remember_stored``, from ``pre_save``), deletes
+note the key of the instance being deleted, the ingest and batch bulk
+writes ``remember`` each instance's key before changing it and pass new rows
+as ``created``, and the field incident store passes each task group's state
+before and after a change. Records whose previous key is unknown mark their kind stale and it
+is reloaded on the next read, as does a tally that drifts below zero.
+
+The mock dashboard's kinds are small and fed by partial deltas, so they keep
+each entity's key in memory.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# kind -> (dimension fields, summed field or None)
+KINDS = {
+    "incident": (("status", "severity"), None),
+    "unit": (("type", "availability_status"), None),
+    "task": (("status",), None),
+    "task_group": (("major_incident_id", "status", "priority"), "progress_percent"),
+    "mock_incident": (("status", "severity"), None),
+    "mock_unit": (("type", "status"), None),
+}
+# Kinds aggregated from the database
+DB_KINDS = ("incident", "unit", "task", "task_group")
+# Instance attribute holding the (key, summed value) the row has in the database
+STATE_ATTR = "_kpi_state"
+_UNKNOWN = object()
+
+
+def _field(record, name):
+    return record.get(name) if isinstance(record, dict) else getattr(record, name)
+
+
+def _pk(record):
+    return record["id"] if isinstance(record, dict) else record.pk
+
+
+class _Tally:
+    """Counts (and an optional sum) of one entity kind, grouped by its dimension values."""
+
+    __slots__ = ("dims", "sum_field", "counts", "sums", "drifted")
+
+    def __init__(self, dims, sum_field=None):
+        self.dims = dims
+        self.sum_field = sum_field
+        self.counts = Counter()
+        self.sums = Counter()
+        # Set when a removal found nothing to remove; the tally needs a reload
+        self.drifted = False
+
+    @property
+    def total(self):
+        return sum(self.counts.values())
+
+    def state(self, record):
+        """The (key, summed value) of a record."""
+        key = tuple(_field(record, d) for d in self.dims)
+        return key, (_field(record, self.sum_field) or 0) if self.sum_field else 0
+
+    def move(self, old, new):
+        """Move one entity from state ``old`` to ``new``; None stands for not counted."""
+        if old == new:
+            return
+        if old is not None:
+            self._remove(*old)
+        if new is not None:
+            self._add(*new)
+
+    def _add(self, key, value):
+        self.counts[key] += 1
+        if self.sum_field:
+            self.sums[key] += value
+
+    def _remove(self, key, value):
+        self.counts[key] -= 1
+        if self.sum_field:
+            self.sums[key] -= value
+        if self.counts[key] < 0:
+            # An entity counted under another key (e.g. a write raced a reload)
+            logger.warning("KPI tally for %s went below zero at %r; reloading", self.dims, key)
+            self.drifted = True
+        if self.counts[key] <= 0:
+            del self.counts[key]
+            self.sums.pop(key, None)
+
+    def by(self, dim, where=None):
+        """Counts per value of ``dim``, over keys accepted by ``where(key_dict)``."""
+        index = self.dims.index(dim)
+        result = Counter()
+        for key, count in self.counts.items():
+            if where is None or where(dict(zip(self.dims, key))):
+                result[key[index]] += count
+        return dict(result)
+
+
+class _EntityTally(_Tally):
+    """A tally that also keeps every entity's state, for feeds that send only the changed fields."""
+
+    __slots__ = ("entities",)
+
+    def __init__(self, dims, sum_field=None):
+        super().__init__(dims, sum_field)
+        self.entities = {}  # pk -> (key, summed value)
+
+    def observe(self, pk, record):
+        self._set(pk, *self.state(record))
+
+    def patch(self, pk, changes):
+        """Apply a partial record (only the changed fields); unknown entities need every dimension."""
+        old = self.entities.get(pk)
+        if old is None:
+            if all(d in changes for d in self.dims):
+                self.observe(pk, changes)
+            return
+        key = tuple(changes.get(d, old[0][i]) for i, d in enumerate(self.dims))
+        value = changes.get(self.sum_field, old[1]) if self.sum_field else 0
+        self._set(pk, key, value)
+
+    def forget(self, pk):
+        old = self.entities.pop(pk, None)
+        if old is not None:
+            self._remove(*old)
+
+    def _set(self, pk, key, value):
+        self.move(self.entities.get(pk), (key, value))
+        self.entities[pk] = (key, value)
+
+
+class KPIAggregator:
+    """Process-wide tallies per entity kind; kinds are tracked once loaded."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._tallies = {}
+        self.loaded_at = None
+        # Database-backed kinds to reload on the next read
+        self.stale = set()
+
+    def tracks(self, kind) -> bool:
+        return kind in self._tallies
+
+    def load(self, kind, records: Iterable):
+        """Replace the tally of ``kind`` with ``records`` (dicts with ``id`` or model instances)."""
+        tally = _EntityTally(*KINDS[kind])
+        for record in records:
+            tally.observe(_pk(record), record)
+        with self._lock:
+            self._tallies[kind] = tally
+
+    def load_counts(self, kind, groups: Iterable):
+        """Replace the tally of ``kind`` with ``GROUP BY`` rows of its dimensions, ``count`` and ``total``."""
+        tally = _Tally(*KINDS[kind])
+        for group in groups:
+            key = tuple(group[d] for d in tally.dims)
+            tally.counts[key] += group["count"]
+            if tally.sum_field:
+                tally.sums[key] += group["total"] or 0
+        with self._lock:
+            self._tallies[kind] = tally
+
+    def observe(self, kind, records: Iterable, created: bool = False):
+        """Record the current state of updated entities, or of new ones with ``created``."""
+        with self._lock:
+            tally = self._tallies.get(kind)
+            if tally is None:
+                return
+            for record in records:
+                if isinstance(tally, _EntityTally):
+                    tally.observe(_pk(record), record)
+                    continue
+                if created:
+                    old = None
+                elif isinstance(record, dict):
+                    old = _UNKNOWN
+                else:
+                    old = getattr(record, STATE_ATTR, _UNKNOWN)
+                if old is _UNKNOWN:
+                    self.stale.add(kind)
+                    continue
+                new = tally.state(record)
+                tally.move(old, new)
+                setattr(record, STATE_ATTR, new)
+            self._check_drift(kind, tally)
+
+    def move(self, kind, changes: Iterable):
+        """Record entities that went from record ``old`` to ``new``, given as ``(old, new)`` pairs."""
+        with self._lock:
+            tally = self._tallies.get(kind)
+            if tally is not None:
+                for old, new in changes:
+                    tally.move(tally.state(old), tally.state(new))
+                self._check_drift(kind, tally)
+
+    def forget(self, kind, record):
+        """Drop a deleted entity (its pk for the mock kinds, else the deleted instance)."""
+        with self._lock:
+            tally = self._tallies.get(kind)
+            if tally is None:
+                return
+            if isinstance(tally, _EntityTally):
+                tally.forget(record)
+                return
+            old = getattr(record, STATE_ATTR, _UNKNOWN)
+            if old is _UNKNOWN:
+                self.stale.add(kind)
+                return
+            tally.move(old, None)
+            setattr(record, STATE_ATTR, None)
+            self._check_drift(kind, tally)
+
+    def _check_drift(self, kind, tally):
+        if tally.drifted and kind in DB_KINDS:
+            self.stale.add(kind)
+
+    def on_mock_delta(self, delta, coalesce_key=None):
+        """``MockDataService`` listener: deltas carry only the changed fields."""
+        if coalesce_key is not None:
+            # Location-only updates change no KPI
+            return
+        with self._lock:
+            tally = self._tallies.get(f"mock_{delta['e']}")
+            if tally is not None:
+                tally.patch(delta["id"], delta["c"])
+
+    def refresh_from_db(self, kinds: Iterable[str] = DB_KINDS):
+        """Reload database-backed kinds with one grouped aggregate each; all of them by default."""
+        from django.db.models import Count, Sum
+
+        from api.models import Incident, Task, TaskGroup, Unit
+
+        models = {"incident": Incident, "unit": Unit, "task": Task, "task_group": TaskGroup}
+        kinds = list(kinds)
+        for kind in kinds:
+            self.stale.discard(kind)
+            dims, sum_field = KINDS[kind]
+            totals = {"total": Sum(sum_field)} if sum_field else {}
+            # order_by() drops the model's ordering, which would otherwise be grouped on too
+            groups = models[kind].objects.order_by().values(*dims)
+            self.load_counts(kind, groups.annotate(count=Count("pk"), **totals))
+        if set(kinds) >= set(DB_KINDS):
+            self.loaded_at = time.monotonic()
+
+    def snapshot(self) -> dict:
+        """Current KPIs; cost depends on the number of distinct tally keys, not rows."""
+        with self._lock:
+            tallies = dict(self._tallies)
+            result = {}
+            if "incident" in tallies:
+                result["incidents"] = _incident_kpis(tallies["incident"])
+            if "unit" in tallies:
+                result["units"] = _unit_kpis(tallies["unit"], "availability_status", "AVAILABLE")
+            if "task" in tallies:
+                tally = tallies["task"]
+                result["tasks"] = {"total": tally.total, "by_status": tally.by("status")}
+            if "task_group" in tallies:
+                result["task_groups"] = _task_group_kpis(tallies["task_group"])
+            if "mock_incident" in tallies:
+                result["mock"] = {
+                    "incidents": _incident_kpis(tallies["mock_incident"]),
+                    "units": _unit_kpis(tallies["mock_unit"], "status", "Available"),
+                }
+        return result
+
+
+def _is_open(key):
+    return key["status"] != "CLOSED"
+
+
+def _incident_kpis(tally):
+    by_status = tally.by("status")
+    open_by_severity = tally.by("severity", _is_open)
+    return {
+        "total": tally.total,
+        "open": sum(open_by_severity.values()),
+        "critical_open": open_by_severity.get("CRITICAL", 0),
+        "by_status": by_status,
+        "by_severity": tally.by("severity"),
+        "open_by_severity": open_by_severity,
+    }
+
+
+def _unit_kpis(tally, status_field, available):
+    available_by_type = tally.by("type", lambda key: key[status_field] == available)
+    return {
+        "total": tally.total,
+        "available": sum(available_by_type.values()),
+        "by_type": tally.by("type"),
+        "by_status": tally.by(status_field),
+        "available_by_type": available_by_type,
+    }
+
+
+def _group_summary(count, progress, completed, open_critical):
+    return {
+        "total": count,
+        "completed": completed,
+        "open_critical": open_critical,
+        "progress_percent": round(progress / count, 1) if count else 0.0,
+    }
+
+
+def _task_group_kpis(tally):
+    per_incident = {}
+    for (incident_id, status, priority), count in tally.counts.items():
+        totals = per_incident.setdefault(incident_id, [0, 0, 0, 0])
+        totals[0] += count
+        totals[1] += tally.sums[(incident_id, status, priority)]
+        if status == "COMPLETED":
+            totals[2] += count
+        elif priority == "CRITICAL":
+            totals[3] += count
+    overall = [sum(column) for column in zip(*per_incident.values())] or [0, 0, 0, 0]
+    return {
+        **_group_summary(*overall),
+        "by_status": tally.by("status"),
+        "by_major_incident": {incident_id: _group_summary(*totals) for incident_id, totals in per_incident.items()},
+    }
+
+
+# Global instance
+_aggregator = None
+_aggregator_lock = threading.Lock()
+
+
+def get_kpis(refresh: bool = True) -> KPIAggregator:
+    """
+    Process-wide KPI aggregator.
+
+    With ``refresh`` the database-backed kinds are (re)loaded when never
+    loaded or older than ``KPI_REFRESH_SECONDS``, and stale ones are
+    reloaded; without it the aggregator is returned as-is and only tracks
+    the kinds already loaded.
+    """
+    global _aggregator
+    if _aggregator is None:
+        with _aggregator_lock:
+            if _aggregator is None:
+                _aggregator = KPIAggregator()
+    if not refresh:
+        return _aggregator
+
+    from django.conf import settings
+
+    max_age = settings.KPI_REFRESH_SECONDS
+    loaded_at = _aggregator.loaded_at
+    if loaded_at is None or (max_age and time.monotonic() - loaded_at >= max_age):
+        with _aggregator_lock:
+            loaded_at = _aggregator.loaded_at
+            if loaded_at is None or (max_age and time.monotonic() - loaded_at >= max_age):
+                _aggregator.refresh_from_db()
+    if _aggregator.stale:
+        with _aggregator_lock:
+            if _aggregator.stale:
+                _aggregator.refresh_from_db(tuple(_aggregator.stale))
+    return _aggregator
+
+
+def _tracked(kind) -> bool:
+    aggregator: Optional[KPIAggregator] = _aggregator
+    return aggregator is not None and aggregator.tracks(kind)
+
+
+def _stored_state(kind, values):
+    dims, sum_field = KINDS[kind]
+    return tuple(values[d] for d in dims), (values[sum_field] or 0) if sum_field else 0
+
+
+def remember(kind: str, instance):
+    """
+    Note the state a loaded ``instance`` has in the database, before changing or deleting it.
+
+    For writers that save without model signals, the later ``track`` moves
+    only that entity; ``pre_delete`` calls it for deletes. Instances with a deferred dimension are left unmarked
+    and make the kind stale when written, and known states are kept.
+    """
+    if not _tracked(kind) or hasattr(instance, STATE_ATTR):
+        return
+    if instance.pk is None:
+        setattr(instance, STATE_ATTR, None)
+        return
+    dims, sum_field = KINDS[kind]
+    loaded = instance.__dict__
+    if all(d in loaded for d in dims) and (not sum_field or sum_field in loaded):
+        setattr(instance, STATE_ATTR, _stored_state(kind, loaded))
+
+
+def remember_stored(kind: str, instance, using=None):
+    """
+    Read the state of ``instance``'s row before it is saved, when this process tracks ``kind``.
+
+    Connected to ``pre_save``, so only saves pay for it (one primary key
+    lookup), and not when the state is already known. Deletes ``remember``
+    the instance as fetched.
+    """
+    if not _tracked(kind) or hasattr(instance, STATE_ATTR):
+        return
+    if instance._state.adding:
+        setattr(instance, STATE_ATTR, None)
+        return
+    dims, sum_field = KINDS[kind]
+    fields = dims + ((sum_field,) if sum_field else ())
+    row = type(instance)._default_manager.using(using).filter(pk=instance.pk).values(*fields).first()
+    setattr(instance, STATE_ATTR, _stored_state(kind, row) if row is not None else None)
+
+
+def track(kind: str, records: Iterable, created: bool = False):
+    """Apply saved entities of ``kind`` (new rows with ``created``) to the KPIs if this process tracks them."""
+    aggregator: Optional[KPIAggregator] = _aggregator
+    if aggregator is not None:
+        aggregator.observe(kind, records, created)
+
+
+def track_changes(kind: str, changes: Iterable):
+    """Apply ``(old, new)`` record pairs of ``kind`` to the KPIs if this process tracks them."""
+    aggregator: Optional[KPIAggregator] = _aggregator
+    if aggregator is not None:
+        aggregator.move(kind, changes)
+
+
+def untrack(kind: str, instance):
+    """Drop a deleted entity of ``kind`` from the KPIs if this process tracks them."""
+    aggregator: Optional[KPIAggregator] = _aggregator
+    if aggregator is not None:
+        aggregator.forget(kind, instance)
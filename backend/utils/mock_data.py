@@ -5,6 +5,7 @@ Supports seeded random generation for reproducible demos.
 """
 import random
 import json
+import threading
 from datetime import datetime, timedelta
 from typing import List, Dict, Any
 from faker import Faker
@@ -43,6 +44,10 @@ class MockDataService:
         self.units = {}
         self.events = []
         self.event_counter = 0
+        # Guards incidents/units; deltas are published while it is held so
+        # listeners see them in the same order as the mutations
+        self.lock = threading.RLock()
+        self._listeners = []
         self._init_data()
     
     def _init_data(self):
@@ -82,6 +87,7 @@ class MockDataService:
             "assigned_unit_ids": [],
             "reporter": self.faker.name(),
             "tags": random.sample(["priority", "high-visibility", "multi-agency"], k=random.randint(1, 2)),
+            "version": 1,
         }
     
     def _generate_unit(self, unit_id: int = None) -> Dict[str, Any]:
@@ -99,6 +105,7 @@ class MockDataService:
             "location_lng": location["lng"] + random.uniform(-0.01, 0.01),
             "last_update": datetime.now().isoformat(),
             "crew_size": random.randint(1, 5),
+            "version": 1,
         }
     
     def _add_event(self, entity_type: str, entity_id: int, message: str, level: str = "info"):
@@ -118,6 +125,51 @@ class MockDataService:
             self.events.pop(0)
         return event
     
+    def add_listener(self, callback):
+        """
+        Register a callable receiving every entity delta (e.g. a realtime hub's broadcast).
+        
+        Called as ``callback(delta, coalesce_key=...)``; the key is set for
+        location updates, which may be batched, and None for everything else.
+        """
+        self._listeners.append(callback)
+    
+    def _publish_delta(
+        self,
+        entity_type: str,
+        entity: Dict[str, Any],
+        changes: Dict[str, Any],
+        created: bool = False,
+        location: bool = False,
+    ):
+        """
+        Bump the entity version and notify listeners with only the changed fields.
+        
+        Deltas use short keys because they dominate stream traffic:
+        ``{"type": "delta", "e": "unit", "id": 3, "v": 7, "c": {...changed fields}}``,
+        plus ``"op": "create"`` (with the full record in ``c``) for new entities.
+        Clients drop deltas whose ``v`` is not newer than the version they hold.
+        """
+        if not created:
+            entity["version"] += 1
+        delta = {
+            "type": "delta",
+            "e": entity_type,
+            "id": entity["id"],
+            "v": entity["version"],
+            "c": changes,
+        }
+        if created:
+            delta["op"] = "create"
+        coalesce_key = (entity_type, entity["id"]) if location else None
+        for callback in self._listeners:
+            callback(delta, coalesce_key=coalesce_key)
+        return delta
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Full state for the snapshot-plus-deltas handshake; call with ``lock`` held."""
+        return {"incidents": self.get_incidents(), "units": self.get_units()}
+    
     def get_incidents(self) -> List[Dict[str, Any]]:
         """Get all incidents."""
         return list(self.incidents.values())
@@ -139,12 +191,14 @@ class MockDataService:
         if incident_id not in self.incidents:
             return None
         
-        incident = self.incidents[incident_id]
-        old_status = incident["status"]
-        incident["status"] = new_status
-        incident["updated_at"] = datetime.now().isoformat()
-        
-        self._add_event("incident", incident_id, f"Status changed: {old_status} → {new_status}", "info")
+        with self.lock:
+            incident = self.incidents[incident_id]
+            old_status = incident["status"]
+            incident["status"] = new_status
+            incident["updated_at"] = datetime.now().isoformat()
+            
+            self._add_event("incident", incident_id, f"Status changed: {old_status} → {new_status}", "info")
+            self._publish_delta("incident", incident, {"status": new_status})
         return incident
     
     def update_incident_severity(self, incident_id: int, new_severity: str) -> Dict[str, Any]:
@@ -152,12 +206,14 @@ class MockDataService:
         if incident_id not in self.incidents:
             return None
         
-        incident = self.incidents[incident_id]
-        old_severity = incident["severity"]
-        incident["severity"] = new_severity
-        incident["updated_at"] = datetime.now().isoformat()
-        
-        self._add_event("incident", incident_id, f"Severity changed: {old_severity} → {new_severity}", "warn")
+        with self.lock:
+            incident = self.incidents[incident_id]
+            old_severity = incident["severity"]
+            incident["severity"] = new_severity
+            incident["updated_at"] = datetime.now().isoformat()
+            
+            self._add_event("incident", incident_id, f"Severity changed: {old_severity} → {new_severity}", "warn")
+            self._publish_delta("incident", incident, {"severity": new_severity})
         return incident
     
     def assign_unit(self, incident_id: int, unit_id: int) -> Dict[str, Any]:
@@ -165,15 +221,17 @@ class MockDataService:
         if incident_id not in self.incidents or unit_id not in self.units:
             return None
         
-        incident = self.incidents[incident_id]
-        unit = self.units[unit_id]
-        
-        if unit_id not in incident["assigned_unit_ids"]:
-            incident["assigned_unit_ids"].append(unit_id)
-            incident["updated_at"] = datetime.now().isoformat()
+        with self.lock:
+            incident = self.incidents[incident_id]
+            unit = self.units[unit_id]
             
-            self._add_event("incident", incident_id, f"Unit {unit['name']} assigned", "info")
-            self._add_event("unit", unit_id, f"Assigned to incident {incident_id}", "info")
+            if unit_id not in incident["assigned_unit_ids"]:
+                incident["assigned_unit_ids"].append(unit_id)
+                incident["updated_at"] = datetime.now().isoformat()
+                
+                self._add_event("incident", incident_id, f"Unit {unit['name']} assigned", "info")
+                self._add_event("unit", unit_id, f"Assigned to incident {incident_id}", "info")
+                self._publish_delta("incident", incident, {"assigned_unit_ids": list(incident["assigned_unit_ids"])})
         
         return incident
     
@@ -188,12 +246,17 @@ class MockDataService:
     
     def simulate_update(self) -> Dict[str, Any]:
         """Simulate a random update event."""
+        with self.lock:
+            return self._simulate_update()
+    
+    def _simulate_update(self) -> Dict[str, Any]:
         action = random.choice(["new_incident", "update_status", "update_severity", "assign_unit", "move_unit"])
         
         if action == "new_incident":
             incident = self._generate_incident()
             self.incidents[incident["id"]] = incident
             self._add_event("incident", incident["id"], f"New incident: {incident['title']}", "warn")
+            self._publish_delta("incident", incident, dict(incident), created=True)
             return {"type": "incident_created", "data": incident}
         
         elif action == "update_status":
@@ -222,6 +285,10 @@ class MockDataService:
             unit["location_lng"] += random.uniform(-0.002, 0.002)
             unit["last_update"] = datetime.now().isoformat()
             self._add_event("unit", unit["id"], f"Location updated", "info")
+            self._publish_delta("unit", unit, {
+                "location_lat": round(unit["location_lat"], 6),
+                "location_lng": round(unit["location_lng"], 6),
+            }, location=True)
             return {"type": "unit_updated", "data": unit}
         
         return None
@@ -229,16 +296,65 @@ class MockDataService:
 
 # Global instance
 _mock_service = None
+_mock_service_lock = threading.Lock()
 
 
 def get_mock_service(seed: int = None) -> MockDataService:
     """Get or create mock data service."""
     global _mock_service
     if _mock_service is None:
-        seed_env = os.environ.get("DEMO_SEED", "0")
-        try:
-            seed = seed or (int(seed_env) if seed_env.strip() else None)
-        except (ValueError, AttributeError):
-            seed = None
-        _mock_service = MockDataService(seed=seed)
+        with _mock_service_lock:
+            if _mock_service is None:
+                # Published only once its listeners are wired, so no caller sees deltas go nowhere
+                _mock_service = _create_mock_service(seed)
     return _mock_service
+
+
+def _create_mock_service(seed: int = None) -> MockDataService:
+    """New mock data service feeding the regional stream, KPIs, tracks and clusters."""
+    seed_env = os.environ.get("DEMO_SEED", "0")
+    try:
+        seed = seed or (int(seed_env) if seed_env.strip() else None)
+    except (ValueError, AttributeError):
+        seed = None
+    service = MockDataService(seed=seed)
+    
+    # Push every change to the regional stream as a delta; new clients get
+    # a snapshot taken under the same lock that orders the deltas
+    from utils.realtime import get_realtime_service
+    
+    realtime_service = get_realtime_service("mock")
+    service.add_listener(realtime_service.broadcast)
+    realtime_service.set_snapshot_provider(service.snapshot, service.lock)
+    
+    # Dashboard KPIs follow the same deltas, seeded from the initial data
+    from utils.kpis import get_kpis
+    
+    kpis = get_kpis(refresh=False)
+    with service.lock:
+        kpis.load("mock_incident", service.get_incidents())
+        kpis.load("mock_unit", service.get_units())
+        service.add_listener(kpis.on_mock_delta)
+    
+    # Position history for breadcrumbs and playback, from each location delta
+    from utils.tracks import get_track_store
+    
+    tracks = get_track_store("mock")
+    
+    def record_location(delta, coalesce_key=None):
+        if coalesce_key is not None:
+            tracks.append(delta["id"], delta["c"]["location_lat"], delta["c"]["location_lng"])
+    
+    with service.lock:
+        tracks.append_many((u["id"], u["location_lat"], u["location_lng"]) for u in service.get_units())
+        service.add_listener(record_location)
+    
+    # Map clusters, kept current from the same deltas
+    from utils.clusters import get_clusters
+    
+    clusters = get_clusters("mock")
+    with service.lock:
+        clusters.track("incidents", service.get_incidents())
+        clusters.track("units", service.get_units())
+        service.add_listener(clusters.on_mock_delta)
+    return service
@@ -1,51 +1,231 @@
+import hashlib
+import json
+import logging
 import threading
 import time
 from django.db import transaction
+from django.utils import timezone
 from django.conf import settings
 
+from utils.clusters import cluster_records
+from utils.kpis import remember, track
+from utils.spatial import index_units
+from utils.tracks import record_units
+
+logger = logging.getLogger(__name__)
+
 _polling_thread = None
 _polling_interval = int(getattr(settings, "POLLING_INTERVAL", 5))
+_batch_size = int(getattr(settings, "POLLING_BATCH_SIZE", 500))
+_last_sync_stats = None
 
 
-def _sync_with_external():
-    from external.mock_api_client import fetch_mock_events
-    from api.models import Incident, Unit
+def _incident_defaults(inc):
+    return {
+        "title": inc["title"],
+        "description": inc.get("description", ""),
+        "location_lat": inc.get("location_lat", 0.0),
+        "location_lng": inc.get("location_lng", 0.0),
+        "severity": inc.get("severity", "LOW"),
+        "status": inc.get("status", "OPEN"),
+    }
 
-    payload = fetch_mock_events()
-    incidents = payload.get("incidents", [])
-    units = payload.get("units", [])
-
-    with transaction.atomic():
-        for inc in incidents:
-            Incident.objects.update_or_create(
-                title=inc["title"],
-                defaults={
-                    "description": inc.get("description", ""),
-                    "location_lat": inc.get("location_lat", 0.0),
-                    "location_lng": inc.get("location_lng", 0.0),
-                    "severity": inc.get("severity", "LOW"),
-                    "status": inc.get("status", "OPEN"),
-                },
-            )
-        for unit in units:
-            Unit.objects.update_or_create(
-                name=unit["name"],
-                defaults={
-                    "type": unit.get("type", "Police"),
-                    "location_lat": unit.get("location_lat", 0.0),
-                    "location_lng": unit.get("location_lng", 0.0),
-                    "availability_status": unit.get("availability_status", "AVAILABLE"),
-                },
+
+def _unit_defaults(unit):
+    return {
+        "name": unit["name"],
+        "type": unit.get("type", "Police"),
+        "location_lat": unit.get("location_lat", 0.0),
+        "location_lng": unit.get("location_lng", 0.0),
+        "availability_status": unit.get("availability_status", "AVAILABLE"),
+    }
+
+
+def _fingerprint(values):
+    """Stable content hash of the mapped feed fields for one record."""
+    encoded = json.dumps(values, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha1(encoded.encode("utf-8")).hexdigest()
+
+
+def _load_existing(model, field, keys, batch_size):
+    """Load rows whose ``field`` is in ``keys``, one query per chunk of keys."""
+    found = {}
+    for start in range(0, len(keys), batch_size):
+        chunk = keys[start:start + batch_size]
+        for obj in model.objects.filter(**{f"{field}__in": chunk}).order_by("pk"):
+            found.setdefault(getattr(obj, field), obj)
+    return found
+
+
+def _bulk_reconcile(model, key_field, rows, to_defaults, batch_size=None, on_write=None):
+    """
+    Insert or update ``rows`` in ``model``, keyed by the feed's ``external_id``.
+
+    Rows without an ``external_id`` are matched on ``key_field`` (title/name),
+    and stored rows that predate external ids are adopted the same way. Every
+    row keeps a fingerprint of its mapped fields, so records whose fingerprint
+    matches the feed are skipped without being written.
+
+    Existing rows are loaded with one query per chunk of keys and only the
+    write phase runs inside a transaction, so the database write lock is not
+    held while the feed is being compared. Bulk writes bypass model signals,
+    so ``on_write`` is called with the created and the updated objects instead.
+
+    Returns:
+        Dictionary with ``inserted``, ``updated`` and ``unchanged`` counts
+    """
+    batch_size = batch_size or _batch_size
+
+    # Last occurrence wins when the feed repeats a key within one payload
+    incoming = {}
+    for row in rows:
+        defaults = to_defaults(row)
+        external_id = row.get("external_id") or None
+        incoming[external_id or (key_field, defaults[key_field])] = (external_id, defaults)
+
+    by_external = _load_existing(
+        model, "external_id", [ext for ext, _ in incoming.values() if ext], batch_size
+    )
+    by_natural = _load_existing(
+        model,
+        key_field,
+        [d[key_field] for ext, d in incoming.values() if ext not in by_external],
+        batch_size,
+    )
+
+    # bulk_update skips auto_now, so modification times are stamped here
+    stamp_updated = any(f.name == "updated_at" for f in model._meta.concrete_fields)
+    kind = model._meta.model_name
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    changed_fields = set()
+    claimed = set()
+    unchanged = 0
+    for external_id, defaults in incoming.values():
+        fingerprint = _fingerprint(defaults)
+        obj = by_external.get(external_id) if external_id else None
+        if obj is None:
+            candidate = by_natural.get(defaults[key_field])
+            if (
+                candidate is not None
+                and candidate.pk not in claimed
+                and (external_id is None or candidate.external_id is None)
+            ):
+                obj = candidate
+        if obj is None:
+            to_create.append(
+                model(external_id=external_id, external_fingerprint=fingerprint, **defaults)
             )
+            continue
+        claimed.add(obj.pk)
+
+        if obj.external_fingerprint == fingerprint and (
+            external_id is None or obj.external_id == external_id
+        ):
+            unchanged += 1
+            continue
+
+        remember(kind, obj)
+        dirty = [name for name, value in defaults.items() if getattr(obj, name) != value]
+        for name in dirty:
+            setattr(obj, name, defaults[name])
+        obj.external_fingerprint = fingerprint
+        dirty.append("external_fingerprint")
+        if external_id is not None and obj.external_id != external_id:
+            obj.external_id = external_id
+            dirty.append("external_id")
+        if stamp_updated:
+            obj.updated_at = now
+            dirty.append("updated_at")
+        changed_fields.update(dirty)
+        to_update.append(obj)
+
+    if to_create or to_update:
+        with transaction.atomic():
+            if to_create:
+                model.objects.bulk_create(to_create, batch_size=batch_size)
+            if to_update:
+                model.objects.bulk_update(to_update, sorted(changed_fields), batch_size=batch_size)
+        if on_write is not None:
+            on_write(to_create, to_update)
+
+    return {"inserted": len(to_create), "updated": len(to_update), "unchanged": unchanged}
+
+
+def _units_written(created, updated):
+    units = created + updated
+    index_units(units)
+    track("unit", created, created=True)
+    track("unit", updated)
+    record_units(units)
+    cluster_records("units", units)
+
+
+def _incidents_written(created, updated):
+    track("incident", created, created=True)
+    track("incident", updated)
+    cluster_records("incidents", created + updated)
+
+
+def apply_external_payload(payload):
+    """
+    Reconcile one feed payload (``incidents`` and ``units`` lists) into the database.
+
+    Returns:
+        Dictionary with per-model inserted/updated/unchanged counts and ``elapsed_ms``
+    """
+    from api.models import Incident, Unit
+
+    global _last_sync_stats
+
+    started = time.perf_counter()
+    stats = {
+        "incidents": _bulk_reconcile(
+            Incident, "title", payload.get("incidents", []), _incident_defaults,
+            on_write=_incidents_written,
+        ),
+        "units": _bulk_reconcile(
+            Unit, "name", payload.get("units", []), _unit_defaults, on_write=_units_written
+        ),
+    }
+    stats["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 2)
+    _last_sync_stats = stats
+
+    logger.info(
+        "External sync: incidents %(incidents)s, units %(units)s in %(elapsed_ms)sms",
+        stats,
+    )
+    return stats
+
+
+def sync_with_external():
+    """
+    Fetch every external source and reconcile it into the database once.
+
+    Returns:
+        The ``apply_external_payload`` stats plus per-source ``sources`` details
+    """
+    from external.connectors import fetch_all_sources
+
+    payload, sources = fetch_all_sources()
+    stats = apply_external_payload(payload)
+    stats["sources"] = sources
+    return stats
+
+
+def get_last_sync_stats():
+    """Return the counters reported by the most recent sync, if any."""
+    return _last_sync_stats
 
 
 def _polling_loop():
     while True:
         try:
-            _sync_with_external()
+            sync_with_external()
         except Exception:
-            # Intentionally swallow exceptions to keep the demo running
-            pass
+            # Keep the demo running, but leave a trace of the failure
+            logger.exception("External sync failed")
         time.sleep(_polling_interval)
 
 
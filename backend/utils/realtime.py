@@ -2,47 +2,263 @@
 Real-time update service using Server-Sent Events (SSE).
 Simulates live updates for the dashboard demo.
 """
+import asyncio
 import json
+import os
 import time
 import threading
+from collections import deque
 from datetime import datetime
-from typing import Callable, List
+from contextlib import nullcontext
+from typing import Optional
+
+from utils.coalescer import LocationCoalescer
+from utils.event_log import EventLog, encode_frame
+
+# Slow-consumer policies applied when a subscriber's buffer is full
+DROP_OLDEST = "drop_oldest"
+DISCONNECT = "disconnect"
+
+
+class Subscription:
+    """Bounded queue of encoded SSE frames for one connected client, read from a thread."""
+
+    def __init__(self, service, maxlen: int, policy: str):
+        self._service = service
+        self._events = deque()
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self.maxlen = maxlen
+        self.policy = policy
+        self.dropped = 0
+        self.closed = False
+        self.evicted = False
+        self.resync_required = False
+        self.snapshot_frame = None
+
+    def put(self, frame: str) -> bool:
+        """Queue a frame; returns False if the subscriber should be dropped."""
+        with self._lock:
+            if self.closed:
+                return False
+            if len(self._events) >= self.maxlen:
+                if self.policy == DISCONNECT:
+                    self.closed = True
+                    self.evicted = True
+                    self._wake()
+                    return False
+                self._events.popleft()
+                self.dropped += 1
+            self._events.append(frame)
+            self._wake()
+        return True
+
+    def _wake(self):
+        """Wake the reader; called with the lock held."""
+        self._cond.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Block until a frame is available, the timeout expires or the subscription closes."""
+        with self._cond:
+            if not self._events and not self.closed:
+                self._cond.wait(timeout)
+            if self._events:
+                return self._events.popleft()
+            return None
+
+    def close(self):
+        """Stop receiving events and detach from the service."""
+        with self._lock:
+            self.closed = True
+            self._wake()
+        self._service.unsubscribe(self)
+
+
+class AsyncSubscription(Subscription):
+    """
+    Bounded event queue read from an asyncio event loop.
+
+    Publishers may run on any thread; the loop is only woken when the queue
+    goes from empty to non-empty, so a burst costs one cross-thread call.
+    """
+
+    def __init__(self, service, maxlen: int, policy: str, loop: asyncio.AbstractEventLoop):
+        super().__init__(service, maxlen, policy)
+        self._loop = loop
+        self._ready = asyncio.Event()
+        self._wake_pending = False
+
+    def _wake(self):
+        if self._wake_pending:
+            return
+        self._wake_pending = True
+        try:
+            self._loop.call_soon_threadsafe(self._ready.set)
+        except RuntimeError:
+            # Event loop already closed: the client is gone
+            self.closed = True
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[str]:
+        """Wait until a frame is available, the timeout expires or the subscription closes."""
+        with self._lock:
+            if self._events:
+                return self._events.popleft()
+            if self.closed:
+                return None
+            self._ready.clear()
+            self._wake_pending = False
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout)
+        except asyncio.TimeoutError:
+            pass
+        with self._lock:
+            if self._events:
+                return self._events.popleft()
+            return None
 
 
 class RealtimeUpdateService:
-    """Manages real-time updates for connected clients."""
+    """Fans out real-time updates to connected clients."""
+    
+    DEFAULT_BUFFER_SIZE = 256
     
-    def __init__(self):
-        self.subscribers: List[Callable] = []
+    def __init__(
+        self,
+        buffer_size: int = DEFAULT_BUFFER_SIZE,
+        policy: str = DROP_OLDEST,
+        event_log: Optional[EventLog] = None,
+        coalesce_window: float = 0.0,
+    ):
+        self.buffer_size = buffer_size
+        self.policy = policy
+        self.event_log = event_log or EventLog()
+        # Location updates submitted with a coalesce key are batched per window
+        self.coalescer = LocationCoalescer(self.broadcast, coalesce_window) if coalesce_window > 0 else None
+        # Copy-on-write tuple so broadcast can iterate without holding the lock
+        self.subscribers = ()
+        self._lock = threading.Lock()
+        # Serializes sequence assignment and fan-out so every client sees events in order
+        self._publish_lock = threading.Lock()
         self.simulation_enabled = True
         self.simulation_speed = 1.0
         self._simulation_thread = None
         self._running = False
+        self.events_published = 0
+        self.slow_consumer_disconnects = 0
+        self.replays = 0
+        self.resyncs = 0
+        self._snapshot_provider = None
+        self._snapshot_lock = nullcontext()
     
-    def subscribe(self, callback: Callable):
-        """Subscribe to updates."""
-        self.subscribers.append(callback)
-        return lambda: self.unsubscribe(callback)
+    def set_snapshot_provider(self, provider, lock=None):
+        """
+        Send new (or resyncing) subscribers a full snapshot before live deltas.
+        
+        ``lock`` must be the lock the data source holds while it mutates and
+        broadcasts, so the snapshot and the sequence it is tagged with agree.
+        """
+        self._snapshot_provider = provider
+        self._snapshot_lock = lock if lock is not None else nullcontext()
     
-    def unsubscribe(self, callback: Callable):
-        """Unsubscribe from updates."""
-        if callback in self.subscribers:
-            self.subscribers.remove(callback)
+    def subscribe(
+        self,
+        maxlen: Optional[int] = None,
+        policy: Optional[str] = None,
+        last_event_id: Optional[str] = None,
+    ) -> Subscription:
+        """
+        Subscribe to updates; returns the client's bounded queue of SSE frames.
+        
+        With ``last_event_id`` the queue starts with the frames missed since
+        that event, or is flagged ``resync_required`` if the gap is
+        no longer available.
+        """
+        subscription = Subscription(self, maxlen or self.buffer_size, policy or self.policy)
+        self._add(subscription, last_event_id)
+        return subscription
     
-    def broadcast(self, event: dict):
-        """Broadcast event to all subscribers."""
-        for callback in self.subscribers:
-            try:
-                callback(event)
-            except Exception as e:
-                print(f"Error broadcasting to subscriber: {e}")
+    def subscribe_async(
+        self,
+        maxlen: Optional[int] = None,
+        policy: Optional[str] = None,
+        last_event_id: Optional[str] = None,
+    ) -> AsyncSubscription:
+        """Subscribe from a running event loop; returns an awaitable bounded queue."""
+        subscription = AsyncSubscription(
+            self, maxlen or self.buffer_size, policy or self.policy, asyncio.get_running_loop()
+        )
+        self._add(subscription, last_event_id)
+        return subscription
     
-    def start_simulation(self, mock_service, interval: float = 2.0):
-        """Start background simulation thread."""
-        if self._running:
-            return
+    def _add(self, subscription: Subscription, last_event_id: Optional[str]):
+        # Holding the publish lock makes replay/snapshot + registration atomic w.r.t. broadcast
+        with self._snapshot_lock, self._publish_lock:
+            if last_event_id is not None:
+                frames = self.event_log.replay(last_event_id)
+                if frames is None or len(frames) > subscription.maxlen:
+                    subscription.resync_required = True
+                    self.resyncs += 1
+                else:
+                    subscription._events.extend(frames)
+                    self.replays += 1
+            if self._snapshot_provider is not None and (last_event_id is None or subscription.resync_required):
+                subscription.snapshot_frame = encode_frame(
+                    self.event_log.last_event_id, {"type": "snapshot", **self._snapshot_provider()}
+                )
+                subscription.resync_required = False
+            with self._lock:
+                self.subscribers = self.subscribers + (subscription,)
+    
+    def unsubscribe(self, subscription: Subscription):
+        """Unsubscribe from updates."""
+        with self._lock:
+            if subscription in self.subscribers:
+                self.subscribers = tuple(s for s in self.subscribers if s is not subscription)
+    
+    def broadcast(self, event: dict, coalesce_key=None) -> Optional[int]:
+        """
+        Broadcast event to all subscribers; returns its sequence number.
         
-        self._running = True
+        Events with a ``coalesce_key`` (high-frequency position updates) are
+        handed to the coalescer instead and go out in its next batch frame,
+        keeping only the latest event per key.
+        """
+        if coalesce_key is not None and self.coalescer is not None:
+            update = dict(event)
+            update.pop("type", None)
+            self.coalescer.submit(coalesce_key, update)
+            return None
+        with self._publish_lock:
+            seq, frame = self.event_log.append(event)
+            self.events_published += 1
+            for subscription in self.subscribers:
+                if not subscription.put(frame):
+                    if subscription.evicted:
+                        self.slow_consumer_disconnects += 1
+                    self.unsubscribe(subscription)
+        return seq
+    
+    def stats(self) -> dict:
+        """Current fan-out counters."""
+        subscribers = self.subscribers
+        return {
+            "subscribers": len(subscribers),
+            "events_published": self.events_published,
+            "events_dropped": sum(s.dropped for s in subscribers),
+            "slow_consumer_disconnects": self.slow_consumer_disconnects,
+            "epoch": self.event_log.epoch,
+            "last_seq": self.event_log.last_seq,
+            "replays": self.replays,
+            "resyncs": self.resyncs,
+            "coalescer": self.coalescer.stats() if self.coalescer is not None else None,
+        }
+    
+    def start_simulation(self, mock_service, interval: float = 2.0, event_type: str = "update"):
+        """Start background simulation thread (once per service)."""
+        with self._lock:
+            if self._running:
+                return
+            self._running = True
         
         def simulate():
             while self._running:
@@ -51,7 +267,7 @@ class RealtimeUpdateService:
                     update = mock_service.simulate_update()
                     if update:
                         self.broadcast({
-                            "type": "update",
+                            "type": event_type,
                             "data": update,
                             "timestamp": datetime.now().isoformat(),
                         })
@@ -70,13 +286,34 @@ class RealtimeUpdateService:
         self.simulation_enabled = enabled
 
 
-# Global instance
-_realtime_service = None
+# Global instances, one hub per stream ("mock" regional dashboard, "field" command view)
+_realtime_services = {}
+_realtime_service_lock = threading.Lock()
+
+
+def get_realtime_service(name: str = "mock") -> RealtimeUpdateService:
+    """Get or create the realtime service for a stream."""
+    service = _realtime_services.get(name)
+    if service is None:
+        from django.conf import settings
+
+        with _realtime_service_lock:
+            service = _realtime_services.get(name)
+            if service is None:
+                log_path = None
+                if settings.REALTIME_EVENT_LOG_DIR:
+                    os.makedirs(settings.REALTIME_EVENT_LOG_DIR, exist_ok=True)
+                    log_path = os.path.join(settings.REALTIME_EVENT_LOG_DIR, f"{name}.events.jsonl")
+                service = RealtimeUpdateService(
+                    buffer_size=settings.REALTIME_SUBSCRIBER_BUFFER,
+                    policy=settings.REALTIME_SLOW_CONSUMER_POLICY,
+                    event_log=EventLog(capacity=settings.REALTIME_EVENT_LOG_CAPACITY, path=log_path),
+                    coalesce_window=settings.REALTIME_COALESCE_WINDOW_MS / 1000,
+                )
+                _realtime_services[name] = service
+    return service
 
 
-def get_realtime_service() -> RealtimeUpdateService:
-    """Get or create realtime service."""
-    global _realtime_service
-    if _realtime_service is None:
-        _realtime_service = RealtimeUpdateService()
-    return _realtime_service
+def get_realtime_stats() -> dict:
+    """Fan-out, replay and coalescing counters for every stream in this process."""
+    return {name: service.stats() for name, service in list(_realtime_services.items())}
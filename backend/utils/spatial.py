@@ -0,0 +1,257 @@
+"""
+In-memory geospatial index for units.
+
+Points are bucketed into a uniform lat/lng grid. A k-nearest query scans
+rings of cells outward from the query cell and stops once the k-th best
+haversine distance is closer than anything an unscanned ring could hold, so
+it only touches the handful of cells around the query point.
+
+Units are kept in one grid per (type, availability_status) bucket so that
+"closest available EMS units" never scans busy or other-type units.
+"""
+import heapq
+import math
+import threading
+import time
+from datetime import timedelta
+from typing import Iterable, List, Optional, Tuple
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = math.pi * EARTH_RADIUS_KM / 180
+# Re-read this far back on each catch-up, for rows committed late by slower writers
+CATCH_UP_OVERLAP = timedelta(seconds=2)
+
+
+def haversine_km(lat1: float, lng1: float, lat2: float, lng2: float) -> float:
+    """Great-circle distance between two points in kilometres."""
+    phi1 = math.radians(lat1)
+    phi2 = math.radians(lat2)
+    dphi = phi2 - phi1
+    dlmb = math.radians(lng2 - lng1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlmb / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+class GridIndex:
+    """Uniform grid of points keyed by id, supporting upsert, remove and k-nearest."""
+
+    def __init__(self, cell_deg: float = 0.05):
+        self.cell_deg = cell_deg
+        self._cells = {}
+        self._points = {}
+        self._bounds = None
+
+    def __len__(self):
+        return len(self._points)
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lng / self.cell_deg))
+
+    def upsert(self, item_id, lat: float, lng: float):
+        cell = self._cell(lat, lng)
+        previous = self._points.get(item_id)
+        if previous is not None and previous[2] != cell:
+            self._discard(item_id, previous[2])
+        self._cells.setdefault(cell, {})[item_id] = (lat, lng)
+        self._points[item_id] = (lat, lng, cell)
+        if self._bounds is None:
+            self._bounds = [cell[0], cell[0], cell[1], cell[1]]
+        else:
+            b = self._bounds
+            b[0], b[1] = min(b[0], cell[0]), max(b[1], cell[0])
+            b[2], b[3] = min(b[2], cell[1]), max(b[3], cell[1])
+
+    def remove(self, item_id):
+        previous = self._points.pop(item_id, None)
+        if previous is not None:
+            self._discard(item_id, previous[2])
+
+    def _discard(self, item_id, cell):
+        members = self._cells.get(cell)
+        if members is not None:
+            members.pop(item_id, None)
+            if not members:
+                del self._cells[cell]
+
+    def _ring(self, cx: int, cy: int, r: int):
+        if r == 0:
+            yield (cx, cy)
+            return
+        for dx in range(-r, r + 1):
+            yield (cx + dx, cy - r)
+            yield (cx + dx, cy + r)
+        for dy in range(-r + 1, r):
+            yield (cx - r, cy + dy)
+            yield (cx + r, cy + dy)
+
+    def nearest(self, lat: float, lng: float, k: int) -> List[Tuple[float, object]]:
+        """Return up to ``k`` ``(distance_km, id)`` pairs, closest first."""
+        if not self._points or k <= 0:
+            return []
+        cx, cy = self._cell(lat, lng)
+        b = self._bounds
+        max_ring = max(abs(cx - b[0]), abs(cx - b[1]), abs(cy - b[2]), abs(cy - b[3]))
+        best = []  # max-heap of (-distance, id)
+        r = 0
+        while r <= max_ring:
+            for cell in self._ring(cx, cy, r):
+                members = self._cells.get(cell)
+                if not members:
+                    continue
+                for item_id, (plat, plng) in members.items():
+                    distance = haversine_km(lat, lng, plat, plng)
+                    if len(best) < k:
+                        heapq.heappush(best, (-distance, item_id))
+                    elif distance < -best[0][0]:
+                        heapq.heapreplace(best, (-distance, item_id))
+            if len(best) == k:
+                # Anything outside ring r is at least r cells away on one axis
+                widest_lat = min(89.0, abs(lat) + (r + 1) * self.cell_deg)
+                reach_km = r * self.cell_deg * KM_PER_DEGREE * math.cos(math.radians(widest_lat))
+                if -best[0][0] <= reach_km:
+                    break
+            r += 1
+        return sorted((-negative, item_id) for negative, item_id in best)
+
+
+class UnitSpatialIndex:
+    """Thread-safe unit index with one grid per (type, availability_status) bucket."""
+
+    def __init__(self, cell_deg: float = 0.05):
+        self.cell_deg = cell_deg
+        self._grids = {}
+        self._buckets = {}
+        self._lock = threading.RLock()
+        self.loaded_at = None
+        self.synced_at = None
+
+    def __len__(self):
+        return len(self._buckets)
+
+    def load(self, rows: Iterable[Tuple[int, float, float, str, str]]):
+        """Replace the contents with ``(id, lat, lng, type, availability_status)`` rows."""
+        grids, buckets = {}, {}
+        for unit_id, lat, lng, unit_type, status in rows:
+            key = (unit_type, status)
+            grid = grids.get(key)
+            if grid is None:
+                grid = grids[key] = GridIndex(self.cell_deg)
+            grid.upsert(unit_id, lat, lng)
+            buckets[unit_id] = key
+        with self._lock:
+            self._grids, self._buckets = grids, buckets
+            self.loaded_at = time.monotonic()
+
+    def upsert(self, unit_id: int, lat: float, lng: float, unit_type: str, status: str):
+        key = (unit_type, status)
+        with self._lock:
+            previous = self._buckets.get(unit_id)
+            if previous is not None and previous != key:
+                self._grids[previous].remove(unit_id)
+            grid = self._grids.get(key)
+            if grid is None:
+                grid = self._grids[key] = GridIndex(self.cell_deg)
+            grid.upsert(unit_id, lat, lng)
+            self._buckets[unit_id] = key
+
+    def remove(self, unit_id: int):
+        with self._lock:
+            key = self._buckets.pop(unit_id, None)
+            if key is not None:
+                self._grids[key].remove(unit_id)
+
+    def sync_from_db(self):
+        """Load every unit on first use, then only units changed or deleted since the last sync."""
+        from django.utils import timezone
+
+        from api.models import Tombstone, Unit
+
+        started = timezone.now()
+        fields = ("id", "location_lat", "location_lng", "type", "availability_status")
+        if self.synced_at is None:
+            self.load(Unit.objects.values_list(*fields))
+        else:
+            since = self.synced_at - CATCH_UP_OVERLAP
+            for row in Unit.objects.filter(updated_at__gte=since).values_list(*fields):
+                self.upsert(*row)
+            deleted = Tombstone.objects.filter(entity="unit", deleted_at__gte=since)
+            for unit_id in deleted.values_list("object_id", flat=True):
+                self.remove(unit_id)
+        self.synced_at = started
+        self.loaded_at = time.monotonic()
+
+    def nearest(
+        self,
+        lat: float,
+        lng: float,
+        k: int = 5,
+        unit_type: Optional[str] = None,
+        status: Optional[str] = "AVAILABLE",
+    ) -> List[Tuple[float, int]]:
+        """k nearest units to a point, optionally restricted to a type and availability status."""
+        with self._lock:
+            grids = [
+                grid
+                for (grid_type, grid_status), grid in self._grids.items()
+                if (unit_type is None or grid_type == unit_type) and (status is None or grid_status == status)
+            ]
+            if len(grids) == 1:
+                return grids[0].nearest(lat, lng, k)
+            return heapq.nsmallest(k, (hit for grid in grids for hit in grid.nearest(lat, lng, k)))
+
+
+_unit_index = None
+_unit_index_lock = threading.Lock()
+
+
+def get_unit_index(refresh: bool = True) -> Optional[UnitSpatialIndex]:
+    """
+    Process-wide unit index, loaded from the database on first use.
+
+    Writes in this process keep it current through model signals; writes
+    from other processes (e.g. the ingest runner) are picked up once it is
+    older than ``SPATIAL_INDEX_REFRESH_SECONDS`` by re-reading only the units
+    changed or deleted since the last sync. One request runs that catch-up
+    while concurrent ones keep querying the current index. With
+    ``refresh=False`` the index is returned as-is (None if never loaded).
+    """
+    global _unit_index
+    if not refresh:
+        return _unit_index
+
+    from django.conf import settings
+
+    max_age = settings.SPATIAL_INDEX_REFRESH_SECONDS
+    index = _unit_index
+    if index is not None and (not max_age or time.monotonic() - index.loaded_at < max_age):
+        return index
+
+    # Only the first load makes callers wait; later catch-ups are skipped if one is running
+    if not _unit_index_lock.acquire(blocking=index is None):
+        return index
+    try:
+        index = _unit_index
+        if index is None or (max_age and time.monotonic() - index.loaded_at >= max_age):
+            index = index or UnitSpatialIndex(cell_deg=settings.SPATIAL_INDEX_CELL_DEGREES)
+            index.sync_from_db()
+            _unit_index = index
+    finally:
+        _unit_index_lock.release()
+    return index
+
+
+def index_units(units: Iterable):
+    """Apply saved ``Unit`` objects to the index if this process has loaded one."""
+    index = get_unit_index(refresh=False)
+    if index is None:
+        return
+    for unit in units:
+        if unit.pk is not None:
+            index.upsert(unit.pk, unit.location_lat, unit.location_lng, unit.type, unit.availability_status)
+
+
+def unindex_unit(unit_id: int):
+    """Drop a deleted unit from the index if this process has loaded one."""
+    index = get_unit_index(refresh=False)
+    if index is not None:
+        index.remove(unit_id)
@@ -0,0 +1,241 @@
+"""
+Bounded in-memory time series for field incident metrics.
+
+Each series (e.g. one incident's ``estimated_casualties`` or one sector's
+``hazard_level``) is a set of NumPy rings, one per resolution tier (by
+default 1 s buckets for 15 minutes, 1 min for a day, 15 min for 30 days).
+A sample is folded into the current bucket of every tier at once, keeping
+its last, min, max, sum and count, so the coarse tiers are exact downsamples
+of the fine ones without a separate rollup pass. Rings start small and
+double as buckets fill, up to the tier's capacity; from then on old buckets
+are overwritten in place. Beyond ``TIMESERIES_MAX_SERIES`` the least
+recently written series is dropped, so memory is bounded however long an
+incident runs, and series that rarely change stay small.
+
+The store only holds what it is given and a restart starts empty: the
+field incident store keeps the samples in the database and feeds every
+process's store from there (``api.field_store``).
+
+Metrics are gauges sampled when they change: a bucket with no samples means
+the value did not change, and charts should step from the previous point.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# starts (int64) + last, min, max (float32) + sum (float64) + count (uint32)
+BUCKET_BYTES = 8 + 3 * 4 + 8 + 4
+# Buckets a ring is created with; it doubles up to its tier's capacity
+INITIAL_BUCKETS = 16
+
+
+def parse_tiers(value: str) -> List[Tuple[int, int]]:
+    """``"1:900,60:1440"`` -> ``[(1, 900), (60, 1440)]`` (resolution seconds, buckets kept), finest first."""
+    tiers = []
+    for part in value.split(","):
+        resolution, _, capacity = part.strip().partition(":")
+        tiers.append((int(resolution), int(capacity)))
+    return sorted(tiers)
+
+
+class _Ring:
+    """Ring of time buckets at one resolution, grown up to ``capacity``; the newest bucket is at ``head``."""
+
+    __slots__ = ("resolution", "capacity", "starts", "last", "low", "high", "total", "count", "head")
+
+    def __init__(self, resolution: int, capacity: int):
+        self.resolution = resolution
+        self.capacity = capacity
+        size = min(capacity, INITIAL_BUCKETS)
+        self.starts = np.full(size, -1, dtype=np.int64)
+        self.last = np.zeros(size, dtype=np.float32)
+        self.low = np.zeros(size, dtype=np.float32)
+        self.high = np.zeros(size, dtype=np.float32)
+        self.total = np.zeros(size, dtype=np.float64)
+        self.count = np.zeros(size, dtype=np.uint32)
+        self.head = -1
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.starts) * BUCKET_BYTES
+
+    def _grow(self):
+        """Double the buckets (up to ``capacity``); only called while the ring has not wrapped."""
+        extra = min(self.capacity, 2 * len(self.starts)) - len(self.starts)
+        self.starts = np.concatenate((self.starts, np.full(extra, -1, dtype=np.int64)))
+        for name in ("last", "low", "high", "total", "count"):
+            array = getattr(self, name)
+            setattr(self, name, np.concatenate((array, np.zeros(extra, dtype=array.dtype))))
+
+    def covers(self, start: int) -> bool:
+        """True unless buckets at or after ``start`` have already been overwritten."""
+        following = self.starts[(self.head + 1) % len(self.starts)]
+        # Not wrapped yet, so nothing has been overwritten
+        return following < 0 or following <= start
+
+    def add(self, at: int, value: float) -> bool:
+        """Fold a sample at epoch second ``at`` into its bucket; False if older than the newest bucket."""
+        bucket = at - at % self.resolution
+        i = self.head
+        if i < 0 or bucket > self.starts[i]:
+            i += 1
+            if i == len(self.starts):
+                if i < self.capacity:
+                    self._grow()
+                else:
+                    i = 0
+            self.head = i
+            self.starts[i] = bucket
+            self.last[i] = self.low[i] = self.high[i] = value
+            self.total[i] = value
+            self.count[i] = 1
+            return True
+        if bucket < self.starts[i]:
+            # Late samples would need a search and would reorder "last"; drop them
+            return False
+        self.last[i] = value
+        self.low[i] = min(self.low[i], value)
+        self.high[i] = max(self.high[i], value)
+        self.total[i] += value
+        self.count[i] += 1
+        return True
+
+    def range(self, start: float, end: float) -> List[Dict]:
+        """Buckets starting in ``[start, end)``, oldest first."""
+        mask = (self.starts >= start) & (self.starts < end)
+        index = np.flatnonzero(mask)
+        index = index[np.argsort(self.starts[index], kind="stable")]
+        return [
+            {
+                "t": int(self.starts[i]),
+                "last": float(self.last[i]),
+                "min": float(self.low[i]),
+                "max": float(self.high[i]),
+                "mean": round(float(self.total[i] / self.count[i]), 3),
+                "samples": int(self.count[i]),
+            }
+            for i in index
+        ]
+
+
+class _Series:
+    __slots__ = ("rings", "latest")
+
+    def __init__(self, tiers):
+        self.rings = [_Ring(resolution, capacity) for resolution, capacity in tiers]
+        self.latest = None
+
+
+class TimeSeriesStore:
+    """Named series of gauge samples with tiered, bounded history."""
+
+    def __init__(self, tiers: Sequence[Tuple[int, int]], max_series: int):
+        self.tiers = list(tiers)
+        self.max_series = max_series
+        self._lock = threading.Lock()
+        self._series: "OrderedDict[tuple, _Series]" = OrderedDict()
+        self.samples = 0
+        self.late_samples = 0
+        self.evicted = 0
+
+    @property
+    def retention(self) -> int:
+        """Seconds of history the coarsest tier can hold."""
+        return max(resolution * capacity for resolution, capacity in self.tiers)
+
+    def record(self, key: tuple, value: float, at: Optional[float] = None):
+        """Append a sample to series ``key`` (created on first use) at epoch ``at`` (default now)."""
+        at = int(time.time() if at is None else at)
+        value = float(value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(self.tiers)
+                while len(self._series) > self.max_series:
+                    self._series.popitem(last=False)
+                    self.evicted += 1
+            else:
+                self._series.move_to_end(key)
+            accepted = False
+            for ring in series.rings:
+                accepted = ring.add(at, value) or accepted
+            if accepted:
+                series.latest = value
+                self.samples += 1
+            else:
+                self.late_samples += 1
+
+    def record_many(self, samples: Dict[tuple, float], at: Optional[float] = None):
+        """Record several ``{key: value}`` samples at the same time."""
+        for key, value in samples.items():
+            self.record(key, value, at)
+
+    def latest(self, key: tuple) -> Optional[float]:
+        with self._lock:
+            series = self._series.get(key)
+            return series.latest if series is not None else None
+
+    def keys(self, prefix: tuple = ()) -> List[tuple]:
+        """Keys of the series starting with ``prefix``."""
+        with self._lock:
+            return [key for key in self._series if key[: len(prefix)] == prefix]
+
+    def query(self, key: tuple, start: float, end: float, resolution: Optional[int] = None) -> Optional[Dict]:
+        """
+        Buckets of series ``key`` in ``[start, end)`` (epoch seconds).
+
+        Args:
+            resolution: tier to read (seconds); by default the finest tier
+                that still holds everything since ``start``, else the coarsest
+
+        Returns:
+            ``{"resolution", "points": [{"t", "last", "min", "max", "mean", "samples"}]}``,
+            or None if there is no such series
+
+        Raises:
+            ValueError: ``resolution`` is not one of the configured tiers
+        """
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                return None
+            if resolution is not None:
+                rings = [ring for ring in series.rings if ring.resolution == resolution]
+                if not rings:
+                    raise ValueError(f"resolution must be one of {', '.join(str(r) for r, _ in self.tiers)}.")
+                ring = rings[0]
+            else:
+                ring = next((ring for ring in series.rings if ring.covers(start)), series.rings[-1])
+            return {"resolution": ring.resolution, "points": ring.range(start, end)}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                "series": len(self._series),
+                "max_series": self.max_series,
+                "max_bytes_per_series": sum(capacity for _, capacity in self.tiers) * BUCKET_BYTES,
+                "bytes": sum(ring.nbytes for series in self._series.values() for ring in series.rings),
+                "samples": self.samples,
+                "late_samples": self.late_samples,
+                "evicted": self.evicted,
+            }
+
+
+# Global instance
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_timeseries() -> TimeSeriesStore:
+    """This process's metric history, configured by ``TIMESERIES_TIERS`` and ``TIMESERIES_MAX_SERIES``."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                from django.conf import settings
+
+                _store = TimeSeriesStore(parse_tiers(settings.TIMESERIES_TIERS), settings.TIMESERIES_MAX_SERIES)
+    return _store
@@ -0,0 +1,381 @@
+"""
+Columnar, delta-encoded unit position history.
+
+Each unit's track is a list of sealed chunks plus a small append buffer.
+Fixes are quantized to milliseconds and micro-degrees (about 0.1 m) and
+appended to the buffer as plain integers, which keeps the write path to a few
+list appends. Every ``CHUNK_SIZE`` fixes the buffer is sealed into a chunk:
+the first fix in full, then NumPy arrays of the differences between
+consecutive timestamps, latitudes and longitudes, each stored in the
+smallest integer type that holds them. A moving unit's deltas usually fit
+in 16 bits, so a fix costs about 6 bytes instead of 24.
+
+Reads decode only the chunks overlapping the requested window (a cumulative
+sum per column). ``simplify`` applies Douglas-Peucker to a decoded track for
+map rendering, and ``TrackStore.playback`` samples every unit's position at
+fixed steps for after-action replay.
+
+Tracks are append-only and time-ordered: a fix older than the unit's last
+one is dropped, as is a fix at the same position (a stationary unit adds
+nothing). The oldest chunks are dropped once a unit holds more than
+``TRACK_MAX_FIXES_PER_UNIT`` fixes.
+
+Database units are saved by several processes (web workers, the ingest
+runner), so their positions are stored as ``UnitPosition`` rows on every
+save (``record_units``), kept for ``TRACK_RETENTION_DAYS``. Each process's
+``units`` store is a cache of those rows: reads first append the rows stored
+since the previous read (``get_unit_tracks``), so every worker serves the
+same history and a restart reloads it. Mock units live in one process and
+feed their store directly.
+"""
+import threading
+import time
+from bisect import bisect_left
+from datetime import timedelta
+from itertools import islice
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+CHUNK_SIZE = 1024
+SCALE = 1_000_000  # micro-degrees
+METERS_PER_DEGREE = 111_320.0
+_INT_TYPES = (np.int8, np.int16, np.int32, np.int64)
+# Stored positions are re-read this far back, for saves that committed after a read
+CATCH_UP_OVERLAP = timedelta(seconds=2)
+# Stored positions between retention passes
+PRUNE_EVERY = 1000
+
+
+def _narrow(deltas: np.ndarray) -> np.ndarray:
+    """Deltas in the smallest integer type that holds them."""
+    if not len(deltas):
+        return deltas.astype(np.int8)
+    low, high = int(deltas.min()), int(deltas.max())
+    for dtype in _INT_TYPES:
+        info = np.iinfo(dtype)
+        if info.min <= low and high <= info.max:
+            return deltas.astype(dtype)
+    return deltas
+
+
+class _Chunk:
+    """Sealed fixes: the first one in full, then per-column deltas."""
+
+    __slots__ = ("start", "end", "first", "deltas", "size")
+
+    def __init__(self, times: List[int], lats: List[int], lngs: List[int]):
+        columns = [np.asarray(values, dtype=np.int64) for values in (times, lats, lngs)]
+        self.start, self.end = times[0], times[-1]
+        self.first = tuple(int(column[0]) for column in columns)
+        self.deltas = tuple(_narrow(np.diff(column)) for column in columns)
+        self.size = len(times)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(column.nbytes for column in self.deltas) + 24
+
+    def decode(self):
+        """``(times, lats, lngs)`` as int64 arrays."""
+        decoded = []
+        for first, deltas in zip(self.first, self.deltas):
+            column = np.empty(self.size, dtype=np.int64)
+            column[0] = first
+            np.cumsum(deltas, dtype=np.int64, out=column[1:])
+            column[1:] += first
+            decoded.append(column)
+        return decoded
+
+
+class _Track:
+    __slots__ = ("chunks", "times", "lats", "lngs", "size", "last")
+
+    def __init__(self):
+        self.chunks: List[_Chunk] = []
+        self.times: List[int] = []
+        self.lats: List[int] = []
+        self.lngs: List[int] = []
+        self.size = 0
+        self.last = None
+
+    def seal(self, max_fixes: int):
+        self.chunks.append(_Chunk(self.times, self.lats, self.lngs))
+        self.times, self.lats, self.lngs = [], [], []
+        while max_fixes and len(self.chunks) > 1 and self.size - self.chunks[0].size >= max_fixes:
+            self.size -= self.chunks.pop(0).size
+
+    def window(self, start: int, end: int, previous: bool = False):
+        """
+        Fixes with ``start <= t <= end`` as int64 ``(times, lats, lngs)``.
+
+        With ``previous`` the last fix before ``start`` is included too, so
+        positions can be sampled from the start of the window.
+        """
+        first = bisect_left([chunk.end for chunk in self.chunks], start)
+        if previous and first:
+            first -= 1
+        parts = []
+        for chunk in islice(self.chunks, first, None):
+            if chunk.start > end:
+                break
+            parts.append(chunk.decode())
+        if self.times and self.times[0] <= end:
+            parts.append([np.asarray(values, dtype=np.int64) for values in (self.times, self.lats, self.lngs)])
+        if not parts:
+            return [np.empty(0, dtype=np.int64)] * 3
+        times, lats, lngs = (np.concatenate(columns) for columns in zip(*parts))
+        low = np.searchsorted(times, start, side="left")
+        if previous and low:
+            low -= 1
+        high = np.searchsorted(times, end, side="right")
+        return times[low:high], lats[low:high], lngs[low:high]
+
+
+def simplify(lats: np.ndarray, lngs: np.ndarray, tolerance_m: float) -> np.ndarray:
+    """
+    Douglas-Peucker: indices of the points to keep so no dropped point lies
+    further than ``tolerance_m`` metres from the simplified line.
+
+    Coordinates are projected to local metres (equirectangular around the
+    mean latitude), which is accurate at the scale of one incident area.
+    """
+    count = len(lats)
+    if count <= 2 or tolerance_m <= 0:
+        return np.arange(count)
+    y = np.asarray(lats, dtype=np.float64) * METERS_PER_DEGREE
+    x = np.asarray(lngs, dtype=np.float64) * METERS_PER_DEGREE * np.cos(np.radians(np.mean(lats)))
+    keep = np.zeros(count, dtype=bool)
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        dx, dy = x[last] - x[first], y[last] - y[first]
+        px, py = x[first + 1:last] - x[first], y[first + 1:last] - y[first]
+        length = np.hypot(dx, dy)
+        if length == 0:
+            distances = np.hypot(px, py)
+        else:
+            distances = np.abs(dx * py - dy * px) / length
+        farthest = int(np.argmax(distances))
+        if distances[farthest] > tolerance_m:
+            split = first + 1 + farthest
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return np.flatnonzero(keep)
+
+
+class TrackStore:
+    """Append-only position history for a set of units, keyed by unit id."""
+
+    def __init__(self, max_fixes_per_unit: int = 0):
+        self.max_fixes_per_unit = max_fixes_per_unit
+        self._lock = threading.Lock()
+        self._tracks: Dict[object, _Track] = {}
+        self.appended = 0
+        self.skipped = 0
+        # Stored positions appended so far: up to when, and the ids within the overlap
+        self._sync_lock = threading.Lock()
+        self.synced_at = None
+        self._synced_ids = set()
+
+    def append(self, unit_id, lat: float, lng: float, at: Optional[float] = None) -> bool:
+        """Record a fix at epoch seconds ``at`` (default now); False if it was late or unchanged."""
+        ms = int((time.time() if at is None else at) * 1000)
+        qlat, qlng = round(lat * SCALE), round(lng * SCALE)
+        with self._lock:
+            track = self._tracks.get(unit_id)
+            if track is None:
+                track = self._tracks[unit_id] = _Track()
+            last = track.last
+            if last is not None and (ms < last[0] or (last[1] == qlat and last[2] == qlng)):
+                self.skipped += 1
+                return False
+            track.last = (ms, qlat, qlng)
+            track.times.append(ms)
+            track.lats.append(qlat)
+            track.lngs.append(qlng)
+            track.size += 1
+            self.appended += 1
+            if len(track.times) >= CHUNK_SIZE:
+                track.seal(self.max_fixes_per_unit)
+            return True
+
+    def append_many(self, fixes: Iterable, at: Optional[float] = None):
+        """Record ``(unit_id, lat, lng)`` fixes taken at the same time."""
+        for unit_id, lat, lng in fixes:
+            self.append(unit_id, lat, lng, at)
+
+    def sync_from_db(self):
+        """
+        Append the ``UnitPosition`` rows stored since the last sync, by any process.
+
+        The first sync reads back ``TRACK_RETENTION_DAYS``. Later syncs re-read
+        ``CATCH_UP_OVERLAP`` before the previous one and skip the rows already
+        appended.
+        """
+        from django.conf import settings
+        from django.utils import timezone
+
+        from api.models import UnitPosition
+
+        with self._sync_lock:
+            started = timezone.now()
+            rows = UnitPosition.objects.order_by("recorded_at", "id")
+            if self.synced_at is not None:
+                rows = rows.filter(recorded_at__gte=self.synced_at - CATCH_UP_OVERLAP)
+            elif settings.TRACK_RETENTION_DAYS:
+                rows = rows.filter(recorded_at__gte=started - timedelta(days=settings.TRACK_RETENTION_DAYS))
+            horizon = started - CATCH_UP_OVERLAP
+            seen = set()
+            fields = ("id", "unit_id", "location_lat", "location_lng", "recorded_at")
+            for pk, unit_id, lat, lng, at in rows.values_list(*fields).iterator(chunk_size=2000):
+                if at >= horizon:
+                    seen.add(pk)
+                if pk not in self._synced_ids:
+                    self.append(unit_id, lat, lng, at.timestamp())
+            self._synced_ids = seen
+            self.synced_at = started
+
+    def unit_ids(self) -> List:
+        with self._lock:
+            return list(self._tracks)
+
+    def track(self, unit_id, start: float, end: float, tolerance_m: float = 0, limit: int = 0) -> Optional[Dict]:
+        """
+        One unit's fixes between epoch seconds ``start`` and ``end``.
+
+        Args:
+            tolerance_m: simplify with Douglas-Peucker at this many metres (0 keeps every fix)
+            limit: keep only the newest ``limit`` points after simplification (0 keeps all)
+
+        Returns:
+            ``{"unit_id", "fixes", "points": [[epoch ms, lat, lng], ...], "last_known"}``
+            with points oldest first, ``fixes`` counting them before
+            simplification and ``last_known`` the newest fix up to ``end``,
+            even before ``start`` (a unit that did not move in the window);
+            None if the unit has no track
+        """
+        start_ms = int(start * 1000)
+        with self._lock:
+            track = self._tracks.get(unit_id)
+            if track is None:
+                return None
+            times, lats, lngs = track.window(start_ms, int(end * 1000), previous=True)
+        last_known = [int(times[-1]), int(lats[-1]) / SCALE, int(lngs[-1]) / SCALE] if len(times) else None
+        if len(times) and times[0] < start_ms:
+            times, lats, lngs = times[1:], lats[1:], lngs[1:]
+        fixes = len(times)
+        if tolerance_m:
+            keep = simplify(lats / SCALE, lngs / SCALE, tolerance_m)
+            times, lats, lngs = times[keep], lats[keep], lngs[keep]
+        if limit:
+            times, lats, lngs = times[-limit:], lats[-limit:], lngs[-limit:]
+        points = [list(point) for point in zip(times.tolist(), (lats / SCALE).tolist(), (lngs / SCALE).tolist())]
+        return {"unit_id": unit_id, "fixes": fixes, "points": points, "last_known": last_known}
+
+    def playback(self, start: float, end: float, step: float, unit_ids: Optional[Iterable] = None) -> Dict:
+        """
+        Every unit's last known position at ``start``, ``start + step``, ... up to ``end``.
+
+        Returns:
+            ``{"times": [epoch ms, ...], "units": {unit_id: [[lat, lng] or None, ...]}}``
+            with one entry per frame time (None before a unit's first fix)
+        """
+        frames = np.arange(int(start * 1000), int(end * 1000) + 1, max(int(step * 1000), 1), dtype=np.int64)
+        with self._lock:
+            wanted = list(self._tracks) if unit_ids is None else [u for u in unit_ids if u in self._tracks]
+            windows = {
+                unit_id: self._tracks[unit_id].window(int(frames[0]), int(frames[-1]), previous=True)
+                for unit_id in wanted
+            } if len(frames) else {}
+        units = {}
+        for unit_id, (times, lats, lngs) in windows.items():
+            if not len(times):
+                continue
+            index = np.searchsorted(times, frames, side="right") - 1
+            positions = np.column_stack((lats[index] / SCALE, lngs[index] / SCALE)).tolist()
+            units[unit_id] = [position if i >= 0 else None for i, position in zip(index, positions)]
+        return {"times": frames.tolist(), "units": units}
+
+    def stats(self) -> Dict:
+        with self._lock:
+            sealed = sum(chunk.nbytes for track in self._tracks.values() for chunk in track.chunks)
+            buffered = sum(len(track.times) for track in self._tracks.values())
+            fixes = sum(track.size for track in self._tracks.values())
+        return {
+            "units": len(self._tracks),
+            "fixes": fixes,
+            "buffered_fixes": buffered,
+            "sealed_bytes": sealed,
+            "appended": self.appended,
+            "skipped": self.skipped,
+        }
+
+
+# Stores by name: "units" (database units) and "mock" (demo units)
+_track_stores: Dict[str, TrackStore] = {}
+_track_store_lock = threading.Lock()
+
+
+def get_track_store(name: str = "units") -> TrackStore:
+    """Get or create the track store for a set of units."""
+    store = _track_stores.get(name)
+    if store is None:
+        from django.conf import settings
+
+        with _track_store_lock:
+            store = _track_stores.get(name)
+            if store is None:
+                store = _track_stores[name] = TrackStore(settings.TRACK_MAX_FIXES_PER_UNIT)
+    return store
+
+
+def get_unit_tracks() -> TrackStore:
+    """The ``units`` track store, caught up with the positions stored by every process."""
+    store = get_track_store("units")
+    store.sync_from_db()
+    return store
+
+
+_recorded = 0
+
+
+def record_units(units: Iterable):
+    """Store the current position of saved ``Unit`` rows (read back by ``get_unit_tracks``)."""
+    global _recorded
+    from django.utils import timezone
+
+    from api.models import UnitPosition
+
+    now = timezone.now()
+    positions = UnitPosition.objects.bulk_create(
+        UnitPosition(unit_id=unit.pk, location_lat=unit.location_lat, location_lng=unit.location_lng, recorded_at=now)
+        for unit in units
+    )
+    with _track_store_lock:
+        before = _recorded
+        _recorded = after = before + len(positions)
+    if before // PRUNE_EVERY != after // PRUNE_EVERY:
+        prune_unit_positions()
+
+
+def prune_unit_positions():
+    """
+    Delete stored unit positions older than ``TRACK_RETENTION_DAYS`` (0 keeps all).
+
+    Returns:
+        Number of positions deleted
+    """
+    from django.conf import settings
+    from django.utils import timezone
+
+    from api.models import UnitPosition
+
+    if not settings.TRACK_RETENTION_DAYS:
+        return 0
+    cutoff = timezone.now() - timedelta(days=settings.TRACK_RETENTION_DAYS)
+    deleted, _ = UnitPosition.objects.filter(recorded_at__lt=cutoff).delete()
+    return deleted
@@ -21,6 +21,20 @@ export const login = async (username, password) => {
   return res.data;
 };
 
+// Every row of a cursor-paginated list endpoint (e.g. "/incidents/"), following `next`
+// until it is null; pages are requested at the server's maximum size
+export const getAllPages = async (path, params = {}) => {
+  const rows = [];
+  let res = await api.get(path, { params: { page_size: 1000, ...params } });
+  rows.push(...res.data.results);
+  while (res.data.next) {
+    // `next` is absolute and already carries the cursor and params
+    res = await api.get(res.data.next);
+    rows.push(...res.data.results);
+  }
+  return rows;
+};
+
 // Mock Data API - Incidents
 export const getIncidents = async () => {
   const res = await api.get("/mock/incidents/");
@@ -58,6 +72,24 @@ export const getUnits = async () => {
   return res.data;
 };
 
+// Unit position history: { start, end, tolerance (metres), limit }
+export const getUnitTrack = async (unitId, params = {}) => {
+  const res = await api.get(`/mock/units/${unitId}/track/`, { params });
+  return res.data;
+};
+
+// Every unit's position per frame for replay: { start, end, step (seconds), units }
+export const getUnitsPlayback = async (params = {}) => {
+  const res = await api.get("/mock/units/playback/", { params });
+  return res.data;
+};
+
+// Map clusters for a viewport: { bbox: "min_lat,min_lng,max_lat,max_lng", zoom, layers }
+export const getMapClusters = async (params) => {
+  const res = await api.get("/mock/map/clusters/", { params });
+  return res.data;
+};
+
 // Mock Data API - Events
 export const getEvents = async (limit = 50) => {
   const res = await api.get("/mock/events/", { params: { limit } });
@@ -70,12 +102,23 @@ export const simulateUpdate = async () => {
   return res.data;
 };
 
+// Dashboard counters, maintained server-side on every write
+export const getKpis = async () => {
+  const res = await api.get("/kpis/");
+  return res.data;
+};
+
 /**
  * Connect to Server-Sent Events stream for real-time updates.
  * Returns an EventSource instance that can be listened to.
+ *
+ * The browser resends the last event id when it reconnects on its own; pass
+ * it as ``lastEventId`` when opening a new EventSource after a failure so the
+ * server replays only what was missed.
  */
-export const connectToUpdatesStream = () => {
-  const url = `${API_BASE_URL}/mock/updates/stream/`;
+export const connectToUpdatesStream = (lastEventId) => {
+  const query = lastEventId ? `?last_event_id=${encodeURIComponent(lastEventId)}` : "";
+  const url = `${API_BASE_URL}/mock/updates/stream/${query}`;
   const eventSource = new EventSource(url);
   return eventSource;
 };
@@ -84,63 +127,84 @@ export const connectToUpdatesStream = () => {
 // FIELD INCIDENT COMMAND DASHBOARD API
 // ============================================
 
+// Field endpoints for one major incident, or the oldest active one when no id is given
+const fieldPath = (incidentId, path) =>
+  incidentId ? `/field/incidents/${incidentId}${path}` : `/field${path === "/" ? "/incident/" : path}`;
+
+// List major incidents (e.g. { status: "ACTIVE" })
+export const getFieldIncidents = async (params = {}) => {
+  const res = await api.get("/field/incidents/", { params });
+  return res.data;
+};
+
 // Get major incident with all data
-export const getFieldIncident = async () => {
-  const res = await api.get("/field/incident/");
+export const getFieldIncident = async (incidentId) => {
+  const res = await api.get(fieldPath(incidentId, "/"));
   return res.data;
 };
 
-// Get sectors for current incident
-export const getFieldIncidentSectors = async () => {
-  const res = await api.get("/field/sectors/");
+// Get sectors for an incident
+export const getFieldIncidentSectors = async (incidentId) => {
+  const res = await api.get(fieldPath(incidentId, "/sectors/"));
   return res.data;
 };
 
-// Get task groups for current incident
-export const getFieldIncidentTaskGroups = async () => {
-  const res = await api.get("/field/task-groups/");
+// Get task groups for an incident
+export const getFieldIncidentTaskGroups = async (incidentId) => {
+  const res = await api.get(fieldPath(incidentId, "/task-groups/"));
   return res.data;
 };
 
 // Get operational timeline events
-export const getFieldIncidentEvents = async () => {
-  const res = await api.get("/field/events/");
+export const getFieldIncidentEvents = async (incidentId) => {
+  const res = await api.get(fieldPath(incidentId, "/events/"));
+  return res.data;
+};
+
+// Metric history for charts: { start, end, metric, sector, resolution } (all optional)
+export const getFieldIncidentHistory = async (incidentId, params = {}) => {
+  const res = await api.get(fieldPath(incidentId, "/history/"), { params });
   return res.data;
 };
 
-// Update sector
-export const updateFieldSector = async (sectorId, updates) => {
-  const res = await api.patch(`/field/sectors/${sectorId}/`, updates);
+// Update sector by id
+export const updateFieldSector = async (incidentId, sectorId, updates) => {
+  const res = await api.patch(fieldPath(incidentId, `/sectors/${sectorId}/`), updates);
   return res.data;
 };
 
-// Update task group
-export const updateFieldTaskGroup = async (taskGroupId, updates) => {
-  const res = await api.patch(`/field/task-groups/${taskGroupId}/`, updates);
+// Update task group by id
+export const updateFieldTaskGroup = async (incidentId, taskGroupId, updates) => {
+  const res = await api.patch(fieldPath(incidentId, `/task-groups/${taskGroupId}/`), updates);
   return res.data;
 };
 
 // Update casualty estimates
-export const updateFieldCasualties = async (updates) => {
-  const res = await api.patch("/field/casualty-update/", updates);
+export const updateFieldCasualties = async (incidentId, updates) => {
+  const res = await api.patch(fieldPath(incidentId, "/casualty-update/"), updates);
   return res.data;
 };
 
 // Add event to timeline
-export const addFieldEvent = async (eventData) => {
-  const res = await api.post("/field/add-event/", eventData);
+export const addFieldEvent = async (incidentId, eventData) => {
+  const res = await api.post(fieldPath(incidentId, "/add-event/"), eventData);
   return res.data;
 };
 
 // Simulate update to field incident
-export const simulateFieldIncidentUpdate = async () => {
-  const res = await api.get("/field/simulate/");
+export const simulateFieldIncidentUpdate = async (incidentId) => {
+  const res = await api.get(fieldPath(incidentId, "/simulate/"));
   return res.data;
 };
 
-// Connect to field incident real-time stream
-export const connectToFieldIncidentStream = () => {
-  const url = `${API_BASE_URL}/field/updates/stream/`;
+// Connect to field incident real-time stream, filtered to one incident when an id is given,
+// resuming after ``lastEventId`` (see connectToUpdatesStream)
+export const connectToFieldIncidentStream = (incidentId, lastEventId) => {
+  const params = new URLSearchParams();
+  if (incidentId) params.set("incident", incidentId);
+  if (lastEventId) params.set("last_event_id", lastEventId);
+  const query = params.toString() ? `?${params}` : "";
+  const url = `${API_BASE_URL}/field/updates/stream/${query}`;
   const eventSource = new EventSource(url);
   return eventSource;
 };
@@ -1,47 +1,63 @@
-import React from 'react';
+import React, { useEffect, useRef, useState } from 'react';
 import { useDashboardStore } from '../store/dashboard.js';
+import { getKpis } from '../api/client.js';
+
+// Realtime updates arrive many times a second; refetch counters at most this often
+const KPI_REFRESH_MS = 1000;
 
 /**
  * KPI Cards Component - displays key metrics
+ *
+ * Counts come from /api/kpis/, which the server keeps up to date on every
+ * write and serves from per-key counters, without reading incident or unit rows.
  */
 export function KPICards() {
-  const incidents = useDashboardStore((state) => state.incidents);
-  const units = useDashboardStore((state) => state.units);
-  
-  // Calculate KPIs
-  const totalIncidents = incidents.length;
-  const activeIncidents = incidents.filter(
-    (inc) => inc.status !== 'CLOSED'
-  ).length;
-  const criticalIncidents = incidents.filter(
-    (inc) => inc.severity === 'CRITICAL'
-  ).length;
-  const availableUnits = units.filter(
-    (unit) => unit.status === 'Available'
-  ).length;
+  const lastUpdateTime = useDashboardStore((state) => state.lastUpdateTime);
+  const [counters, setCounters] = useState(null);
+  const pending = useRef(null);
+
+  useEffect(() => {
+    if (pending.current) return undefined;
+    pending.current = setTimeout(async () => {
+      try {
+        const data = await getKpis();
+        setCounters(data.mock);
+      } catch (error) {
+        console.error('Failed to load KPIs:', error);
+      } finally {
+        pending.current = null;
+      }
+    }, counters ? KPI_REFRESH_MS : 0);
+    return undefined;
+  }, [lastUpdateTime]);
+
+  useEffect(() => () => clearTimeout(pending.current), []);
+
+  const incidents = counters?.incidents;
+  const units = counters?.units;
 
   const kpis = [
     {
       label: 'Total Incidents',
-      value: totalIncidents,
+      value: incidents?.total ?? '—',
       color: '#3b82f6',
       icon: '📋',
     },
     {
       label: 'Active Incidents',
-      value: activeIncidents,
+      value: incidents?.open ?? '—',
       color: '#f59e0b',
       icon: '🔴',
     },
     {
       label: 'Critical',
-      value: criticalIncidents,
+      value: incidents?.by_severity?.CRITICAL ?? (incidents ? 0 : '—'),
       color: '#ef4444',
       icon: '⚠️',
     },
     {
       label: 'Available Units',
-      value: availableUnits,
+      value: units?.available ?? '—',
       color: '#10b981',
       icon: '🚑',
     },
@@ -1,23 +1,101 @@
-import React, { useEffect, useRef } from 'react';
+import React, { useCallback, useEffect, useMemo, useRef, useState } from 'react';
 import L from 'leaflet';
 import 'leaflet/dist/leaflet.css';
 import { useDashboardStore } from '../store/dashboard.js';
+import { getMapClusters } from '../api/client.js';
+
+// Realtime updates arrive many times a second; refetch clusters at most this often
+const CLUSTER_REFRESH_MS = 1000;
+
+const SEVERITY_COLORS = {
+  CRITICAL: '#ef4444',
+  HIGH: '#f59e0b',
+  MED: '#eab308',
+  LOW: '#3b82f6',
+};
+
+const UNIT_ICONS = {
+  Ambulance: '🚑',
+  Police: '🚓',
+  Fire: '🚒',
+  Rescue: '🆘',
+};
+
+const STATUS_COLORS = {
+  Available: '#10b981',
+  Dispatched: '#f59e0b',
+  OnScene: '#ef4444',
+  Offline: '#6b7280',
+};
+
+const clusterSize = (count) => Math.min(28 + Math.round(Math.log10(count) * 12), 60);
+
+const clusterIcon = (count, className, style) => {
+  const size = clusterSize(count);
+  return L.divIcon({
+    html: `<div class="${className}" style="width: ${size}px; height: ${size}px; ${style}">${count}</div>`,
+    className: '',
+    iconSize: [size, size],
+  });
+};
+
+// Colour of the worst severity in an incident cluster
+const worstSeverityColor = (bySeverity) => {
+  const worst = Object.keys(SEVERITY_COLORS).find((severity) => bySeverity[severity]);
+  return SEVERITY_COLORS[worst] || '#6b7280';
+};
 
 /**
  * Map View Component - displays incidents and units on map
+ *
+ * Markers come from /api/mock/map/clusters/ for the visible bounds and zoom,
+ * so the number drawn depends on the viewport, not on how many incidents and
+ * units exist. Crowded areas show one circle per cluster (click to zoom in);
+ * single incidents and units keep their usual markers.
  */
 export function MapView() {
   const mapRef = useRef(null);
   const mapInstanceRef = useRef(null);
-  const markersRef = useRef({});
-  
+  const layerRef = useRef(null);
+  const pending = useRef(null);
+  const [clusters, setClusters] = useState(null);
+
   const {
     incidents,
     units,
+    lastUpdateTime,
     selectedIncidentId,
     setSelectedIncident,
   } = useDashboardStore();
 
+  const incidentsById = useMemo(() => new Map(incidents.map((item) => [item.id, item])), [incidents]);
+  const unitsById = useMemo(() => new Map(units.map((item) => [item.id, item])), [units]);
+
+  const fetchClusters = useCallback(async () => {
+    const map = mapInstanceRef.current;
+    if (!map) return;
+    const bounds = map.getBounds();
+    const zoom = map.getZoom();
+    try {
+      const data = await getMapClusters({
+        // Leaflet reports longitudes past +-180 when panned around the world
+        bbox: [
+          Math.max(bounds.getSouth(), -90),
+          Math.max(bounds.getWest(), -180),
+          Math.min(bounds.getNorth(), 90),
+          Math.min(bounds.getEast(), 180),
+        ].join(','),
+        zoom,
+      });
+      // Drop responses for a view the user has already left
+      if (mapInstanceRef.current === map && map.getZoom() === zoom) {
+        setClusters(data);
+      }
+    } catch (error) {
+      console.error('Failed to load map clusters:', error);
+    }
+  }, []);
+
   // Initialize map
   useEffect(() => {
     if (mapInstanceRef.current) return; // Already initialized
@@ -29,35 +107,60 @@ export function MapView() {
       maxZoom: 19,
     }).addTo(map);
 
+    layerRef.current = L.layerGroup().addTo(map);
+    map.on('moveend', fetchClusters);
+
     mapInstanceRef.current = map;
+    fetchClusters();
 
     return () => {
+      clearTimeout(pending.current);
       if (mapInstanceRef.current) {
         mapInstanceRef.current.remove();
         mapInstanceRef.current = null;
       }
     };
-  }, []);
+  }, [fetchClusters]);
+
+  // Refetch when the data changes, throttled
+  useEffect(() => {
+    if (pending.current || !lastUpdateTime) return;
+    pending.current = setTimeout(() => {
+      pending.current = null;
+      fetchClusters();
+    }, CLUSTER_REFRESH_MS);
+  }, [lastUpdateTime, fetchClusters]);
 
   // Update markers
   useEffect(() => {
     const map = mapInstanceRef.current;
-    if (!map) return;
+    const layer = layerRef.current;
+    if (!map || !layer || !clusters) return;
 
-    // Clear existing markers
-    Object.values(markersRef.current).forEach((marker) => {
-      map.removeLayer(marker);
-    });
-    markersRef.current = {};
+    layer.clearLayers();
 
-    // Add incident markers
-    incidents.forEach((incident) => {
-      const severityColor = {
-        CRITICAL: '#ef4444',
-        HIGH: '#f59e0b',
-        MED: '#eab308',
-        LOW: '#3b82f6',
-      }[incident.severity] || '#6b7280';
+    const zoomInto = (cluster) => {
+      map.setView([cluster.lat, cluster.lng], Math.min(clusters.zoom + 2, map.getMaxZoom()));
+    };
+
+    (clusters.incidents || []).forEach((point) => {
+      if (point.count > 1) {
+        const marker = L.marker([point.lat, point.lng], {
+          icon: clusterIcon(
+            point.count, 'marker-cluster', `background-color: ${worstSeverityColor(point.by_severity)}`
+          ),
+        });
+        marker.on('click', () => zoomInto(point));
+        marker.bindTooltip(
+          Object.entries(point.by_severity).map(([severity, count]) => `${severity}: ${count}`).join('<br>')
+        );
+        layer.addLayer(marker);
+        return;
+      }
+
+      // Prefer the store's copy, which has every field; the cluster point has the essentials
+      const incident = incidentsById.get(point.id) || { ...point, title: point.label };
+      const severityColor = SEVERITY_COLORS[incident.severity] || '#6b7280';
 
       const html = `
         <div class="map-marker-incident" style="background-color: ${severityColor}">
@@ -66,7 +169,7 @@ export function MapView() {
       `;
 
       const marker = L.marker(
-        [incident.location_lat, incident.location_lng],
+        [point.lat, point.lng],
         {
           icon: L.divIcon({
             html,
@@ -77,7 +180,7 @@ export function MapView() {
             iconAnchor: [20, 40],
           }),
         }
-      ).addTo(map);
+      );
 
       marker.on('click', () => {
         setSelectedIncident(incident.id);
@@ -86,29 +189,33 @@ export function MapView() {
       marker.bindPopup(`
         <div class="map-popup">
           <strong>${incident.title}</strong>
-          <p>${incident.location_name}</p>
+          <p>${incident.location_name || ''}</p>
           <small>Severity: ${incident.severity}</small>
         </div>
       `);
 
-      markersRef.current[`incident-${incident.id}`] = marker;
+      layer.addLayer(marker);
     });
 
-    // Add unit markers
-    units.forEach((unit) => {
-      const unitIcon = {
-        Ambulance: '🚑',
-        Police: '🚓',
-        Fire: '🚒',
-        Rescue: '🆘',
-      }[unit.type] || '📍';
-
-      const statusColor = {
-        Available: '#10b981',
-        Dispatched: '#f59e0b',
-        OnScene: '#ef4444',
-        Offline: '#6b7280',
-      }[unit.status] || '#6b7280';
+    (clusters.units || []).forEach((point) => {
+      if (point.count > 1) {
+        const available = point.by_status.Available || 0;
+        const borderColor = available ? STATUS_COLORS.Available : STATUS_COLORS.Offline;
+        const marker = L.marker([point.lat, point.lng], {
+          icon: clusterIcon(point.count, 'marker-cluster unit', `border-color: ${borderColor}`),
+        });
+        marker.on('click', () => zoomInto(point));
+        marker.bindTooltip(
+          Object.entries(point.by_type).map(([type, count]) => `${UNIT_ICONS[type] || type} ${count}`).join('<br>')
+            + `<br>Available: ${available}`
+        );
+        layer.addLayer(marker);
+        return;
+      }
+
+      const unit = unitsById.get(point.id) || { ...point, name: point.label };
+      const unitIcon = UNIT_ICONS[unit.type] || '📍';
+      const statusColor = STATUS_COLORS[unit.status] || '#6b7280';
 
       const html = `
         <div class="map-marker-unit" style="border-color: ${statusColor}">
@@ -117,7 +224,7 @@ export function MapView() {
       `;
 
       const marker = L.marker(
-        [unit.location_lat, unit.location_lng],
+        [point.lat, point.lng],
         {
           icon: L.divIcon({
             html,
@@ -126,7 +233,7 @@ export function MapView() {
             iconAnchor: [20, 40],
           }),
         }
-      ).addTo(map);
+      );
 
       marker.bindPopup(`
         <div class="map-popup">
@@ -136,9 +243,9 @@ export function MapView() {
         </div>
       `);
 
-      markersRef.current[`unit-${unit.id}`] = marker;
+      layer.addLayer(marker);
     });
-  }, [incidents, units, selectedIncidentId, setSelectedIncident]);
+  }, [clusters, incidentsById, unitsById, selectedIncidentId, setSelectedIncident]);
 
   return (
     <div className="map-container">
@@ -3,6 +3,9 @@
  *
  * Displays sectors with hazard levels, access status, and operational status.
  * Sector-based map view for field incident command.
+ *
+ * Task group totals per sector come precomputed in `sector.rollup`, kept
+ * current by the server on every task group change.
  */
 
 import { useFieldIncidentStore } from '../../store/fieldIncident';
@@ -86,6 +89,26 @@ const SectorMap = () => {
                   <span className="detail-label">Primary Responder:</span>
                   <span className="detail-value">{sector.primary_responder}</span>
                 </div>
+                {sector.rollup && (
+                  <>
+                    <div className="detail-row">
+                      <span className="detail-label">Task Groups:</span>
+                      <span className="detail-value">
+                        {sector.rollup.completed}/{sector.rollup.task_groups} done
+                        {sector.rollup.open_critical > 0 &&
+                          ` · ${sector.rollup.open_critical} critical open`}
+                      </span>
+                    </div>
+                    <div className="detail-row">
+                      <span className="detail-label">Units Assigned:</span>
+                      <span className="detail-value">{sector.rollup.assigned_units}</span>
+                    </div>
+                    <div className="detail-row">
+                      <span className="detail-label">Progress:</span>
+                      <span className="detail-value">{sector.rollup.progress_percent}%</span>
+                    </div>
+                  </>
+                )}
 
                 {/* Hazard Level Visual */}
                 <div className="hazard-visual">
@@ -9,6 +9,36 @@ import { IncidentDetailsPanel } from '../components/IncidentDetailsPanel.jsx';
 import { EventFeed } from '../components/EventFeed.jsx';
 import * as api from '../api/client.js';
 
+/**
+ * Event feed entry for an incident delta, mirroring the server's event log
+ * messages (old values come from the store before the delta is applied).
+ * Unit deltas are location updates and stay out of the feed.
+ */
+const deltaEvent = (delta, incidents) => {
+  if (delta.e !== 'incident') return null;
+  const entry = {
+    id: `${delta.e}-${delta.id}-${delta.v}`,
+    timestamp: new Date().toISOString(),
+    entity_type: 'incident',
+    entity_id: delta.id,
+  };
+  if (delta.op === 'create') {
+    return { ...entry, message: `New incident: ${delta.c.title}`, level: 'warn' };
+  }
+  const incident = incidents.find((item) => item.id === delta.id);
+  if (!incident || (incident.version ?? 0) >= delta.v) return null;
+  if (delta.c.status) {
+    return { ...entry, message: `Status changed: ${incident.status} → ${delta.c.status}`, level: 'info' };
+  }
+  if (delta.c.severity) {
+    return { ...entry, message: `Severity changed: ${incident.severity} → ${delta.c.severity}`, level: 'warn' };
+  }
+  if (delta.c.assigned_unit_ids) {
+    return { ...entry, message: 'Unit assigned', level: 'info' };
+  }
+  return null;
+};
+
 /**
  * Dashboard Page - Main operational dashboard
  */
@@ -17,9 +47,7 @@ export default function Dashboard() {
     setIncidents,
     setUnits,
     setEvents,
-    addIncident,
-    updateIncident,
-    updateUnit,
+    applyDelta,
     addEvent,
     setConnectionStatus,
     connectionStatus,
@@ -57,28 +85,18 @@ export default function Dashboard() {
             if (update.type === 'connected') {
               console.log('Connected to real-time updates');
               setConnectionStatus('CONNECTED');
-            } else if (update.type === 'incident_created') {
-              addIncident(update.data);
-              addEvent({
-                id: Math.random(),
-                timestamp: new Date().toISOString(),
-                entity_type: 'incident',
-                entity_id: update.data.id,
-                message: `New incident: ${update.data.title}`,
-                level: 'warn',
-              });
-            } else if (update.type === 'incident_updated') {
-              updateIncident(update.data.id, update.data);
-              addEvent({
-                id: Math.random(),
-                timestamp: new Date().toISOString(),
-                entity_type: 'incident',
-                entity_id: update.data.id,
-                message: `Incident updated`,
-                level: 'info',
-              });
-            } else if (update.type === 'unit_updated') {
-              updateUnit(update.data.id, update.data);
+            } else if (update.type === 'snapshot') {
+              setIncidents(update.incidents);
+              setUnits(update.units);
+              // Sent on (re)connect without a replayable gap: the feed may have missed entries
+              api.getEvents(100).then(setEvents).catch((error) => console.error('Failed to load events:', error));
+            } else if (update.type === 'delta') {
+              const event = deltaEvent(update, useDashboardStore.getState().incidents);
+              applyDelta(update);
+              if (event) addEvent(event);
+            } else if (update.type === 'batch') {
+              // Coalesced unit location updates
+              update.items.forEach(applyDelta);
             }
           },
           (error) => {
@@ -37,24 +37,27 @@ const FieldIncidentDashboard = () => {
   const setError = useFieldIncidentStore((s) => s.setError);
   const addEvent = useFieldIncidentStore((s) => s.addEvent);
   const updateMajorIncident = useFieldIncidentStore((s) => s.updateMajorIncident);
-  const updateSector = useFieldIncidentStore((s) => s.updateSector);
+  const updateSectorById = useFieldIncidentStore((s) => s.updateSectorById);
   const updateTaskGroup = useFieldIncidentStore((s) => s.updateTaskGroup);
   const connectionStatus = useFieldIncidentStore((s) => s.connectionStatus);
   const loading = useFieldIncidentStore((s) => s.loading);
+  const majorIncidentId = useFieldIncidentStore((s) => s.majorIncident?.id);
   const error = useFieldIncidentStore((s) => s.error);
 
+  const applySnapshot = (data) => {
+    setMajorIncident(data.major_incident);
+    setSectors(data.sectors);
+    setTaskGroups(data.task_groups);
+    setEvents(data.events);
+  };
+
   // Load initial data
   useEffect(() => {
     const loadInitialData = async () => {
       try {
         setLoading(true);
         setError(null);
-        const data = await getFieldIncident();
-
-        setMajorIncident(data.major_incident);
-        setSectors(data.sectors);
-        setTaskGroups(data.task_groups);
-        setEvents(data.events);
+        applySnapshot(await getFieldIncident());
         setLoading(false);
       } catch (err) {
         console.error('Failed to load field incident data:', err);
@@ -66,50 +69,61 @@ const FieldIncidentDashboard = () => {
     loadInitialData();
   }, []); // Empty dependency array - only run once on mount
 
-  // Connect to real-time updates
+  // Connect to real-time updates for the loaded incident only
   useEffect(() => {
+    if (!majorIncidentId) return undefined;
     let eventSource = null;
     let reconnectTimeout = null;
+    let lastEventId = null;
 
     const connect = () => {
       try {
-        eventSource = connectToFieldIncidentStream();
+        // The browser resends Last-Event-ID on its own reconnects; a new
+        // EventSource after a failure passes it explicitly
+        eventSource = connectToFieldIncidentStream(majorIncidentId, lastEventId);
 
         eventSource.onopen = () => {
           setConnectionStatus('CONNECTED');
         };
 
         eventSource.onmessage = (event) => {
+          if (event.lastEventId) {
+            lastEventId = event.lastEventId;
+          }
           try {
             const data = JSON.parse(event.data);
 
             if (data.type === 'connected') {
               setConnectionStatus('CONNECTED');
+            } else if (data.type === 'resync') {
+              // Missed updates can no longer be replayed: reload the full state
+              getFieldIncident(majorIncidentId)
+                .then(applySnapshot)
+                .catch((err) => console.error('Failed to resync field incident:', err));
             } else if (data.type === 'incident_update') {
-              // Apply updates from server simulation
-              const update = data.data;
+              // Apply changes from the simulation or from other clients' writes
+              const { major_incident_id: _id, sector_updates, task_updates, new_events, ...incidentFields } =
+                data.data;
 
-              if (update.estimated_casualties) {
-                updateMajorIncident({
-                  estimated_casualties: update.estimated_casualties,
-                });
+              if (Object.keys(incidentFields).length > 0) {
+                updateMajorIncident(incidentFields);
               }
 
-              if (update.sector_updates) {
-                Object.entries(update.sector_updates).forEach(([idx, sectorUpdate]) => {
-                  // Re-fetch sector data to get accurate index mapping
-                  // In production, this would be handled by proper indexing
+              if (sector_updates) {
+                Object.entries(sector_updates).forEach(([sectorId, sectorUpdate]) => {
+                  updateSectorById(parseInt(sectorId), sectorUpdate);
                 });
               }
 
-              if (update.task_updates) {
-                Object.entries(update.task_updates).forEach(([idx, taskUpdate]) => {
-                  updateTaskGroup(parseInt(idx), taskUpdate);
+              if (task_updates) {
+                Object.entries(task_updates).forEach(([taskGroupId, taskUpdate]) => {
+                  updateTaskGroup(parseInt(taskGroupId), taskUpdate);
                 });
               }
 
-              if (update.new_event) {
-                addEvent(update.new_event);
+              if (new_events) {
+                // Oldest first, so each lands on top of the timeline in order
+                new_events.forEach((event) => addEvent(event));
               }
             } else if (data.type === 'heartbeat') {
               // Keep-alive signal
@@ -121,10 +135,11 @@ const FieldIncidentDashboard = () => {
 
         eventSource.onerror = () => {
           setConnectionStatus('OFFLINE');
-          eventSource.close();
-
-          // Attempt reconnect after 5 seconds
-          reconnectTimeout = setTimeout(connect, 5000);
+          // While CONNECTING the browser is already retrying (with Last-Event-ID);
+          // only a closed source needs replacing
+          if (eventSource.readyState === EventSource.CLOSED) {
+            reconnectTimeout = setTimeout(connect, 5000);
+          }
         };
       } catch (err) {
         console.error('Failed to connect to field incident stream:', err);
@@ -143,20 +158,21 @@ const FieldIncidentDashboard = () => {
         clearTimeout(reconnectTimeout);
       }
     };
-  }, []); // Empty dependency array - Zustand setters are stable
+  }, [majorIncidentId]); // Zustand setters are stable
 
   // Simulate updates for demo (remove in production)
   useEffect(() => {
+    if (!majorIncidentId) return undefined;
     const simulationInterval = setInterval(async () => {
       try {
-        await simulateFieldIncidentUpdate();
+        await simulateFieldIncidentUpdate(majorIncidentId);
       } catch (err) {
         console.error('Simulation update failed:', err);
       }
     }, 5000);
 
     return () => clearInterval(simulationInterval);
-  }, []);
+  }, [majorIncidentId]);
 
   // Loading state
   if (loading) {
@@ -1,13 +1,12 @@
 import { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
-import api from "../api/client";
+import { getAllPages } from "../api/client";
 
 export default function Incidents() {
   const [incidents, setIncidents] = useState([]);
 
   const fetchIncidents = async () => {
-    const res = await api.get("/incidents/");
-    setIncidents(res.data);
+    setIncidents(await getAllPages("/incidents/", { fields: "id,title,status,severity" }));
   };
 
   useEffect(() => {
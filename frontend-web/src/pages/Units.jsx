@@ -1,6 +1,6 @@
 import { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
-import api from "../api/client";
+import { getAllPages } from "../api/client";
 import MapView from "../map/MapView.jsx";
 
 export default function Units() {
@@ -8,12 +8,12 @@ export default function Units() {
   const [incidents, setIncidents] = useState([]);
 
   const fetchData = async () => {
-    const [unitsRes, incidentsRes] = await Promise.all([
-      api.get("/units/"),
-      api.get("/incidents/"),
+    const [allUnits, allIncidents] = await Promise.all([
+      getAllPages("/units/"),
+      getAllPages("/incidents/"),
     ]);
-    setUnits(unitsRes.data);
-    setIncidents(incidentsRes.data);
+    setUnits(allUnits);
+    setIncidents(allIncidents);
   };
 
   useEffect(() => {
@@ -14,6 +14,7 @@ export class RealtimeService {
     this.reconnectInterval = 3000;
     this.maxReconnectInterval = 30000;
     this.reconnectCount = 0;
+    this.lastEventId = null;
   }
 
   connect() {
@@ -22,7 +23,8 @@ export class RealtimeService {
     this.isConnecting = true;
 
     try {
-      this.eventSource = connectToUpdatesStream();
+      // A fresh EventSource sends no Last-Event-ID of its own
+      this.eventSource = connectToUpdatesStream(this.lastEventId);
 
       this.eventSource.onopen = () => {
         console.log('[Realtime] Connected to updates stream');
@@ -35,6 +37,9 @@ export class RealtimeService {
       };
 
       this.eventSource.onmessage = (event) => {
+        if (event.lastEventId) {
+          this.lastEventId = event.lastEventId;
+        }
         try {
           const data = JSON.parse(event.data);
           if (data.type !== 'heartbeat') {
@@ -52,6 +52,24 @@ export const useDashboardStore = create((set, get) => ({
     lastUpdateTime: new Date(),
   })),
   
+  // Apply a realtime delta ({ e, id, v, c, op }); deltas older than the held version are ignored
+  applyDelta: (delta) => set((state) => {
+    const key = delta.e === 'unit' ? 'units' : 'incidents';
+    const items = state[key];
+    if (delta.op === 'create') {
+      if (items.some(item => item.id === delta.id)) return {};
+      return { [key]: [delta.c, ...items], lastUpdateTime: new Date() };
+    }
+    return {
+      [key]: items.map(item =>
+        item.id === delta.id && (item.version ?? 0) < delta.v
+          ? { ...item, ...delta.c, version: delta.v }
+          : item
+      ),
+      lastUpdateTime: new Date(),
+    };
+  }),
+  
   addEvent: (event) => set((state) => ({
     events: [event, ...state.events].slice(0, 100), // Keep last 100 events
     lastUpdateTime: new Date(),
@@ -56,10 +56,17 @@ export const useFieldIncidentStore = create((set, get) => ({
       ),
     })),
 
+  updateSectorById: (sectorId, updates) =>
+    set((state) => ({
+      sectors: state.sectors.map((s) =>
+        s.id === sectorId ? { ...s, ...updates } : s
+      ),
+    })),
+
   updateTaskGroup: (taskGroupId, updates) =>
     set((state) => ({
-      taskGroups: state.taskGroups.map((tg, idx) =>
-        idx === taskGroupId ? { ...tg, ...updates } : tg
+      taskGroups: state.taskGroups.map((tg) =>
+        tg.id === taskGroupId ? { ...tg, ...updates } : tg
       ),
     })),
 
@@ -26,11 +26,11 @@ export default function ReportScreen({ selectedTask, token, online, onDone }) {
         await sendUpdate();
         onDone();
       } else {
-        await saveReport(selectedTask.title, notes, status, null);
+        await saveReport(selectedTask.title, notes, status, null, selectedTask.id);
         onDone();
       }
     } catch (err) {
-      await saveReport(selectedTask.title, notes, status, null);
+      await saveReport(selectedTask.title, notes, status, null, selectedTask.id);
       onDone();
     }
   };
@@ -1,6 +1,13 @@
 import { useEffect, useState } from "react";
 import { View, Text, Button, Switch } from "react-native";
-import { getReports, clearReports } from "../storage/offlineDB";
+import {
+  getReports,
+  clearReports,
+  getSyncToken,
+  applySyncBatch,
+  resetSyncedData,
+  getDeviceId,
+} from "../storage/offlineDB";
 
 export default function SyncScreen({ token, online, setOnline }) {
   const [reports, setReports] = useState([]);
@@ -16,25 +23,68 @@ export default function SyncScreen({ token, online, setOnline }) {
 
   const syncNow = async () => {
     if (!online) return;
+    // One request for the whole queue; op ids make a retried batch safe to resend
+    const deviceId = await getDeviceId();
+    const operations = [];
     for (const report of reports) {
-      await fetch("http://localhost:8000/api/incidents/", {
-        method: "POST",
-        headers: {
-          "Content-Type": "application/json",
-          Authorization: `Bearer ${token}`,
-        },
-        body: JSON.stringify({
+      if (report.taskId) {
+        operations.push({
+          op_id: `${deviceId}:${report.id}:status`,
+          type: "task_status",
+          task_id: report.taskId,
+          status: report.status,
+        });
+      }
+      operations.push({
+        op_id: `${deviceId}:${report.id}:incident`,
+        type: "create_incident",
+        data: {
           title: `Offline ${report.title}`,
           description: report.details,
           location_lat: 32.0,
           location_lng: 34.0,
           severity: "LOW",
           status: "OPEN",
-        }),
+        },
+      });
+    }
+    if (operations.length) {
+      const res = await fetch("http://localhost:8000/api/batch/", {
+        method: "POST",
+        headers: {
+          "Content-Type": "application/json",
+          Authorization: `Bearer ${token}`,
+        },
+        body: JSON.stringify({ operations }),
       });
+      if (!res.ok) return;
     }
     await clearReports();
     setReports([]);
+    await pullChanges();
+  };
+
+  // Fetch only what changed since the stored sync token; keep going while the server has more
+  const pullChanges = async () => {
+    let syncToken = await getSyncToken();
+    let hasMore = true;
+    while (hasMore) {
+      const url = syncToken
+        ? `http://localhost:8000/api/sync/?since=${encodeURIComponent(syncToken)}`
+        : "http://localhost:8000/api/sync/";
+      const res = await fetch(url, { headers: { Authorization: `Bearer ${token}` } });
+      if (res.status === 410) {
+        // Sync token older than the server keeps deletions for: start over
+        await resetSyncedData();
+        syncToken = null;
+        continue;
+      }
+      if (!res.ok) return;
+      const batch = await res.json();
+      await applySyncBatch(batch);
+      syncToken = batch.token;
+      hasMore = batch.has_more;
+    }
   };
 
   return (
@@ -4,12 +4,19 @@ import { View, Text, Button, FlatList } from "react-native";
 export default function TasksScreen({ token, onSelectTask }) {
   const [tasks, setTasks] = useState([]);
 
+  // The list is cursor-paginated: follow `next` until the last page
   const fetchTasks = async () => {
-    const res = await fetch("http://localhost:8000/api/tasks/", {
-      headers: { Authorization: `Bearer ${token}` },
-    });
-    const data = await res.json();
-    setTasks(data);
+    const all = [];
+    let url = "http://localhost:8000/api/tasks/?page_size=1000";
+    while (url) {
+      const res = await fetch(url, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      const data = await res.json();
+      all.push(...data.results);
+      url = data.next;
+    }
+    setTasks(all);
   };
 
   useEffect(() => {
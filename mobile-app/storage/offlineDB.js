@@ -4,16 +4,23 @@ const db = SQLite.openDatabase("offlineReports.db");
 
 db.transaction((tx) => {
   tx.executeSql(
-    "CREATE TABLE IF NOT EXISTS reports (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, details TEXT, status TEXT, imageUri TEXT);"
+    "CREATE TABLE IF NOT EXISTS reports (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT, details TEXT, status TEXT, imageUri TEXT, taskId INTEGER);"
   );
+  // Databases created before taskId existed; fails harmlessly once the column is there
+  tx.executeSql("ALTER TABLE reports ADD COLUMN taskId INTEGER;", [], null, () => true);
+  // Local copy of server incidents/tasks/units, kept current by /api/sync/
+  tx.executeSql(
+    "CREATE TABLE IF NOT EXISTS entities (kind TEXT, id INTEGER, data TEXT, PRIMARY KEY (kind, id));"
+  );
+  tx.executeSql("CREATE TABLE IF NOT EXISTS sync_state (key TEXT PRIMARY KEY, value TEXT);");
 });
 
-export const saveReport = (title, details, status, imageUri) =>
+export const saveReport = (title, details, status, imageUri, taskId = null) =>
   new Promise((resolve, reject) => {
     db.transaction((tx) => {
       tx.executeSql(
-        "INSERT INTO reports (title, details, status, imageUri) VALUES (?, ?, ?, ?);",
-        [title, details, status, imageUri],
+        "INSERT INTO reports (title, details, status, imageUri, taskId) VALUES (?, ?, ?, ?, ?);",
+        [title, details, status, imageUri, taskId],
         (_, result) => resolve(result.insertId),
         (_, error) => reject(error)
       );
@@ -43,3 +50,91 @@ export const clearReports = () =>
       );
     });
   });
+
+export const getSyncToken = () =>
+  new Promise((resolve, reject) => {
+    db.transaction((tx) => {
+      tx.executeSql(
+        "SELECT value FROM sync_state WHERE key = 'token';",
+        [],
+        (_, { rows }) => resolve(rows.length ? rows.item(0).value : null),
+        (_, error) => reject(error)
+      );
+    });
+  });
+
+// Apply one /api/sync/ response: upserts first, then deletions, then the new token
+export const applySyncBatch = (batch) =>
+  new Promise((resolve, reject) => {
+    db.transaction(
+      (tx) => {
+        const upserts = { incident: batch.incidents, task: batch.tasks, unit: batch.units };
+        Object.entries(upserts).forEach(([kind, items]) => {
+          items.forEach((item) => {
+            tx.executeSql("INSERT OR REPLACE INTO entities (kind, id, data) VALUES (?, ?, ?);", [
+              kind,
+              item.id,
+              JSON.stringify(item),
+            ]);
+          });
+        });
+        Object.entries(batch.deleted).forEach(([kind, ids]) => {
+          ids.forEach((id) => {
+            tx.executeSql("DELETE FROM entities WHERE kind = ? AND id = ?;", [kind, id]);
+          });
+        });
+        tx.executeSql("INSERT OR REPLACE INTO sync_state (key, value) VALUES ('token', ?);", [batch.token]);
+      },
+      (error) => reject(error),
+      () => resolve()
+    );
+  });
+
+export const resetSyncedData = () =>
+  new Promise((resolve, reject) => {
+    db.transaction(
+      (tx) => {
+        tx.executeSql("DELETE FROM entities;");
+        tx.executeSql("DELETE FROM sync_state WHERE key = 'token';");
+      },
+      (error) => reject(error),
+      () => resolve()
+    );
+  });
+
+export const getSyncedEntities = (kind) =>
+  new Promise((resolve, reject) => {
+    db.transaction((tx) => {
+      tx.executeSql(
+        "SELECT data FROM entities WHERE kind = ? ORDER BY id;",
+        [kind],
+        (_, { rows }) => resolve(rows._array.map((row) => JSON.parse(row.data))),
+        (_, error) => reject(error)
+      );
+    });
+  });
+
+// Random per-install id; prefixes batch operation ids so retries are recognised server-side
+export const getDeviceId = () =>
+  new Promise((resolve, reject) => {
+    db.transaction((tx) => {
+      tx.executeSql(
+        "SELECT value FROM sync_state WHERE key = 'device_id';",
+        [],
+        (_, { rows }) => {
+          if (rows.length) {
+            resolve(rows.item(0).value);
+            return;
+          }
+          const deviceId = `${Date.now().toString(36)}-${Math.random().toString(36).slice(2, 10)}`;
+          tx.executeSql(
+            "INSERT INTO sync_state (key, value) VALUES ('device_id', ?);",
+            [deviceId],
+            () => resolve(deviceId),
+            (_, error) => reject(error)
+          );
+        },
+        (_, error) => reject(error)
+      );
+    });
+  });
@@ -51,6 +51,10 @@ start "Emergency CRM - Backend" cmd /k "pip install -q -r requirements.txt && ec
 REM Wait for backend to initialize
 timeout /t 3 /nobreak >nul
 
+REM External feed ingest runs as its own process (the web server no longer polls)
+echo Starting Ingest Runner...
+start "Emergency CRM - Ingest" cmd /k "python manage.py run_ingest"
+
 echo.
 echo Starting Frontend Dashboard (Vite)...
 cd /d "%ROOT%frontend-web"
@@ -83,6 +87,7 @@ pause >nul
 
 REM Cleanup: Kill processes
 taskkill /FI "WINDOWTITLE eq Emergency CRM - Backend" /T /F >nul 2>&1
+taskkill /FI "WINDOWTITLE eq Emergency CRM - Ingest" /T /F >nul 2>&1
 taskkill /FI "WINDOWTITLE eq Emergency CRM - Frontend" /T /F >nul 2>&1
 
 echo.
@@ -41,8 +41,8 @@ export VITE_API_URL=http://localhost:8000/api
 cleanup() {
     echo ""
     echo "Shutting down services..."
-    kill %1 %2 2>/dev/null || true
-    wait %1 %2 2>/dev/null || true
+    kill %1 %2 %3 2>/dev/null || true
+    wait %1 %2 %3 2>/dev/null || true
 }
 
 trap cleanup EXIT
@@ -66,6 +66,15 @@ BACKEND_PID=$!
 # Wait for backend to initialize
 sleep 3
 
+# External feed ingest runs as its own process (the web server no longer polls)
+echo ""
+echo "Starting Ingest Runner..."
+(
+    cd "$ROOT/backend"
+    python manage.py run_ingest 2>&1 || python3 manage.py run_ingest 2>&1
+) &
+INGEST_PID=$!
+
 echo ""
 echo "Starting Frontend Dashboard (Vite)..."
 (